@@ -1,21 +1,43 @@
 from flask import Flask
+from . import (
+    caching,
+    json_provider,
+    metrics,
+    migrations,
+    profiler,
+    search,
+    seed,
+    summaries,
+    versioning,
+)
 from .config import config_by_name
 from .database import init_app
-from .routes import customer_bp, order_bp, product_bp
+from .routes import customer_bp, internal_bp, order_bp, product_bp, summary_bp
 
 
 def create_app(config_name):
     app = Flask(__name__)
 
     app.config.from_object(config_by_name[config_name])
+    json_provider.init_app(app)
 
     init_app(app)
+    versioning.init_app(app)
+    caching.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+    seed.init_app(app)
+    summaries.init_app(app)
+    search.init_app(app)
+    migrations.init_app(app)
 
     app_root = "/"
 
     app.register_blueprint(customer_bp, url_prefix=app_root)
     app.register_blueprint(product_bp, url_prefix=app_root)
     app.register_blueprint(order_bp, url_prefix=app_root)
+    app.register_blueprint(summary_bp, url_prefix=app_root)
+    app.register_blueprint(internal_bp, url_prefix=app_root)
 
     @app.route("/")
     def index():
@@ -0,0 +1,412 @@
+"""ASGI app serving the customer, product and order endpoints asynchronously.
+
+:func:`create_asgi_app` mounts the list, create, read, update and delete
+routes of the Flask app, its searches, revenue, sales, order total, order
+history and monthly summaries with the same paths, query arguments, status
+codes, messages and JSON. Handlers await the asyncio services
+(``app.services.Async*Service``) on a session from :mod:`app.async_database`,
+so a request waiting on the database holds no thread: one process keeps as
+many requests in flight as its connection pool (``DB_POOL_SIZE`` +
+``DB_MAX_OVERFLOW``) allows.
+
+Streaming (``?stream=``, ``Accept: application/x-ndjson``) is refused rather
+than answered with a plain page; bulk writes, response caching and
+conditional requests stay on the Flask app.
+"""
+
+import contextlib
+import os
+from urllib.parse import urlencode
+
+from flask import Config
+from marshmallow import ValidationError
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from . import json_provider
+from .async_database import create_engine, create_sessions
+from .config import config_by_name
+from .fieldsets import parse_fields, sparse_schema
+from .filters import (
+    parse_date_range,
+    parse_ids,
+    parse_list_query,
+    parse_month_range,
+    parse_search,
+)
+from .models import (
+    Customer,
+    OrderSchema,
+    Product,
+    customer_schema,
+    customers_schema,
+    order_schema,
+    orders_schema,
+    product_schema,
+    products_schema,
+)
+from .pagination import parse_page_args, split_page
+from .services import (
+    AsyncCustomerService,
+    AsyncOrderService,
+    AsyncProductService,
+    AsyncSummaryService,
+)
+from .streaming import NDJSON_MIMETYPE
+
+# Characters werkzeug's url_for leaves unquoted in a query string.
+_QUERY_SAFE = "!$'()*,/:;?@"
+
+
+def json_response(obj, status_code=200, headers=None):
+    """Response encoding ``obj`` as the Flask app's JSON provider does."""
+    return Response(
+        json_provider.dumps_bytes(obj) + b"\n",
+        status_code,
+        headers,
+        media_type="application/json",
+    )
+
+
+def _message(text, status_code):
+    return json_response({"message": text}, status_code)
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def _read(request, read, *args):
+    async with request.app.state.sessions() as session:
+        return await read(session, *args)
+
+
+def _page_response(request, items, next_cursor):
+    """JSON list response advertising the next page, as
+    :func:`app.pagination.page_response` builds it."""
+    headers = {}
+    if next_cursor:
+        args = request.query_params
+        params = [
+            (name, next_cursor if name == "after" else value)
+            for name, value in args.multi_items()
+        ]
+        if "after" not in args:
+            params.append(("after", next_cursor))
+        query = urlencode(params, safe=_QUERY_SAFE)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.path}?{query}>; rel="next"'
+    return json_response(items, headers=headers)
+
+
+def _refuse_streaming(request):
+    """Error response to a list request the Flask app would stream, or None."""
+    if NDJSON_MIMETYPE in request.headers.get("accept", ""):
+        return _message(f"{NDJSON_MIMETYPE} is served by the WSGI app only.", 406)
+    if "stream" in request.query_params:
+        return _message("stream is served by the WSGI app only.", 400)
+    return None
+
+
+class Resource:
+    """List, create, read, update and delete routes over one async service.
+
+    ``id_column`` enables ``?ids=`` on the list and ``searchable`` the
+    ``/search`` route.
+    """
+
+    def __init__(
+        self,
+        path,
+        label,
+        service,
+        schema,
+        many_schema,
+        convertor,
+        id_column=None,
+        searchable=False,
+    ):
+        self.path = path
+        self.label = label
+        self.service = service
+        self.schema = schema
+        self.many_schema = many_schema
+        self.convertor = convertor
+        self.id_column = id_column
+        self.searchable = searchable
+
+    def routes(self):
+        item = f"{self.path}/{{key:{self.convertor}}}"
+        routes = [
+            Route(self.path, self.get_all, methods=["GET"]),
+            Route(self.path, self.create, methods=["POST"]),
+        ]
+        if self.searchable:
+            # Ahead of the item routes, whose key would match "search".
+            routes.append(Route(f"{self.path}/search", self.search, methods=["GET"]))
+        return routes + [
+            Route(item, self.get_by_id, methods=["GET"]),
+            Route(item, self.update, methods=["PUT"]),
+            Route(item, self.delete, methods=["DELETE"]),
+        ]
+
+    def _not_found(self, key):
+        return _message(f"{self.label} ID {key} not found", 404)
+
+    async def get_all(self, request):
+        refused = _refuse_streaming(request)
+        if refused is not None:
+            return refused
+
+        args = request.query_params
+        config = request.app.state.config
+        try:
+            fields = parse_fields(type(self.schema), args)
+            ids = None
+            if self.id_column is not None:
+                ids = parse_ids(self.id_column, args, config)
+            if ids is None:
+                where, sort = parse_list_query(
+                    self.service.FILTERS,
+                    self.service.SORTS,
+                    self.service.PAGE_KEYS,
+                    args,
+                    config,
+                )
+                keys = sort[0]
+                limit, after = parse_page_args(keys, args, config)
+        except ValueError as e:
+            return _message(str(e), 400)
+
+        schema = sparse_schema(self.many_schema, fields)
+
+        if ids is not None:
+            found, missing = await _read(request, self.service.get_many, ids, fields)
+            return json_response({"items": schema.dump(found), "missing": missing})
+
+        try:
+            rows = await _read(
+                request, self.service.get_all, limit + 1, after, fields, where, sort
+            )
+            rows, next_cursor = split_page(rows, keys, limit)
+            items = schema.dump(rows)
+        except Exception as e:
+            return _message(f"An error occurred: {str(e)}", 500)
+        return _page_response(request, items, next_cursor)
+
+    async def search(self, request):
+        args = request.query_params
+        try:
+            fields = parse_fields(type(self.schema), args)
+            words, limit = parse_search(args, request.app.state.config)
+        except ValueError as e:
+            return _message(str(e), 400)
+
+        found = await _read(request, self.service.search, words, limit, fields)
+        return json_response(sparse_schema(self.many_schema, fields).dump(found))
+
+    async def create(self, request):
+        json_data = await _json_body(request)
+        if not json_data:
+            return _message("No input data provided", 400)
+        try:
+            data = self.schema.load(json_data, partial=True)
+        except ValidationError as err:
+            return json_response(err.messages, 400)
+
+        async with request.app.state.sessions() as session:
+            try:
+                created = await self.service.create(session, data)
+            except Exception as e:
+                await session.rollback()
+                return _message(f"Error inserting {self.label.lower()}: {str(e)}", 500)
+            return json_response(self.schema.dump(created), 201)
+
+    async def get_by_id(self, request):
+        key = request.path_params["key"]
+        try:
+            fields = parse_fields(type(self.schema), request.query_params)
+        except ValueError as e:
+            return _message(str(e), 400)
+
+        async with request.app.state.sessions() as session:
+            found = await self.service.get_by_id(session, key, fields=fields)
+            if found:
+                return json_response(sparse_schema(self.schema, fields).dump(found))
+        return self._not_found(key)
+
+    async def update(self, request):
+        key = request.path_params["key"]
+        json_data = await _json_body(request)
+        if not json_data:
+            return _message("No input data provided", 400)
+        try:
+            data = self.schema.load(json_data, partial=True)
+        except ValidationError as err:
+            return json_response(err.messages, 400)
+
+        async with request.app.state.sessions() as session:
+            updated = await self.service.update(session, key, data)
+            if updated:
+                return json_response(self.schema.dump(updated))
+        return self._not_found(key)
+
+    async def delete(self, request):
+        key = request.path_params["key"]
+        async with request.app.state.sessions() as session:
+            if await self.service.delete(session, key):
+                return Response(status_code=204)
+        return self._not_found(key)
+
+
+async def get_customer_revenue(request):
+    customer_id = request.path_params["customer_id"]
+    try:
+        date_from, date_to = parse_date_range(request.query_params)
+    except ValueError as e:
+        return _message(str(e), 400)
+
+    revenue = await _read(
+        request, AsyncCustomerService.get_revenue, customer_id, date_from, date_to
+    )
+    if revenue:
+        return json_response(revenue)
+    return _message(f"Customer ID {customer_id} not found", 404)
+
+
+async def get_product_sales(request):
+    product_id = request.path_params["product_id"]
+    sales = await _read(request, AsyncProductService.get_sales, product_id)
+    if sales:
+        return json_response(sales)
+    return _message(f"Product ID {product_id} not found", 404)
+
+
+async def get_order_total(request):
+    order_id = request.path_params["order_id"]
+    total = await _read(request, AsyncOrderService.get_total, order_id)
+    if total:
+        return json_response(total)
+    return _message(f"Order ID {order_id} not found", 404)
+
+
+async def get_customer_history(request):
+    customer_id = request.path_params["customer_id"]
+    keys = AsyncOrderService.PAGE_KEYS
+    args = request.query_params
+    try:
+        fields = parse_fields(OrderSchema, args)
+        limit, after = parse_page_args(keys, args, request.app.state.config)
+        date_from, date_to = parse_date_range(args)
+    except ValueError as e:
+        return _message(str(e), 400)
+
+    history = await _read(
+        request,
+        AsyncOrderService.get_customer_history,
+        customer_id,
+        limit + 1,
+        after,
+        date_from,
+        date_to,
+        fields,
+    )
+    if history is None:
+        return _message(f"Customer ID {customer_id} not found", 404)
+    if not history and after is None:
+        return _message(f"Customer ID {customer_id} has no orders", 200)
+
+    history, next_cursor = split_page(history, keys, limit)
+    items = sparse_schema(orders_schema, fields).dump(history)
+    return _page_response(request, items, next_cursor)
+
+
+def _summary(read, label, key_name):
+    """Handler of a monthly summary route keyed by the ``key`` path param;
+    ``label`` names the 404 message, or ``None`` when there is none."""
+
+    async def handler(request):
+        key = request.path_params["key"]
+        try:
+            month_from, month_to = parse_month_range(request.query_params)
+        except ValueError as e:
+            return _message(str(e), 400)
+
+        months = await _read(request, read, key, month_from, month_to)
+        if months is None:
+            return _message(f"{label} ID {key} not found", 404)
+        return json_response({key_name: key, "Months": months})
+
+    return handler
+
+
+RESOURCES = (
+    Resource(
+        "/customers",
+        "Customer",
+        AsyncCustomerService,
+        customer_schema,
+        customers_schema,
+        "str",
+        id_column=Customer.CustomerID,
+        searchable=True,
+    ),
+    Resource(
+        "/products",
+        "Product",
+        AsyncProductService,
+        product_schema,
+        products_schema,
+        "int",
+        id_column=Product.ProductID,
+        searchable=True,
+    ),
+    Resource("/orders", "Order", AsyncOrderService, order_schema, orders_schema, "int"),
+)
+
+READ_ROUTES = (
+    Route("/customers/{customer_id:str}/revenue", get_customer_revenue),
+    Route("/products/{product_id:int}/sales", get_product_sales),
+    Route("/orders/{order_id:int}/total", get_order_total),
+    Route("/orders/history/{customer_id:str}", get_customer_history),
+    Route(
+        "/summaries/products/{key:int}",
+        _summary(AsyncSummaryService.get_product_months, "Product", "ProductID"),
+    ),
+    Route(
+        "/summaries/customers/{key:str}",
+        _summary(AsyncSummaryService.get_customer_months, "Customer", "CustomerID"),
+    ),
+    Route(
+        "/summaries/countries/{key:str}",
+        _summary(AsyncSummaryService.get_country_months, None, "ShipCountry"),
+    ),
+)
+
+
+def create_asgi_app(config_name):
+    config = Config(os.path.dirname(os.path.abspath(__file__)))
+    config.from_object(config_by_name[config_name])
+    engine = create_engine(config)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    app = Starlette(
+        debug=config.get("DEBUG", False),
+        routes=[
+            *(route for resource in RESOURCES for route in resource.routes()),
+            *READ_ROUTES,
+        ],
+        lifespan=lifespan,
+    )
+    app.state.config = config
+    app.state.engine = engine
+    app.state.sessions = create_sessions(engine)
+    return app
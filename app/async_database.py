@@ -0,0 +1,52 @@
+"""Asyncio engine and session factory for the ASGI app (``app.asgi``).
+
+The engine connects to ``SQLALCHEMY_DATABASE_URI`` through the asyncio driver
+of its backend (aiosqlite, aiomysql) with the pool and SQLite settings
+:func:`app.database.engine_options` derives for the synchronous engine. Its
+pool is SQLAlchemy's asyncio ``QueuePool``: a request waiting for a
+connection or a query suspends its task instead of blocking a thread.
+
+Replicas (``DB_REPLICAS``) are not routed to; every session reads from and
+writes to the primary.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from .database import _set_sqlite_pragmas, engine_options
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+
+def async_url(url):
+    """``url`` with its driver replaced by the backend's asyncio driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend}.")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_engine(config):
+    """Asyncio engine for the app ``config``."""
+    options = engine_options(config)
+    # InstrumentedQueuePool is thread-blocking; keep the asyncio default.
+    options.pop("poolclass", None)
+    engine = create_async_engine(
+        async_url(config["SQLALCHEMY_DATABASE_URI"]), **options
+    )
+
+    pragmas = config.get("SQLITE_PRAGMAS")
+    if pragmas and engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas(pragmas))
+    return engine
+
+
+def create_sessions(engine):
+    """Session factory for ``engine``.
+
+    Instances stay loaded after commit so handlers can serialize what they
+    wrote without another (lazy, hence unavailable) round trip.
+    """
+    return async_sessionmaker(engine, expire_on_commit=False)
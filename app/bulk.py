@@ -0,0 +1,153 @@
+"""Request and write helpers shared by the bulk write endpoints."""
+
+import json
+from collections import defaultdict
+
+from flask import current_app, request
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from .database import db, upsert
+from .streaming import NDJSON_MIMETYPE
+
+
+def read_items():
+    """Items of a bulk request body, sent as a JSON array or as NDJSON.
+
+    Raises ``ValueError`` when the body is neither.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        lines = request.get_data(as_text=True).splitlines()
+        try:
+            return [json.loads(line) for line in lines if line.strip()]
+        except ValueError:
+            raise ValueError("Body is not valid NDJSON.") from None
+
+    items = request.get_json(silent=True)
+    if items is None:
+        raise ValueError("Body must be a JSON array or NDJSON.")
+    if not isinstance(items, list):
+        raise ValueError("Body must be a JSON array.")
+    return items
+
+
+def chunk_size():
+    """Rows per transaction, from ``?chunk_size=`` or ``BULK_CHUNK_SIZE``.
+
+    Clamped to ``BULK_CHUNK_SIZE_MAX``; raises ``ValueError`` on bad input.
+    """
+    size = request.args.get("chunk_size", current_app.config["BULK_CHUNK_SIZE"])
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError("chunk_size must be an integer.") from None
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    return min(size, current_app.config["BULK_CHUNK_SIZE_MAX"])
+
+
+def chunks(items, size):
+    """Split ``items`` into consecutive ``(offset, chunk)`` pairs of ``size``."""
+    for start in range(0, len(items), size):
+        yield start, items[start : start + size]
+
+
+def error_message(error):
+    """The driver's message for a failed statement, else the error itself."""
+    return str(error.orig if getattr(error, "orig", None) else error)
+
+
+def write_chunks(items, size, write):
+    """Call ``write(chunk)`` on chunks of ``size`` items, one transaction each.
+
+    Yields ``(offset, chunk, result, error)`` per chunk: ``write``'s return
+    value once committed, or the error message after rolling back.
+    """
+    for offset, chunk in chunks(items, size):
+        try:
+            result = write(chunk)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            yield offset, chunk, None, error_message(e)
+        else:
+            yield offset, chunk, result, None
+
+
+def upsert_totals(results):
+    """Sum the per-chunk counts of :func:`upsert_rows` from
+    :func:`write_chunks`, listing each failed chunk's offset, size and error."""
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "errors": []}
+    for offset, chunk, counts, error in results:
+        if error is not None:
+            totals["errors"].append(
+                {"offset": offset, "count": len(chunk), "error": error}
+            )
+            continue
+        for key, count in counts.items():
+            totals[key] += count
+    return totals
+
+
+def _fold(key):
+    return key.casefold() if isinstance(key, str) else key
+
+
+def upsert_rows(model, rows):
+    """Insert or update ``rows`` of ``model`` in the current transaction.
+
+    Existing rows are fetched with one IN query so rows whose values would not
+    change are skipped and partial rows can be completed. Rows repeating a
+    primary key are merged, later values winning. String keys are matched to
+    the fetched rows case-insensitively, since MySQL's collation finds
+    ``ALFKI`` for ``alfki``; such a row updates the stored key's row. Returns
+    counts of inserted, updated and unchanged rows.
+    """
+    table = model.__table__
+    (pk,) = table.primary_key.columns
+
+    merged, keyless = {}, []
+    for row in rows:
+        if row.get(pk.key) is None:
+            keyless.append(row)
+        else:
+            merged[row[pk.key]] = {**merged.get(row[pk.key], {}), **row}
+
+    existing = {}
+    if merged:
+        result = db.session.execute(select(table).where(pk.in_(list(merged))))
+        existing = {_fold(row[pk.key]): row for row in result.mappings()}
+
+    counts = {"inserted": len(keyless), "updated": 0, "unchanged": 0}
+    writes = defaultdict(list)
+    for key, row in merged.items():
+        current = existing.get(_fold(key))
+        if current is None:
+            counts["inserted"] += 1
+        elif all(
+            current[column] == value
+            for column, value in row.items()
+            if column != pk.key
+        ):
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["updated"] += 1
+            # Send complete rows: the INSERT half of an upsert is checked
+            # against NOT NULL constraints before the conflict is resolved.
+            row = {**current, **row, pk.key: current[pk.key]}
+        writes[tuple(sorted(row))].append(row)
+
+    for row in keyless:
+        writes[tuple(sorted(row))].append(row)
+
+    for columns, group in writes.items():
+        if pk.key not in columns:
+            db.session.execute(insert(table), group)
+            continue
+
+        updated = [column for column in columns if column != pk.key] or [pk.key]
+        stmt = upsert(table, None, lambda new: {c: new[c] for c in updated})
+        db.session.execute(stmt, group)
+
+    return counts
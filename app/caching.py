@@ -0,0 +1,265 @@
+"""In-process caches with LRU and TTL eviction.
+
+:class:`ResponseCache` entries are stored together with the table versions
+(see :mod:`app.versioning`) they were rendered from and are only served
+while those versions are still current. A write committed by any worker
+process therefore invalidates every process's copy on its next lookup. The
+services also drop the local entries right after their own commits.
+
+:class:`EntityCache` is a second-level cache of ``Customer`` and ``Product``
+rows by primary key. Its entries are stored with the version of their table
+and the database (primary or replica) the row was read from, and only served
+to a lookup reading that same version from that same database: writes by
+other processes miss on the next lookup, and the write paths, which read the
+primary, never start from a row a lagging replica returned. Entries are also
+dropped when a session flushes a change to the row, or executes an
+INSERT/UPDATE/DELETE statement on the table, and again when that transaction
+commits.
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import make_transient_to_detached
+
+from .database import db
+from .models import Customer, Product
+from .versioning import table_version
+
+
+class ResponseCache:
+    def __init__(self, name):
+        self.name = name
+        self.enabled = True
+        self.max_entries = 1024
+        self.ttl = None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.enabled = app.config["RESPONSE_CACHE_ENABLED"]
+        self.max_entries = app.config["RESPONSE_CACHE_MAX_ENTRIES"]
+        self.ttl = app.config["RESPONSE_CACHE_TTL"]
+
+    def get(self, key, version):
+        """Cached value for ``key`` if it was stored at ``version``, else ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry_version, expires_at, value = entry
+            if entry_version != version or (
+                expires_at is not None and expires_at <= monotonic()
+            ):
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, version, value):
+        expires_at = monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (version, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry; called by the services after their writes commit."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else None,
+            }
+
+
+class EntityCache(ResponseCache):
+    """Column values of ``model`` rows by primary key."""
+
+    def __init__(self, name, model):
+        super().__init__(name)
+        self.model = model
+        # Bumped by every invalidation so a load racing a write is not stored.
+        self._epoch = 0
+
+    def init_app(self, app):
+        self.enabled = app.config["ENTITY_CACHE_ENABLED"]
+        self.max_entries = app.config["ENTITY_CACHE_MAX_ENTRIES"]
+        self.ttl = app.config["ENTITY_CACHE_TTL"]
+
+    def _version(self, session):
+        return table_version(self.model.__tablename__), session.get_bind()
+
+    def _identity(self, session, mapper, key):
+        return session.identity_map.get(mapper.identity_key_from_primary_key([key]))
+
+    def _cached(self, session, key, version):
+        """Instance rebuilt from the entry for ``key`` at ``version``, or ``None``."""
+        values = self.get(key, version)
+        if values is None:
+            return None
+        instance = self.model(**values)
+        make_transient_to_detached(instance)
+        return session.merge(instance, load=False)
+
+    def _store(self, mapper, key, instance, version):
+        values = {attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+        self.set(key, version, values)
+
+    def load(self, key, options=()):
+        """Persistent instance with primary key ``key``, or ``None``.
+
+        Served from the session's identity map or the cache without a query
+        when possible; a miss loads the row and caches it. With loader
+        ``options`` (``load_only`` for a sparse fieldset) a miss loads just
+        those columns and is not cached, since the entry would be partial.
+        """
+        session = db.session
+        if not self.enabled:
+            return session.get(self.model, key, options=options)
+
+        mapper = inspect(self.model)
+        instance = self._identity(session, mapper, key)
+        if instance is not None:
+            return instance
+
+        version = self._version(session)
+        instance = self._cached(session, key, version)
+        if instance is None:
+            epoch = self._epoch
+            instance = session.get(self.model, key, options=options)
+            if instance is not None and not options and epoch == self._epoch:
+                self._store(mapper, key, instance, version)
+        return instance
+
+    def load_many(self, keys, options=()):
+        """``{key: instance}`` for those of ``keys`` that exist.
+
+        Like :meth:`load`, but every miss is loaded by one IN query.
+        """
+        session = db.session
+        mapper = inspect(self.model)
+        found, misses, version = {}, [], None
+        for key in keys:
+            instance = None
+            if self.enabled:
+                instance = self._identity(session, mapper, key)
+                if instance is None:
+                    if version is None:
+                        version = self._version(session)
+                    instance = self._cached(session, key, version)
+            if instance is None:
+                misses.append(key)
+            else:
+                found[key] = instance
+
+        if misses:
+            epoch = self._epoch
+            (column,) = mapper.primary_key
+            stmt = select(self.model).options(*options).where(column.in_(misses))
+            for instance in session.scalars(stmt):
+                (key,) = mapper.primary_key_from_instance(instance)
+                found[key] = instance
+                if self.enabled and not options and epoch == self._epoch:
+                    self._store(mapper, key, instance, version)
+        return found
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._epoch += 1
+        self.invalidations += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._epoch += 1
+        super().invalidate()
+
+
+product_cache = ResponseCache("products")
+customer_entities = EntityCache("customer_entities", Customer)
+product_entities = EntityCache("product_entities", Product)
+
+ENTITY_CACHES = {cache.model: cache for cache in (customer_entities, product_entities)}
+_TABLES = {cache.model.__table__: cache for cache in ENTITY_CACHES.values()}
+
+# Session.info key: (cache, key or None for the whole cache) to drop again
+# when the transaction commits.
+PENDING = "caching.pending"
+
+
+def _pending(session, cache, key):
+    session.info.setdefault(PENDING, set()).add((cache, key))
+
+
+def _after_flush(session, flush_context):
+    for instance in itertools.chain(session.dirty, session.deleted):
+        cache = ENTITY_CACHES.get(type(instance))
+        if cache is not None:
+            (key,) = inspect(instance).mapper.primary_key_from_instance(instance)
+            cache.discard(key)
+            _pending(session, cache, key)
+
+
+def _do_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        cache = _TABLES.get(getattr(state.statement, "table", None))
+        if cache is not None:
+            cache.invalidate()
+            _pending(state.session, cache, None)
+
+
+def _after_commit(session):
+    for cache, key in session.info.pop(PENDING, ()):
+        if key is None:
+            cache.invalidate()
+        else:
+            cache.discard(key)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING, None)
+
+
+def init_app(app):
+    product_cache.init_app(app)
+    for cache in ENTITY_CACHES.values():
+        cache.init_app(app)
+
+    for name, listener in (
+        ("after_flush", _after_flush),
+        ("do_orm_execute", _do_orm_execute),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
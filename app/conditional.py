@@ -0,0 +1,83 @@
+"""Conditional GET support: strong ETags, Last-Modified and 304 responses.
+
+Validators are derived from the change counters of the tables a response is
+built from (see :mod:`app.versioning`) plus the request URL and negotiated
+format, so a matching ``If-None-Match`` is answered with one primary-key read
+and without running the view or serializing anything. The same versions key
+the optional response cache (see :mod:`app.caching`).
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from .versioning import table_state
+
+
+def _etag(tables, versions, accept):
+    raw = f"{','.join(tables)}:{versions}:{request.full_path}:{accept}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    response = make_response("", 304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+def _render(view, args, kwargs, cache, key, versions):
+    if cache is None or not cache.enabled:
+        return make_response(view(*args, **kwargs))
+
+    cached = cache.get(key, versions)
+    if cached is not None:
+        body, status, headers = cached
+        return current_app.response_class(body, status, headers)
+
+    response = make_response(view(*args, **kwargs))
+    if response.status_code == 200 and not response.is_streamed:
+        headers = [(k, v) for k, v in response.headers if k != "Content-Length"]
+        cache.set(key, versions, (response.get_data(), 200, headers))
+    return response
+
+
+def conditional(*tables, cache=None):
+    """Decorate a GET view whose output depends only on ``tables``.
+
+    With a ``cache`` (:class:`app.caching.ResponseCache`), rendered responses
+    are kept per URL and served while the table versions are unchanged.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions, last_modified = table_state(tables)
+            accept = request.accept_mimetypes.best_match(
+                ["application/json", "application/x-ndjson"]
+            )
+            etag = _etag(tables, versions, accept)
+
+            if request.if_none_match:
+                if request.if_none_match.contains(etag):
+                    return _not_modified(etag, last_modified)
+            elif (
+                last_modified
+                and request.if_modified_since
+                and last_modified <= request.if_modified_since
+            ):
+                return _not_modified(etag, last_modified)
+
+            key = (request.full_path, accept)
+            response = _render(view, args, kwargs, cache, key, versions)
+            if response.status_code == 200:
+                response.set_etag(etag)
+                if last_modified:
+                    response.last_modified = last_modified
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,10 +1,103 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import make_url
 
-db = SQLAlchemy()
+from . import replicas
+from .pool import InstrumentedQueuePool
+
+db = SQLAlchemy(session_options={"class_": replicas.RoutingSession})
 ma = Marshmallow()
 
+POOL_OPTIONS = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+}
+
+
+def engine_options(config):
+    """Engine options derived from the ``DB_POOL_*`` and ``SQLITE_*`` settings.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection; every
+    other database gets an :class:`InstrumentedQueuePool`.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    options = {"poolclass": InstrumentedQueuePool}
+    for setting, option in POOL_OPTIONS.items():
+        if config.get(setting) is not None:
+            options[option] = config[setting]
+    if config.get("DB_POOL_PRE_PING"):
+        options["pool_pre_ping"] = True
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {
+            "timeout": config["SQLITE_BUSY_TIMEOUT"],
+            "check_same_thread": False,
+        }
+    return options
+
+
+def _set_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return on_connect
+
 
 def init_app(app):
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    binds.update(
+        replicas.replica_binds(
+            app.config,
+            lambda url: engine_options({**app.config, "SQLALCHEMY_DATABASE_URI": url}),
+        )
+    )
+
     db.init_app(app)
     ma.init_app(app)
+    replicas.init_app(app, db)
+
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if pragmas:
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", _set_sqlite_pragmas(pragmas))
+
+
+def upsert(table, values, set_, session=None):
+    """Native INSERT-or-UPDATE statement for the dialect of ``session``
+    (default ``db.session``).
+
+    ``set_`` receives the row that failed to insert (``excluded`` on SQLite,
+    ``inserted`` on MySQL) and returns the columns to update on conflict.
+    Pass ``values=None`` to execute the statement with a list of parameter
+    sets, which the driver batches into multi-row INSERTs.
+    """
+    session = db.session if session is None else session
+    if session.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(table)
+        if values is not None:
+            stmt = stmt.values(values)
+        return stmt.on_duplicate_key_update(set_(stmt.inserted))
+
+    stmt = sqlite.insert(table)
+    if values is not None:
+        stmt = stmt.values(values)
+    primary_key = [column.name for column in table.primary_key]
+    return stmt.on_conflict_do_update(
+        index_elements=primary_key, set_=set_(stmt.excluded)
+    )
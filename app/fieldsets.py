@@ -0,0 +1,55 @@
+"""Sparse fieldsets: ``?fields=ProductID,ProductName`` on read endpoints.
+
+The requested names restrict both the serialized output (marshmallow
+``only=``) and the columns the services SELECT (``load_only``).
+"""
+
+from functools import lru_cache
+
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(schema_class, args=None):
+    """Field names requested through ``?fields=``, or ``None`` for all of them.
+
+    ``args`` defaults to the Flask request's query string. Raises
+    ``ValueError`` when a name is not declared on ``schema_class``.
+    """
+    args = request.args if args is None else args
+    raw = args.get("fields")
+    if not raw:
+        return None
+
+    names = tuple(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+    unknown = [name for name in names if name not in schema_class._declared_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    return names or None
+
+
+@lru_cache(maxsize=256)
+def _restricted_schema(schema_class, fields, many):
+    return schema_class(only=fields, many=many)
+
+
+def sparse_schema(schema, fields):
+    """``schema`` itself, or a cached copy restricted to ``fields``."""
+    if fields is None:
+        return schema
+    return _restricted_schema(type(schema), fields, schema.many)
+
+
+def column_options(model, fields, required=()):
+    """Loader options selecting only the columns behind ``fields``.
+
+    The primary key and any ``required`` columns (pagination keys, for
+    instance) are always loaded.
+    """
+    if fields is None:
+        return []
+
+    mapper = model.__mapper__
+    primary_key = [getattr(model, column.key) for column in mapper.primary_key]
+    columns = [getattr(model, name) for name in fields if name in mapper.columns]
+    return [load_only(*primary_key, *required, *columns)]
@@ -0,0 +1,240 @@
+"""Query-string filters shared by the read endpoints."""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app, request
+from sqlalchemy import or_
+
+_WORD = re.compile(r"\w+")
+
+# ``Column`` or ``Column[op]``; a bare column name means equality.
+_FILTER_ARG = re.compile(r"^(\w+)(?:\[(\w+)\])?$")
+_RANGE_OPERATORS = {
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+}
+
+# List endpoint arguments that are not filters.
+LIST_ARGS = frozenset({"limit", "after", "fields", "stream", "sort"})
+
+
+def parse_date_range(args=None):
+    """Inclusive ``(from, to)`` dates from ``?from=`` and ``?to=`` (ISO format).
+
+    Either bound may be ``None``. ``args`` defaults to the Flask request's
+    query string. Raises ``ValueError`` on malformed dates or an empty range.
+    """
+    args = request.args if args is None else args
+    bounds = []
+    for name in ("from", "to"):
+        value = args.get(name)
+        try:
+            bounds.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f"{name} must be a date (YYYY-MM-DD).") from None
+
+    date_from, date_to = bounds
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("from must not be after to.")
+    return date_from, date_to
+
+
+def parse_month_range(args=None):
+    """Inclusive ``(from, to)`` months from ``?from=`` and ``?to=`` (YYYY-MM).
+
+    Either bound may be ``None``; months are returned as ``YYYY-MM`` strings.
+    ``args`` defaults to the Flask request's query string. Raises
+    ``ValueError`` on malformed months or an empty range.
+    """
+    args = request.args if args is None else args
+    bounds = []
+    for name in ("from", "to"):
+        value = args.get(name)
+        try:
+            month = datetime.strptime(value, "%Y-%m") if value else None
+        except ValueError:
+            raise ValueError(f"{name} must be a month (YYYY-MM).") from None
+        bounds.append(month.strftime("%Y-%m") if month else None)
+
+    month_from, month_to = bounds
+    if month_from and month_to and month_from > month_to:
+        raise ValueError("from must not be after to.")
+    return month_from, month_to
+
+
+def parse_search(args=None, config=None):
+    """Words of ``?q=`` and the result limit from ``?limit=``.
+
+    The limit falls back to ``SEARCH_LIMIT_DEFAULT`` and is clamped to
+    ``SEARCH_LIMIT_MAX``. ``args`` and ``config`` default to the Flask
+    request's query string and the app config. Raises ``ValueError`` when
+    ``q`` has no words or the limit is malformed.
+    """
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    words = _WORD.findall(args.get("q", ""))
+    if not words:
+        raise ValueError("q must contain at least one word.")
+
+    limit = args.get("limit", config["SEARCH_LIMIT_DEFAULT"])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer.") from None
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return words, min(limit, config["SEARCH_LIMIT_MAX"])
+
+
+def _parse_value(column, raw):
+    if raw == "null":
+        return None
+    python_type = column.type.python_type
+    try:
+        if python_type is bool:
+            if raw.lower() in ("1", "true"):
+                return True
+            if raw.lower() in ("0", "false"):
+                return False
+            raise ValueError
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is date:
+            return date.fromisoformat(raw)
+        if python_type is Decimal:
+            return Decimal(raw)
+        return python_type(raw)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid value for {column.key}: {raw!r}.") from None
+
+
+def _indexed(column):
+    """Whether ``column`` leads the primary key or a (non-FULLTEXT) index."""
+    table = column.expression.table
+    leading = {next(iter(table.primary_key.columns)).name}
+    leading.update(
+        next(iter(index.columns)).name
+        for index in table.indexes
+        if not index.dialect_kwargs.get("mysql_prefix")
+    )
+    return column.expression.name in leading
+
+
+def _check_indexed(column, use, config):
+    """Refuse an unindexed ``column`` for ``use`` ("filtered on", "sorted by")."""
+    table = column.expression.table.name
+    if table in config["UNINDEXED_FILTER_TABLES"]:
+        return
+    if not _indexed(column):
+        raise ValueError(f"{column.key} is not indexed; it cannot be {use}.")
+
+
+def parse_list_query(filterable, sortable, page_keys, args=None, config=None):
+    """Filter conditions and keyset sort order of a list endpoint.
+
+    Filters are ``?Column=value`` (repeat for IN, ``null`` for IS NULL) and
+    ``?Column[gt|gte|lt|lte]=value`` on the ``filterable`` columns; ``?sort=``
+    lists ``sortable`` columns, ``-`` prefixed for descending. Columns
+    without an index are refused unless their table is listed in
+    ``UNINDEXED_FILTER_TABLES``.
+
+    Returns ``(conditions, (keys, descending))``: the sort keys are the sort
+    columns followed by the remaining ``page_keys`` (which end with the
+    primary key), with one descending flag per key, as taken by
+    :func:`app.pagination.keyset_page`. ``args`` and ``config`` default to
+    the Flask request's query string and the app config. Raises
+    ``ValueError`` on unknown or malformed arguments.
+    """
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    filterable = {column.key: column for column in filterable}
+    sortable = {column.key: column for column in sortable}
+
+    conditions = []
+    for name in args:
+        if name in LIST_ARGS:
+            continue
+        match = _FILTER_ARG.match(name)
+        column = filterable.get(match.group(1)) if match else None
+        if column is None:
+            raise ValueError(f"Unknown filter: {name}.")
+        operator = match.group(2)
+        if operator is not None and operator not in _RANGE_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {operator}.")
+        _check_indexed(column, "filtered on", config)
+        values = [_parse_value(column, raw) for raw in args.getlist(name)]
+
+        if operator is None:
+            present = [value for value in values if value is not None]
+            clauses = [column.in_(present)] if present else []
+            if len(present) < len(values):
+                clauses.append(column.is_(None))
+            conditions.append(or_(*clauses))
+        else:
+            if len(values) > 1 or values[0] is None:
+                raise ValueError(f"{name} takes a single value.")
+            conditions.append(_RANGE_OPERATORS[operator](column, values[0]))
+
+    keys, descending = [], []
+    for name in args.get("sort", "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        column = sortable.get(name.lstrip("-"))
+        if column is None:
+            raise ValueError(f"Unknown sort column: {name.lstrip('-')}.")
+        _check_indexed(column, "sorted by", config)
+        if column.key not in (key.key for key in keys):
+            keys.append(column)
+            descending.append(name.startswith("-"))
+
+    # Ties are broken by the page keys in the direction of the last sort key.
+    last = descending[-1] if descending else False
+    for column in page_keys:
+        if column.key not in (key.key for key in keys):
+            keys.append(column)
+            descending.append(last)
+    return conditions, (tuple(keys), tuple(descending))
+
+
+def parse_ids(column, args=None, config=None):
+    """Distinct keys of ``?ids=`` (comma-separated) typed after ``column``, in
+    request order, or ``None`` when the argument is absent.
+
+    ``args`` and ``config`` default to the Flask request's query string and
+    the app config. Raises ``ValueError`` on malformed IDs, more than
+    ``MULTI_GET_MAX_IDS`` of them, or other arguments than ``fields``
+    alongside.
+    """
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    raw = args.get("ids")
+    if raw is None:
+        return None
+
+    others = sorted(set(args) - {"ids", "fields"})
+    if others:
+        raise ValueError(f"ids cannot be combined with {', '.join(others)}.")
+
+    python_type = column.type.python_type
+    ids = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.append(python_type(part))
+        except ValueError:
+            raise ValueError(f"Invalid ID: {part!r}.") from None
+    ids = list(dict.fromkeys(ids))
+
+    if not ids:
+        raise ValueError("ids must list at least one ID.")
+    max_ids = config["MULTI_GET_MAX_IDS"]
+    if len(ids) > max_ids:
+        raise ValueError(f"ids takes at most {max_ids} IDs.")
+    return ids
@@ -0,0 +1,101 @@
+"""Selectable JSON providers for ``create_app`` (``JSON_PROVIDER`` setting).
+
+``"orjson"`` encodes straight to bytes with orjson and renders ``Decimal``,
+``date`` and ``datetime`` values exactly as Flask's default provider does
+(``"21.00"`` and HTTP dates respectively), with keys sorted the same way.
+Non-ASCII text is emitted as UTF-8 rather than ``\\u`` escapes. ``"default"``
+is Flask's stdlib ``json`` provider. :func:`dumps_bytes` encodes the same
+way outside a Flask app (the ASGI app).
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from werkzeug.http import http_date
+
+from .metrics import request_metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o):
+    # Same conversions as flask.json.provider._default.
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _orjson_options():
+    return (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+@request_metrics.timed_serialization
+def dumps_bytes(obj):
+    """Compact JSON bytes of ``obj`` as the app's responses encode it, with
+    orjson when installed and the stdlib otherwise."""
+    if orjson is None:
+        return json.dumps(
+            obj, default=_default, sort_keys=True, separators=(",", ":")
+        ).encode()
+    return orjson.dumps(obj, default=_default, option=_orjson_options())
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson."""
+
+    compact = None
+    mimetype = "application/json"
+
+    @request_metrics.timed_serialization
+    def dumps_bytes(self, obj, option=0):
+        return orjson.dumps(obj, default=_default, option=_orjson_options() | option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            self.dumps_bytes(obj, option), mimetype=self.mimetype
+        )
+
+
+class StdlibProvider(DefaultJSONProvider):
+    """Flask's default provider, with encoding timed as serialization."""
+
+    dumps = request_metrics.timed_serialization(DefaultJSONProvider.dumps)
+
+
+json_providers = {"default": StdlibProvider, "orjson": OrjsonProvider}
+
+
+def init_app(app):
+    name = app.config["JSON_PROVIDER"]
+    if name == "orjson" and orjson is None:
+        app.logger.warning("orjson is not installed; using the default JSON provider")
+        name = "default"
+    app.json = json_providers[name](app)
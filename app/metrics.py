@@ -0,0 +1,242 @@
+"""Per-endpoint request metrics in the Prometheus text format.
+
+Every request records its total latency, the time spent in the database
+(cursor executions on the app's engines) and in serialization (schema
+``dump`` plus JSON encoding), its status code and its response size, keyed
+by the Flask endpoint (``customer.get_customers`` and so on).
+
+Each thread aggregates into its own shard without locking; ``/metrics``
+merges the shards when it is scraped. When a thread exits its shard is
+folded into a running total, so short-lived worker threads do not pile up.
+Streamed responses are measured up to the first byte, since their body is
+produced after the view returns.
+"""
+
+import threading
+import weakref
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+from flask import request
+from sqlalchemy import event
+
+from .database import db
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (metric name, help text, buckets) of the histograms kept per endpoint.
+HISTOGRAMS = (
+    ("request_duration_seconds", "Total request latency.", LATENCY_BUCKETS),
+    ("request_db_seconds", "Time spent executing SQL.", LATENCY_BUCKETS),
+    (
+        "request_serialization_seconds",
+        "Time spent dumping schemas and encoding JSON.",
+        LATENCY_BUCKETS,
+    ),
+    ("response_size_bytes", "Response body size.", SIZE_BUCKETS),
+)
+PREFIX = "northwind_"
+
+
+class _Timings(threading.local):
+    """Timers of the request currently running on this thread."""
+
+    start = None
+    db = 0.0
+    db_start = 0.0
+    serialization = 0.0
+    serializing = False
+
+
+class _EndpointStats:
+    __slots__ = ("buckets", "sums", "statuses")
+
+    def __init__(self):
+        self.buckets = [[0] * (len(buckets) + 1) for _, _, buckets in HISTOGRAMS]
+        self.sums = [0.0] * len(HISTOGRAMS)
+        self.statuses = {}
+
+
+def _merge(merged, shard):
+    """Add the ``{endpoint: _EndpointStats}`` of ``shard`` into ``merged``."""
+    for endpoint, stats in list(shard.items()):
+        total = merged.get(endpoint)
+        if total is None:
+            total = merged[endpoint] = _EndpointStats()
+        for i in range(len(HISTOGRAMS)):
+            total.sums[i] += stats.sums[i]
+            total.buckets[i] = [
+                a + b for a, b in zip(total.buckets[i], stats.buckets[i])
+            ]
+        for status, count in list(stats.statuses.items()):
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+
+class _ShardOwner:
+    """Thread-local marker whose finalizer retires the thread's shard."""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.enabled = True
+        self._timings = _Timings()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # The owner lives exactly as long as this thread's locals.
+            owner = self._local.owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard)
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            self._shards.remove(shard)
+            _merge(self._retired, shard)
+
+    def init_app(self, app):
+        self.enabled = app.config["METRICS_ENABLED"]
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_execute)
+                event.listen(engine, "after_cursor_execute", self._after_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        self._timings.db_start = perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        timings = self._timings
+        timings.db += perf_counter() - timings.db_start
+
+    def _before_request(self):
+        timings = self._timings
+        timings.db = timings.serialization = 0.0
+        timings.start = perf_counter()
+
+    def _after_request(self, response):
+        timings = self._timings
+        if timings.start is None:
+            return response
+        total = perf_counter() - timings.start
+        timings.start = None
+
+        endpoint = request.endpoint or "unmatched"
+        shard = self._shard()
+        stats = shard.get(endpoint)
+        if stats is None:
+            stats = shard[endpoint] = _EndpointStats()
+
+        values = (
+            total,
+            timings.db,
+            timings.serialization,
+            response.calculate_content_length(),
+        )
+        for i, value in enumerate(values):
+            if value is not None:
+                stats.buckets[i][bisect_left(HISTOGRAMS[i][2], value)] += 1
+                stats.sums[i] += value
+        status = response.status_code
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        return response
+
+    def timed_serialization(self, func):
+        """Decorate ``func`` so its run time counts as serialization time.
+
+        Nested calls (a schema dumping another schema) are only counted once.
+        """
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = self._timings
+            if timings.serializing:
+                return func(*args, **kwargs)
+            timings.serializing = True
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.serialization += perf_counter() - start
+                timings.serializing = False
+
+        return wrapper
+
+    def collect(self):
+        """Merge every thread's shard into ``{endpoint: _EndpointStats}``."""
+        merged = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+            _merge(merged, self._retired)
+
+        for shard in shards:
+            _merge(merged, shard)
+        return merged
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        merged = sorted(self.collect().items())
+        lines = []
+
+        for i, (name, help_text, bounds) in enumerate(HISTOGRAMS):
+            name = PREFIX + name
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            labels = [repr(float(bound)) for bound in bounds] + ["+Inf"]
+            for endpoint, stats in merged:
+                cumulative = 0
+                for le, count in zip(labels, stats.buckets[i]):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {stats.sums[i]!r}')
+                lines.append(f'{name}_count{{endpoint="{endpoint}"}} {cumulative}')
+
+        name = PREFIX + "requests_total"
+        lines.append(f"# HELP {name} Requests by endpoint and status code.")
+        lines.append(f"# TYPE {name} counter")
+        for endpoint, stats in merged:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f'{name}{{endpoint="{endpoint}",status="{status}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def init_app(app):
+    request_metrics.init_app(app)
@@ -0,0 +1,93 @@
+"""Versioned schema migrations: ``flask schema upgrade``.
+
+Each module in :mod:`app.migrations.versions` named ``v<NNNN>_<name>`` is one
+migration with an ``upgrade(connection)`` function. Applied versions are
+recorded in ``SchemaVersions``; ``upgrade`` runs the missing ones in order,
+each in its own transaction (MySQL commits DDL implicitly, so migrations
+should be safe to re-run: create with ``checkfirst=True``). A migration
+declares the tables, indexes and SQL it needs as they are at its version,
+in its own ``MetaData``; it must not use the models or the services, which
+keep changing after it has shipped.
+
+``flask schema explain`` checks the query plans of the service read paths;
+see :mod:`app.migrations.explain`.
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, select
+
+from ..database import db
+from ..models import SchemaVersion
+from . import versions
+
+
+def migrations():
+    """``[(version, name, module)]`` of every migration, in version order."""
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = info.name.partition("_")
+        if prefix.startswith("v") and prefix[1:].isdigit():
+            module = importlib.import_module(f"{versions.__name__}.{info.name}")
+            found.append((int(prefix[1:]), name, module))
+    return sorted(found, key=lambda migration: migration[0])
+
+
+def current_version(engine):
+    """Highest applied version, ``0`` for a database never migrated."""
+    with engine.begin() as connection:
+        SchemaVersion.__table__.create(connection, checkfirst=True)
+        version = connection.scalar(select(func.max(SchemaVersion.Version)))
+    return version or 0
+
+
+def upgrade(engine, target=None):
+    """Apply the pending migrations up to ``target``; returns their versions."""
+    applied = []
+    current = current_version(engine)
+    for version, name, module in migrations():
+        if version <= current or (target is not None and version > target):
+            continue
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(
+                insert(SchemaVersion.__table__).values(
+                    Version=version,
+                    Name=name,
+                    AppliedAt=datetime.now(timezone.utc).replace(tzinfo=None),
+                )
+            )
+        applied.append(version)
+    return applied
+
+
+schema_cli = AppGroup("schema", help="Schema migrations and query plan checks.")
+
+
+@schema_cli.command("upgrade")
+@click.option("--to", "target", type=int, help="Stop after this version.")
+def upgrade_command(target):
+    """Apply pending migrations."""
+    applied = upgrade(db.engine, target)
+    if not applied:
+        click.echo(f"Schema is up to date (version {current_version(db.engine)}).")
+    for version in applied:
+        click.echo(f"Applied version {version}.")
+
+
+@schema_cli.command("version")
+def version_command():
+    """Show the current and latest schema versions."""
+    latest = migrations()[-1][0]
+    click.echo(f"current {current_version(db.engine)}, latest {latest}")
+
+
+def init_app(app):
+    from .explain import explain_command
+
+    schema_cli.add_command(explain_command)
+    app.cli.add_command(schema_cli)
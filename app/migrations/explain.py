@@ -0,0 +1,191 @@
+"""``flask schema explain``: query plans of the service read paths.
+
+Runs each service read method against the current database, captures the
+statements it issues and prints their ``EXPLAIN`` plans. Full table scans of
+tables holding at least ``--min-rows`` rows are flagged and make the command
+exit with status 1, so it can gate a deploy or a CI job.
+"""
+
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, inspect, select
+
+from ..database import db
+from ..models import Customer, Order, Product
+from ..pagination import row_key
+from ..services import (
+    CustomerService,
+    OrderService,
+    ProductService,
+    SummaryService,
+)
+
+# SQLite: "SCAN Orders" (no index) as opposed to "SCAN Orders USING INDEX ...".
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: LEFT-JOIN)?$")
+
+
+def scenarios():
+    """``[(label, call)]`` exercising every service read method."""
+    customer_id = db.session.scalar(select(Customer.CustomerID).limit(1))
+    busiest = db.session.scalar(
+        select(Order.CustomerID)
+        .group_by(Order.CustomerID)
+        .order_by(func.count().desc())
+        .limit(1)
+    )
+    product_id = db.session.scalar(select(Product.ProductID).limit(1))
+    order_id = db.session.scalar(select(Order.OrderID).limit(1))
+
+    def second_page(service, **kwargs):
+        first = service.get_all(limit=1, **kwargs)
+        after = row_key(first[0], service.PAGE_KEYS) if first else None
+        return service.get_all(limit=100, after=after, **kwargs)
+
+    found = [
+        ("CustomerService.get_all", lambda: CustomerService.get_all(limit=101)),
+        ("CustomerService.get_all (after)", lambda: second_page(CustomerService)),
+        ("ProductService.get_all", lambda: ProductService.get_all(limit=101)),
+        ("ProductService.get_all (after)", lambda: second_page(ProductService)),
+        ("OrderService.get_all", lambda: OrderService.get_all(limit=101)),
+        ("OrderService.get_all (after)", lambda: second_page(OrderService)),
+        (
+            "SummaryService.get_country_months",
+            lambda: SummaryService.get_country_months("Germany"),
+        ),
+        (
+            "CustomerService.get_all (Country)",
+            lambda: CustomerService.get_all(
+                limit=101, where=[Customer.Country == "Germany"]
+            ),
+        ),
+        (
+            "OrderService.get_all (unshipped, newest first)",
+            lambda: OrderService.get_all(
+                limit=101,
+                where=[Order.ShippedDate.is_(None)],
+                sort=(OrderService.PAGE_KEYS, (True, True)),
+            ),
+        ),
+        ("CustomerService.search", lambda: CustomerService.search(["a"], 20)),
+        ("ProductService.search", lambda: ProductService.search(["a"], 20)),
+    ]
+    # Lookups need an existing key; they are skipped on an empty table.
+    if customer_id is not None:
+        found.append(
+            (
+                "CustomerService.get_by_id",
+                lambda: CustomerService.get_by_id(customer_id),
+            )
+        )
+        found.append(
+            (
+                "CustomerService.get_revenue",
+                lambda: CustomerService.get_revenue(customer_id),
+            )
+        )
+        found.append(
+            (
+                "SummaryService.get_customer_months",
+                lambda: SummaryService.get_customer_months(customer_id),
+            )
+        )
+    if product_id is not None:
+        found.append(
+            ("ProductService.get_by_id", lambda: ProductService.get_by_id(product_id))
+        )
+        found.append(
+            ("ProductService.get_sales", lambda: ProductService.get_sales(product_id))
+        )
+        found.append(
+            (
+                "SummaryService.get_product_months",
+                lambda: SummaryService.get_product_months(product_id),
+            )
+        )
+    if order_id is not None:
+        found.append(
+            ("OrderService.get_by_id", lambda: OrderService.get_by_id(order_id))
+        )
+        found.append(
+            ("OrderService.get_total", lambda: OrderService.get_total(order_id))
+        )
+    if busiest is not None:
+        found.append(
+            (
+                "OrderService.get_customer_history",
+                lambda: OrderService.get_customer_history(busiest, limit=101),
+            )
+        )
+    return found
+
+
+def capture(call):
+    """Statements (with parameters) executed while running ``call``."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def table_sizes(connection):
+    existing = set(inspect(connection).get_table_names())
+    return {
+        table.name: connection.scalar(select(func.count()).select_from(table))
+        for table in db.metadata.sorted_tables
+        if table.name in existing
+    }
+
+
+def explain(connection, statement, parameters, large_tables):
+    """``[(plan line, flagged)]`` for one statement."""
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        lines = []
+        for row in rows:
+            scan = _SQLITE_SCAN.match(row.detail)
+            lines.append((row.detail, bool(scan) and scan.group(1) in large_tables))
+        return lines
+
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings()
+    return [
+        (
+            f"{row['table']}: type={row['type']} key={row['key']} "
+            f"rows={row['rows']} {row['Extra'] or ''}".rstrip(),
+            row["type"] == "ALL" and row["table"] in large_tables,
+        )
+        for row in rows
+    ]
+
+
+@click.command("explain")
+@click.option("--min-rows", type=int, default=10000, show_default=True)
+@with_appcontext
+def explain_command(min_rows):
+    """Flag full table scans in the service queries."""
+    connection = db.session.connection()
+    large_tables = {
+        name for name, rows in table_sizes(connection).items() if rows >= min_rows
+    }
+
+    flagged = 0
+    for label, call in scenarios():
+        click.echo(label)
+        for statement, parameters in capture(call):
+            click.echo("  " + " ".join(statement.split())[:120])
+            for line, bad in explain(connection, statement, parameters, large_tables):
+                flagged += bad
+                click.echo(f"    {'FULL SCAN ' if bad else ''}{line}")
+    db.session.rollback()
+
+    if flagged:
+        raise click.ClickException(f"{flagged} full table scan(s) on large tables.")
+    click.echo("No full table scans on large tables.")
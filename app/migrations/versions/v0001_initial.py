@@ -0,0 +1,93 @@
+"""Create the tables the application had before migrations existed.
+
+The tables are declared here as they were at this version, not taken from
+the models, so later columns and indexes come from their own migrations.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    String,
+    Table,
+)
+
+metadata = MetaData()
+
+Table(
+    "Customers",
+    metadata,
+    Column("CustomerID", String(5), primary_key=True),
+    Column("CompanyName", String(40), nullable=False),
+    Column("ContactName", String(30)),
+    Column("ContactTitle", String(30)),
+    Column("Address", String(60)),
+    Column("City", String(15)),
+    Column("Region", String(15)),
+    Column("PostalCode", String(10)),
+    Column("Country", String(15)),
+    Column("Phone", String(24)),
+    Column("Fax", String(24)),
+)
+
+Table(
+    "Products",
+    metadata,
+    Column("ProductID", Integer, primary_key=True, autoincrement=True),
+    Column("ProductName", String(100)),
+    Column("SupplierID", Integer),
+    Column("CategoryID", Integer),
+    Column("QuantityPerUnit", String(50)),
+    Column("UnitPrice", Numeric(10, 2)),
+    Column("UnitsInStock", SmallInteger),
+    Column("UnitsOnOrder", SmallInteger),
+    Column("ReorderLevel", SmallInteger),
+    Column("Discontinued", Boolean),
+)
+
+Table(
+    "Orders",
+    metadata,
+    Column("OrderID", Integer, primary_key=True, autoincrement=True),
+    Column("CustomerID", String(5), ForeignKey("Customers.CustomerID")),
+    Column("EmployeeID", Integer),
+    Column("OrderDate", Date),
+    Column("RequiredDate", Date),
+    Column("ShippedDate", Date),
+    Column("ShipVia", Integer),
+    Column("Freight", Numeric(10, 2)),
+    Column("ShipName", String(100)),
+    Column("ShipAddress", String(255)),
+    Column("ShipCity", String(100)),
+    Column("ShipRegion", String(50)),
+    Column("ShipPostalCode", String(20)),
+    Column("ShipCountry", String(50)),
+)
+
+Table(
+    "OrderDetails",
+    metadata,
+    Column("OrderID", Integer, ForeignKey("Orders.OrderID"), primary_key=True),
+    Column("ProductID", Integer, ForeignKey("Products.ProductID"), primary_key=True),
+    Column("UnitPrice", Numeric(10, 2)),
+    Column("Quantity", SmallInteger),
+    Column("Discount", Numeric(10, 2)),
+)
+
+Table(
+    "TableVersions",
+    metadata,
+    Column("TableName", String(64), primary_key=True),
+    Column("Version", Integer, nullable=False),
+    Column("UpdatedAt", DateTime, nullable=False),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
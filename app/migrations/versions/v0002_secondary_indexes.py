@@ -0,0 +1,32 @@
+"""Secondary indexes for the foreign keys and the date/category lookups.
+
+``ix_Orders_CustomerID_OrderDate`` also serves lookups by ``CustomerID``
+alone, so that column gets no index of its own.
+"""
+
+from sqlalchemy import Column, Date, Index, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+orders = Table(
+    "Orders",
+    metadata,
+    Column("CustomerID", String(5)),
+    Column("OrderDate", Date),
+    Column("ShippedDate", Date),
+)
+order_details = Table("OrderDetails", metadata, Column("ProductID", Integer))
+products = Table("Products", metadata, Column("CategoryID", Integer))
+
+INDEXES = (
+    Index("ix_Orders_CustomerID_OrderDate", orders.c.CustomerID, orders.c.OrderDate),
+    Index("ix_Orders_OrderDate", orders.c.OrderDate),
+    Index("ix_Orders_ShippedDate", orders.c.ShippedDate),
+    Index("ix_OrderDetails_ProductID", order_details.c.ProductID),
+    Index("ix_Products_CategoryID", products.c.CategoryID),
+)
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,127 @@
+"""Monthly sales summary tables, filled from the existing orders.
+
+The fill is the summary rebuild as it was at this version, written against
+this migration's own table definitions rather than the service code.
+"""
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    String,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+)
+
+metadata = MetaData()
+
+
+product_months = Table(
+    "ProductMonthlySales",
+    metadata,
+    Column("ProductID", Integer, primary_key=True, autoincrement=False),
+    Column("Month", String(7), primary_key=True),
+    Column("Lines", Integer, nullable=False),
+    Column("Units", Integer, nullable=False),
+    Column("Revenue", Numeric(16, 4), nullable=False),
+)
+customer_months = Table(
+    "CustomerMonthlySales",
+    metadata,
+    Column("CustomerID", String(5), primary_key=True),
+    Column("Month", String(7), primary_key=True),
+    Column("Orders", Integer, nullable=False),
+    Column("Lines", Integer, nullable=False),
+    Column("Revenue", Numeric(16, 4), nullable=False),
+)
+country_months = Table(
+    "CountryMonthlySales",
+    metadata,
+    Column("ShipCountry", String(50), primary_key=True),
+    Column("Month", String(7), primary_key=True),
+    Column("Orders", Integer, nullable=False),
+    Column("Lines", Integer, nullable=False),
+    Column("Revenue", Numeric(16, 4), nullable=False),
+)
+
+# Source columns only; these tables exist already and are not created here.
+sources = MetaData()
+orders = Table(
+    "Orders",
+    sources,
+    Column("OrderID", Integer),
+    Column("CustomerID", String(5)),
+    Column("OrderDate", Date),
+    Column("ShipCountry", String(50)),
+)
+order_details = Table(
+    "OrderDetails",
+    sources,
+    Column("OrderID", Integer),
+    Column("ProductID", Integer),
+    Column("UnitPrice", Numeric(10, 2)),
+    Column("Quantity", SmallInteger),
+    Column("Discount", Numeric(10, 2)),
+)
+
+
+def _fill(connection):
+    if connection.dialect.name == "mysql":
+        month = func.date_format(orders.c.OrderDate, "%Y-%m")
+    else:
+        month = func.strftime("%Y-%m", orders.c.OrderDate)
+    line_total = (
+        order_details.c.UnitPrice
+        * order_details.c.Quantity
+        * (1 - func.coalesce(order_details.c.Discount, 0))
+    )
+    revenue = func.coalesce(func.sum(line_total), 0)
+    dated = orders.c.OrderDate.is_not(None)
+
+    fills = {
+        product_months: select(
+            order_details.c.ProductID,
+            month,
+            func.count(),
+            func.coalesce(func.sum(order_details.c.Quantity), 0),
+            revenue,
+        )
+        .join(orders, orders.c.OrderID == order_details.c.OrderID)
+        .where(dated)
+        .group_by(order_details.c.ProductID, month)
+    }
+    order_lines = orders.outerjoin(
+        order_details, order_details.c.OrderID == orders.c.OrderID
+    )
+    for table, key in (
+        (customer_months, orders.c.CustomerID),
+        (country_months, orders.c.ShipCountry),
+    ):
+        fills[table] = (
+            select(
+                key,
+                month,
+                func.count(func.distinct(orders.c.OrderID)),
+                func.count(order_details.c.ProductID),
+                revenue,
+            )
+            .select_from(order_lines)
+            .where(dated, key.is_not(None))
+            .group_by(key, month)
+        )
+
+    for table, source in fills.items():
+        connection.execute(delete(table))
+        columns = [column.name for column in table.columns]
+        connection.execute(insert(table).from_select(columns, source))
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
+    _fill(connection)
@@ -0,0 +1,64 @@
+"""Full-text search over product and customer names, filled from the rows.
+
+SQLite gets the FTS5 tables ``ProductSearch`` and ``CustomerSearch``; MySQL
+gets FULLTEXT indexes on the base tables, which need no filling.
+"""
+
+from sqlalchemy import Column, Index, MetaData, String, Table
+
+metadata = MetaData()
+
+products = Table("Products", metadata, Column("ProductName", String(100)))
+customers = Table(
+    "Customers",
+    metadata,
+    Column("CompanyName", String(40)),
+    Column("ContactName", String(30)),
+    Column("City", String(15)),
+)
+
+FULLTEXT = (
+    Index("ft_Products", products.c.ProductName, mysql_prefix="FULLTEXT"),
+    Index(
+        "ft_Customers",
+        customers.c.CompanyName,
+        customers.c.ContactName,
+        customers.c.City,
+        mysql_prefix="FULLTEXT",
+    ),
+)
+
+OPTIONS = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+# (FTS5 table, its columns, the SELECT filling them)
+FTS_TABLES = (
+    (
+        "ProductSearch",
+        '"ProductName"',
+        'INSERT INTO "ProductSearch" (rowid, "ProductName") '
+        'SELECT "ProductID", "ProductName" FROM "Products"',
+    ),
+    (
+        "CustomerSearch",
+        '"CustomerID" UNINDEXED, "CompanyName", "ContactName", "City"',
+        'INSERT INTO "CustomerSearch" '
+        '("CustomerID", "CompanyName", "ContactName", "City") '
+        'SELECT "CustomerID", "CompanyName", "ContactName", "City" '
+        'FROM "Customers"',
+    ),
+)
+
+
+def upgrade(connection):
+    if connection.dialect.name == "mysql":
+        for index in FULLTEXT:
+            index.create(connection, checkfirst=True)
+        return
+
+    for name, columns, fill in FTS_TABLES:
+        connection.exec_driver_sql(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{name}" '
+            f"USING fts5({columns}, {OPTIONS})"
+        )
+        connection.exec_driver_sql(f'DELETE FROM "{name}"')
+        connection.exec_driver_sql(fill)
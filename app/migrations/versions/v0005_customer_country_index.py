@@ -0,0 +1,13 @@
+"""Index on ``Customers.Country`` for the customer list filter."""
+
+from sqlalchemy import Column, Index, MetaData, String, Table
+
+metadata = MetaData()
+
+customers = Table("Customers", metadata, Column("Country", String(15)))
+
+COUNTRY = Index("ix_Customers_Country", customers.c.Country)
+
+
+def upgrade(connection):
+    COUNTRY.create(connection, checkfirst=True)
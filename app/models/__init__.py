@@ -1,6 +1,13 @@
 from .customer import Customer
 from .product import Product
 from .order import Order, OrderDetail
+from .sales_summary import (
+    CountryMonthlySales,
+    CustomerMonthlySales,
+    ProductMonthlySales,
+)
+from .schema_version import SchemaVersion
+from .table_version import TableVersion
 
 from .customer import CustomerSchema
 from .product import ProductSchema
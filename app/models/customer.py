@@ -1,4 +1,5 @@
-from ..database import db, ma
+from ..database import db
+from ..serialization import CompiledSchema
 from marshmallow import fields, validate
 
 
@@ -13,7 +14,7 @@ class Customer(db.Model):
     City = db.Column(db.String(15))
     Region = db.Column(db.String(15))
     PostalCode = db.Column(db.String(10))
-    Country = db.Column(db.String(15))
+    Country = db.Column(db.String(15), index=True)
     Phone = db.Column(db.String(24))
     Fax = db.Column(db.String(24))
 
@@ -24,7 +25,7 @@ class Customer(db.Model):
         return f"<Customer {self.CustomerID} ({self.CompanyName})>"
 
 
-class CustomerSchema(ma.Schema):
+class CustomerSchema(CompiledSchema):
     CustomerID = fields.String(
         required=True,
         validate=validate.Length(equal=5, error="CustomerID must be 5 characters."),
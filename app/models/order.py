@@ -1,4 +1,5 @@
-from ..database import db, ma
+from ..database import db
+from ..serialization import CompiledSchema
 from marshmallow import fields
 
 
@@ -7,7 +8,7 @@ class OrderDetail(db.Model):
 
     OrderID = db.Column(db.Integer, db.ForeignKey("Orders.OrderID"), primary_key=True)
     ProductID = db.Column(
-        db.Integer, db.ForeignKey("Products.ProductID"), primary_key=True
+        db.Integer, db.ForeignKey("Products.ProductID"), primary_key=True, index=True
     )
 
     UnitPrice = db.Column(db.Numeric(10, 2))
@@ -22,13 +23,18 @@ class OrderDetail(db.Model):
 
 class Order(db.Model):
     __tablename__ = "Orders"
+    __table_args__ = (
+        # Customer order history: equality on CustomerID, range/sort on date.
+        # Also serves every lookup by CustomerID alone (leftmost prefix).
+        db.Index("ix_Orders_CustomerID_OrderDate", "CustomerID", "OrderDate"),
+    )
 
     OrderID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     CustomerID = db.Column(db.String(5), db.ForeignKey("Customers.CustomerID"))
     EmployeeID = db.Column(db.Integer)
-    OrderDate = db.Column(db.Date)
+    OrderDate = db.Column(db.Date, index=True)
     RequiredDate = db.Column(db.Date)
-    ShippedDate = db.Column(db.Date)
+    ShippedDate = db.Column(db.Date, index=True)
     ShipVia = db.Column(db.Integer)
     Freight = db.Column(db.Numeric(10, 2))
     ShipName = db.Column(db.String(100))
@@ -39,15 +45,17 @@ class Order(db.Model):
     ShipCountry = db.Column(db.String(50))
 
     # Relationship to OrderDetails
+    # Plain list relationship so read paths can eager-load it (see
+    # OrderService); a "dynamic" relationship cannot be eager-loaded.
     details = db.relationship(
-        "OrderDetail", backref="order", lazy="dynamic", cascade="all, delete-orphan"
+        "OrderDetail", backref="order", cascade="all, delete-orphan"
     )
 
     def __repr__(self):
         return f"<Order {self.OrderID}>"
 
 
-class OrderDetailSchema(ma.Schema):
+class OrderDetailSchema(CompiledSchema):
     ProductID = fields.Integer()
     UnitPrice = fields.Decimal(places=2)
     Quantity = fields.Integer()
@@ -55,7 +63,7 @@ class OrderDetailSchema(ma.Schema):
     product = fields.Nested("ProductSchema", only=("ProductID", "ProductName"))
 
 
-class OrderSchema(ma.Schema):
+class OrderSchema(CompiledSchema):
     OrderID = fields.Integer()
     CustomerID = fields.String(required=True)
     EmployeeID = fields.Integer()
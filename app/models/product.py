@@ -1,4 +1,5 @@
-from ..database import db, ma
+from ..database import db
+from ..serialization import CompiledSchema
 from marshmallow import fields, validate
 
 
@@ -8,7 +9,7 @@ class Product(db.Model):
     ProductID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     ProductName = db.Column(db.String(100))
     SupplierID = db.Column(db.Integer)
-    CategoryID = db.Column(db.Integer)
+    CategoryID = db.Column(db.Integer, index=True)
     QuantityPerUnit = db.Column(db.String(50))
     UnitPrice = db.Column(db.Numeric(10, 2))
     UnitsInStock = db.Column(db.SmallInteger)
@@ -20,7 +21,7 @@ class Product(db.Model):
         return f"<Product {self.ProductID} ({self.ProductName})>"
 
 
-class ProductSchema(ma.Schema):
+class ProductSchema(CompiledSchema):
     ProductID = fields.Integer()
     ProductName = fields.String(required=True)
     SupplierID = fields.Integer()
@@ -0,0 +1,49 @@
+from ..database import db
+
+# Revenue keeps four decimals, the exact precision of a discounted line
+# amount, so incremental updates add up to the same value as a rebuild.
+
+
+class ProductMonthlySales(db.Model):
+    """Order lines, units and revenue of a product per month of OrderDate."""
+
+    __tablename__ = "ProductMonthlySales"
+
+    ProductID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Month = db.Column(db.String(7), primary_key=True)  # "YYYY-MM"
+    Lines = db.Column(db.Integer, nullable=False, default=0)
+    Units = db.Column(db.Integer, nullable=False, default=0)
+    Revenue = db.Column(db.Numeric(16, 4), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ProductMonthlySales {self.ProductID} {self.Month}>"
+
+
+class CustomerMonthlySales(db.Model):
+    """Orders, order lines and revenue of a customer per month of OrderDate."""
+
+    __tablename__ = "CustomerMonthlySales"
+
+    CustomerID = db.Column(db.String(5), primary_key=True)
+    Month = db.Column(db.String(7), primary_key=True)
+    Orders = db.Column(db.Integer, nullable=False, default=0)
+    Lines = db.Column(db.Integer, nullable=False, default=0)
+    Revenue = db.Column(db.Numeric(16, 4), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CustomerMonthlySales {self.CustomerID} {self.Month}>"
+
+
+class CountryMonthlySales(db.Model):
+    """Orders, order lines and revenue per ShipCountry and month of OrderDate."""
+
+    __tablename__ = "CountryMonthlySales"
+
+    ShipCountry = db.Column(db.String(50), primary_key=True)
+    Month = db.Column(db.String(7), primary_key=True)
+    Orders = db.Column(db.Integer, nullable=False, default=0)
+    Lines = db.Column(db.Integer, nullable=False, default=0)
+    Revenue = db.Column(db.Numeric(16, 4), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CountryMonthlySales {self.ShipCountry} {self.Month}>"
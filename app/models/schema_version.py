@@ -0,0 +1,14 @@
+from ..database import db
+
+
+class SchemaVersion(db.Model):
+    """One row per schema migration applied (see :mod:`app.migrations`)."""
+
+    __tablename__ = "SchemaVersions"
+
+    Version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Name = db.Column(db.String(100), nullable=False)
+    AppliedAt = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SchemaVersion {self.Version} {self.Name}>"
@@ -0,0 +1,14 @@
+from ..database import db
+
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped by the services on every write."""
+
+    __tablename__ = "TableVersions"
+
+    TableName = db.Column(db.String(64), primary_key=True)
+    Version = db.Column(db.Integer, nullable=False, default=0)
+    UpdatedAt = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<TableVersion {self.TableName} v{self.Version}>"
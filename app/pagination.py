@@ -0,0 +1,227 @@
+"""Keyset (cursor) pagination shared by the services and the list routes.
+
+A page is addressed by the sort-key values of the last row the client has
+seen, so the database seeks straight to the next row through an index instead
+of skipping over ``OFFSET`` rows. The cursor handed to clients is an opaque
+URL-safe token wrapping those values.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import and_, false, or_
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _coerce(column, value):
+    if value is None:
+        return None
+
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    """Wrap a row's key values into an opaque cursor string."""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, keys):
+    """Unwrap a cursor into key values typed after the ``keys`` columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [_coerce(column, value) for column, value in zip(keys, values)]
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("Invalid cursor.") from None
+
+
+def row_key(row, keys):
+    """Key values of an ORM row (or a serialized dict) for ``keys``."""
+    if isinstance(row, dict):
+        return [row.get(column.key) for column in keys]
+    return [getattr(row, column.key) for column in keys]
+
+
+def _after_column(column, value, descending):
+    # SQLite and MySQL both sort NULLs first ascending and last descending.
+    nullable = column.expression.nullable
+    if descending:
+        if value is None:
+            return false()
+        return or_(column < value, column.is_(None)) if nullable else column < value
+    if value is None:
+        return column.is_not(None)
+    return column > value
+
+
+def _directions(keys, descending):
+    if isinstance(descending, bool):
+        return [descending] * len(keys)
+    return list(descending)
+
+
+def keyset_filter(keys, values, descending=False):
+    """WHERE clause selecting the rows after ``values`` in key order that
+    share the NULL-ness of the leading key's value.
+
+    A nullable leading key splits the order in a NULL and a non-NULL section
+    (NULLs sort first ascending, last descending). The condition stays in the
+    cursor's section and bounds the leading key (``<=``/``>=`` the cursor's
+    value, or ``IS NULL``), so every page is an index range scan rather than
+    an OR evaluated for every row; the section that follows is read from its
+    start through :func:`next_section`, as :func:`keyset_rows` does.
+
+    ``descending`` is one flag for every key or a sequence of per-key flags.
+    """
+    directions = _directions(keys, descending)
+    leading, leading_value = keys[0], values[0]
+    if leading_value is None:
+        bound, clauses = leading.is_(None), []
+    elif directions[0]:
+        bound, clauses = leading <= leading_value, [leading < leading_value]
+    else:
+        bound, clauses = leading >= leading_value, [leading > leading_value]
+
+    for i in range(1, len(keys)):
+        equal = [
+            prev.is_(None) if prev_value is None else prev == prev_value
+            for prev, prev_value in zip(keys[:i], values[:i])
+        ]
+        clauses.append(and_(*equal, _after_column(keys[i], values[i], directions[i])))
+    return and_(bound, or_(*clauses))
+
+
+def next_section(keys, values, descending=False):
+    """WHERE clause selecting the section of a nullable leading key that
+    follows the one of ``values``, or ``None`` if there is none."""
+    leading, leading_value = keys[0], values[0]
+    if not leading.expression.nullable:
+        return None
+    if _directions(keys, descending)[0]:
+        return leading.is_(None) if leading_value is not None else None
+    return leading.is_not(None) if leading_value is None else None
+
+
+def keyset_page(query, keys, limit=None, after=None, descending=False):
+    """Order ``query`` by ``keys`` and restrict it to one page.
+
+    The page ends with the cursor's section of a nullable leading key; see
+    :func:`keyset_rows` for one that carries on into the next.
+    """
+    if after is not None:
+        query = query.filter(keyset_filter(keys, after, descending))
+
+    directions = _directions(keys, descending)
+    query = query.order_by(
+        *(k.desc() if desc else k.asc() for k, desc in zip(keys, directions))
+    )
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _tail(keys, limit, after, descending, count):
+    # Condition and size of the second phase of a page that read ``count`` rows.
+    if after is None or (limit is not None and count >= limit):
+        return None, None
+    section = next_section(keys, after, descending)
+    return section, (None if limit is None else limit - count)
+
+
+def keyset_rows(query, keys, limit=None, after=None, descending=False):
+    """Rows of one page of an ORM ``query``, read in at most two range scans.
+
+    When the cursor's section of a nullable leading key runs out before the
+    page is full, the page carries on from the start of the next section.
+    """
+    rows = keyset_page(query, keys, limit, after, descending).all()
+    section, remaining = _tail(keys, limit, after, descending, len(rows))
+    if section is not None:
+        rows += keyset_page(
+            query.filter(section), keys, remaining, None, descending
+        ).all()
+    return rows
+
+
+async def keyset_scalars(session, stmt, keys, limit=None, after=None, descending=False):
+    """:func:`keyset_rows` for a ``select()`` of entities on an ``AsyncSession``."""
+    page = keyset_page(stmt, keys, limit, after, descending)
+    rows = (await session.scalars(page)).all()
+    section, remaining = _tail(keys, limit, after, descending, len(rows))
+    if section is not None:
+        page = keyset_page(stmt.where(section), keys, remaining, None, descending)
+        rows += (await session.scalars(page)).all()
+    return rows
+
+
+def parse_page_args(keys, args=None, config=None):
+    """Read ``limit`` and ``after`` from the query string.
+
+    The page size falls back to ``PAGE_SIZE_DEFAULT`` and is clamped to
+    ``PAGE_SIZE_MAX``. ``args`` and ``config`` default to the Flask request's
+    query string and the app config. Raises ``ValueError`` on malformed input.
+    """
+    args = request.args if args is None else args
+    config = current_app.config if config is None else config
+    limit = args.get("limit", config["PAGE_SIZE_DEFAULT"])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer.") from None
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    limit = min(limit, config["PAGE_SIZE_MAX"])
+
+    after = args.get("after")
+    if after:
+        after = decode_cursor(after, keys)
+    return limit, after or None
+
+
+def paginate(fetch, keys, limit, after, **kwargs):
+    """Fetch one page through ``fetch`` and compute the next cursor.
+
+    One extra row is requested to find out whether another page exists, so
+    the last page never carries a cursor.
+    """
+    return split_page(fetch(limit=limit + 1, after=after, **kwargs), keys, limit)
+
+
+def split_page(rows, keys, limit):
+    """Trim ``limit + 1`` fetched rows to a page and its next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(row_key(rows[-1], keys))
+
+
+def page_response(items, next_cursor):
+    """JSON list response advertising the next page in its headers."""
+    response = jsonify(items)
+    if next_cursor:
+        args = {**request.args.to_dict(), "after": next_cursor}
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
@@ -0,0 +1,99 @@
+"""Connection pool instrumentation.
+
+``InstrumentedQueuePool`` is a drop-in ``QueuePool`` that times every
+checkout, including the time spent waiting for a free connection or opening
+a new one, so pool exhaustion shows up as latency before it shows up as
+``TimeoutError``. :func:`pool_status` reports the live pool counters.
+"""
+
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds, in seconds, of the checkout latency histogram buckets.
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def observe(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.buckets[bisect_left(CHECKOUT_BUCKETS, seconds)] += 1
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            bounds = [str(bound) for bound in CHECKOUT_BUCKETS] + ["+Inf"]
+            cumulative, histogram = 0, {}
+            for bound, count in zip(bounds, self.buckets):
+                cumulative += count
+                histogram[bound] = cumulative
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_total,
+                "wait_seconds_max": self.wait_max,
+                "checkout_latency_histogram": histogram,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self._checking_out = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get calls itself again after losing a race for an
+        # overflow slot; only the outermost call is one checkout.
+        if getattr(self._checking_out, "active", False):
+            return super()._do_get()
+
+        self._checking_out.active = True
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timed_out()
+            raise
+        finally:
+            self._checking_out.active = False
+        self.stats.observe(perf_counter() - start)
+        return connection
+
+
+def pool_status(engine):
+    """Live counters of ``engine``'s pool, plus checkout stats when instrumented."""
+    pool = engine.pool
+    status = {"url": engine.url.render_as_string(), "pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.stats.snapshot())
+    return status
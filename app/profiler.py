@@ -0,0 +1,145 @@
+"""Opt-in SQL profiler (``SQL_PROFILER_ENABLED``).
+
+Counts the statements each request executes and their total duration, logs
+statements slower than ``SLOW_QUERY_THRESHOLD`` seconds together with their
+parameters and the service method that issued them, and optionally reports
+the totals in ``X-DB-Queries``/``X-DB-Time`` (milliseconds) response headers.
+
+Views declare how many statements they may run with :func:`query_budget`;
+with ``QUERY_BUDGET_ENFORCED`` (the test config) exceeding it raises
+:class:`QueryBudgetExceeded`, otherwise it is logged.
+"""
+
+import logging
+import os
+import sys
+import threading
+from functools import wraps
+from time import perf_counter
+
+from flask import current_app, request
+from sqlalchemy import event
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "services")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class _Counters(threading.local):
+    queries = 0
+    duration = 0.0
+    start = 0.0
+
+
+def _caller():
+    """Qualified name of the outermost service function on the stack: the
+    service method a route called rather than a helper it runs through."""
+    frame, caller = sys._getframe(2), None
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(SERVICES_DIR):
+            caller = frame.f_code.co_qualname
+        frame = frame.f_back
+    return caller
+
+
+class SQLProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_threshold = None
+        self.enforce_budgets = False
+        self._counters = _Counters()
+
+    def init_app(self, app):
+        self.enabled = app.config["SQL_PROFILER_ENABLED"]
+        if not self.enabled:
+            return
+        self.slow_threshold = app.config["SLOW_QUERY_THRESHOLD"]
+        self.enforce_budgets = app.config["QUERY_BUDGET_ENFORCED"]
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before_execute)
+                event.listen(engine, "after_cursor_execute", self._after_execute)
+        app.before_request(self.reset)
+        if app.config["SQL_PROFILER_HEADERS"]:
+            app.after_request(self._add_headers)
+
+    @property
+    def queries(self):
+        """Statements executed on this thread since the last :meth:`reset`."""
+        return self._counters.queries
+
+    @property
+    def duration(self):
+        return self._counters.duration
+
+    def reset(self):
+        self._counters.queries = 0
+        self._counters.duration = 0.0
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        self._counters.start = perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        counters = self._counters
+        elapsed = perf_counter() - counters.start
+        counters.queries += 1
+        counters.duration += elapsed
+
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            logger.warning(
+                "Slow query (%.1f ms) from %s: %s; parameters: %r",
+                elapsed * 1000,
+                _caller() or "unknown caller",
+                statement,
+                parameters,
+            )
+
+    def _add_headers(self, response):
+        response.headers["X-DB-Queries"] = str(self._counters.queries)
+        response.headers["X-DB-Time"] = f"{self._counters.duration * 1000:.3f}"
+        return response
+
+
+sql_profiler = SQLProfiler()
+
+
+def query_budget(max_queries):
+    """Decorate a view that may execute at most ``max_queries`` statements.
+
+    Only the statements run by the view itself count, not the body of a
+    streamed response. Does nothing while the profiler is disabled.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not sql_profiler.enabled:
+                return view(*args, **kwargs)
+
+            before = sql_profiler.queries
+            response = view(*args, **kwargs)
+            executed = sql_profiler.queries - before
+            if executed > max_queries:
+                message = (
+                    f"{request.endpoint} executed {executed} queries, "
+                    f"budget is {max_queries}"
+                )
+                if sql_profiler.enforce_budgets:
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def init_app(app):
+    sql_profiler.init_app(app)
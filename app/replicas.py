@@ -0,0 +1,177 @@
+"""Read-replica routing (``DB_REPLICAS``).
+
+Each replica URI becomes a bind named ``replica0``, ``replica1``, ... Queries
+run inside a :func:`replica_read` method go to a replica; everything else
+goes to the primary, as do flushes, DML statements and every query of a
+request after the session wrote anything (its replica may lag behind).
+
+A request keeps the replica it first used, picked by fewest checked-out
+connections. A replica that cannot be connected to or drops its connection
+is ejected for ``REPLICA_EJECT_SECONDS`` and the read is retried on another
+replica or the primary. Other errors (a lock wait timeout, a missing table)
+are the query's own and propagate as they would on the primary.
+"""
+
+import itertools
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from time import monotonic
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+
+REPLICA_BIND = "replica{}"
+
+# Session.info keys, cleared at the start of every request.
+WROTE = "replicas.wrote"
+REPLICA = "replicas.replica"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+class Replica:
+    def __init__(self, name, engine, eject_seconds):
+        self.name = name
+        self.engine = engine
+        self.eject_seconds = eject_seconds
+        self.outstanding = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self._lock = threading.Lock()
+
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "checkin", self._checkin)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _checkout(self, dbapi_connection, record, proxy):
+        with self._lock:
+            self.outstanding += 1
+
+    def _checkin(self, dbapi_connection, record):
+        with self._lock:
+            self.outstanding -= 1
+
+    def _handle_error(self, context):
+        # No connection means connecting failed (refused, unreachable...).
+        if context.is_disconnect or context.connection is None:
+            self.eject()
+
+    def eject(self):
+        self.ejected_until = monotonic() + self.eject_seconds
+        self.ejections += 1
+
+    @property
+    def healthy(self):
+        return monotonic() >= self.ejected_until
+
+    def status(self):
+        return {
+            "outstanding": self.outstanding,
+            "healthy": self.healthy,
+            "ejections": self.ejections,
+        }
+
+
+class ReplicaRouter:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._start = itertools.count()
+
+    def choose(self):
+        """Healthy replica with the fewest checked-out connections, or
+        ``None``. Ties rotate so idle replicas share the load."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._start) % len(healthy)
+        rotated = healthy[start:] + healthy[:start]
+        return min(rotated, key=lambda replica: replica.outstanding)
+
+
+def _router():
+    return current_app.extensions.get("replica_router")
+
+
+class RoutingSession(Session):
+    """Session sending :func:`replica_read` queries to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = self._replica_engine(clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self, clause):
+        router = _router()
+        if router is None:
+            return None
+        if self._flushing or (clause is not None and getattr(clause, "is_dml", 0)):
+            self.info[WROTE] = True
+            return None
+        if not _replica_reads.get() or self.info.get(WROTE):
+            return None
+        if self.new or self.dirty or self.deleted:
+            return None
+
+        replica = self.info.get(REPLICA)
+        if replica is None or not replica.healthy:
+            replica = self.info[REPLICA] = router.choose()
+        return replica.engine if replica else None
+
+
+def replica_read(method):
+    """Run ``method``'s queries on a replica when replicas are configured."""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if _replica_reads.get() or _router() is None:
+            return method(*args, **kwargs)
+
+        token = _replica_reads.set(True)
+        try:
+            return method(*args, **kwargs)
+        except exc.OperationalError:
+            session = current_app.extensions["sqlalchemy"].session
+            replica = session.info.get(REPLICA)
+            if replica is None or replica.healthy:
+                raise
+            # Ejected while answering: retry elsewhere.
+            session.rollback()
+            session.info.pop(REPLICA)
+            return method(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+def replica_binds(config, options):
+    """``SQLALCHEMY_BINDS`` entries for ``DB_REPLICAS``; ``options(url)``
+    returns the engine options for one URL."""
+    return {
+        REPLICA_BIND.format(i): {"url": url, **options(url)}
+        for i, url in enumerate(config.get("DB_REPLICAS") or ())
+    }
+
+
+def init_app(app, db):
+    names = [
+        name
+        for name in app.config.get("SQLALCHEMY_BINDS", {})
+        if isinstance(name, str) and name.startswith(REPLICA_BIND.format(""))
+    ]
+    if not names:
+        return
+
+    eject_seconds = app.config["REPLICA_EJECT_SECONDS"]
+    with app.app_context():
+        replicas = [Replica(name, db.engines[name], eject_seconds) for name in names]
+    app.extensions["replica_router"] = ReplicaRouter(replicas)
+
+    @app.before_request
+    def _reset_routing():
+        db.session.info.pop(WROTE, None)
+        db.session.info.pop(REPLICA, None)
@@ -1,3 +1,5 @@
 from .customer_routes import customer_bp
+from .internal_routes import internal_bp
 from .order_routes import order_bp
 from .product_routes import product_bp
+from .summary_routes import summary_bp
@@ -1,23 +1,77 @@
 from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
 from ..services import CustomerService
-from ..models import customer_schema, customers_schema
+from ..models import Customer, CustomerSchema, customer_schema, customers_schema
+from ..bulk import chunk_size, read_items
+from ..conditional import conditional
 from ..database import db
+from ..fieldsets import parse_fields, sparse_schema
+from ..filters import parse_date_range, parse_ids, parse_list_query, parse_search
+from ..pagination import page_response, paginate, parse_page_args
+from ..profiler import query_budget
+from ..streaming import stream_format, stream_response
 
 customer_bp = Blueprint("customer", __name__)
 
 
 @customer_bp.route("/customers", methods=["GET"])
+@query_budget(3)
+@conditional("Customers")
 def get_customers():
-    """Endpoint to get all customers."""
+    """Endpoint to get a filtered, sorted page of customers, or stream all of them.
+
+    ``?ids=`` instead returns the listed customers and the IDs not found.
+    """
+    try:
+        fields = parse_fields(CustomerSchema)
+        ids = parse_ids(Customer.CustomerID)
+        if ids is None:
+            where, sort = parse_list_query(
+                CustomerService.FILTERS,
+                CustomerService.SORTS,
+                CustomerService.PAGE_KEYS,
+            )
+            keys = sort[0]
+            limit, after = parse_page_args(keys)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    schema = sparse_schema(customers_schema, fields)
+
+    if ids is not None:
+        customers, missing = CustomerService.get_many(ids, fields=fields)
+        return jsonify({"items": schema.dump(customers), "missing": missing}), 200
+
+    fmt = stream_format()
+    if fmt:
+        return stream_response(
+            CustomerService.get_all,
+            keys,
+            schema,
+            fmt,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+
     try:
-        customers = CustomerService.get_all()
-        result = customers_schema.dump(customers)
-        return jsonify(result), 200
+        customers, next_cursor = paginate(
+            CustomerService.get_all,
+            keys,
+            limit,
+            after,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+        result = schema.dump(customers)
+        return page_response(result, next_cursor), 200
     except Exception as e:
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
 
 
 @customer_bp.route("/customers", methods=["POST"])
+@query_budget(5)
 def add_customer():
     """Endpoint to insert a new customer."""
     json_data = request.get_json(silent=True)
@@ -38,17 +92,78 @@ def add_customer():
         return jsonify({"message": f"Error inserting customer: {str(e)}"}), 500
 
 
+@customer_bp.route("/customers/bulk", methods=["PUT"])
+def upsert_customers_bulk():
+    """Endpoint to insert or update many customers (JSON array or NDJSON)."""
+    try:
+        items = read_items()
+        size = chunk_size()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not items:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        rows = customers_schema.load(items, partial=("CompanyName",))
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    result = CustomerService.upsert_bulk(rows, size)
+    return jsonify(result), 207 if result["errors"] else 200
+
+
+@customer_bp.route("/customers/search", methods=["GET"])
+@query_budget(2)
+@conditional("Customers")
+def search_customers():
+    """Endpoint to search customers by name prefixes, best match first."""
+    try:
+        fields = parse_fields(CustomerSchema)
+        words, limit = parse_search()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    customers = CustomerService.search(words, limit, fields=fields)
+    return sparse_schema(customers_schema, fields).jsonify(customers), 200
+
+
 @customer_bp.route("/customers/<string:customer_id>", methods=["GET"])
+@query_budget(2)
+@conditional("Customers")
 def get_customer(customer_id):
     """Endpoint to get a customer by ID."""
-    customer = CustomerService.get_by_id(customer_id)
+    try:
+        fields = parse_fields(CustomerSchema)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    customer = CustomerService.get_by_id(customer_id, fields=fields)
 
     if customer:
-        return customer_schema.jsonify(customer), 200
+        return sparse_schema(customer_schema, fields).jsonify(customer), 200
+    return jsonify({"message": f"Customer ID {customer_id} not found"}), 404
+
+
+@customer_bp.route("/customers/<string:customer_id>/revenue", methods=["GET"])
+@query_budget(2)
+@conditional("Customers", "Orders")
+def get_customer_revenue(customer_id):
+    """Endpoint to get a customer's order revenue, optionally in a date range."""
+    try:
+        date_from, date_to = parse_date_range()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    revenue = CustomerService.get_revenue(customer_id, date_from, date_to)
+
+    if revenue:
+        return jsonify(revenue), 200
     return jsonify({"message": f"Customer ID {customer_id} not found"}), 404
 
 
 @customer_bp.route("/customers/<string:customer_id>", methods=["PUT"])
+@query_budget(7)
 def update_customer(customer_id):
     """Endpoint to update an existing customer."""
     json_data = request.get_json()
@@ -67,6 +182,7 @@ def update_customer(customer_id):
 
 
 @customer_bp.route("/customers/<string:customer_id>", methods=["DELETE"])
+@query_budget(10)
 def delete_customer(customer_id):
     """Endpoint to delete a customer."""
     deleted = CustomerService.delete(customer_id)
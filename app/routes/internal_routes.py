@@ -0,0 +1,41 @@
+from flask import Blueprint, Response, current_app, jsonify
+from ..caching import ENTITY_CACHES, product_cache
+from ..database import db
+from ..metrics import CONTENT_TYPE, request_metrics
+from ..pool import pool_status
+
+internal_bp = Blueprint("internal", __name__)
+
+
+@internal_bp.route("/internal/cache", methods=["GET"])
+def get_cache_stats():
+    """Endpoint to get response and entity cache hit/miss/eviction counters."""
+    caches = [product_cache, *ENTITY_CACHES.values()]
+    return jsonify([cache.stats() for cache in caches]), 200
+
+
+@internal_bp.route("/internal/pool", methods=["GET"])
+def get_pool_stats():
+    """Endpoint to get connection pool usage and checkout latency per bind,
+    plus the load and health of each read replica."""
+    router = current_app.extensions.get("replica_router")
+    replicas = {r.name: r.status() for r in router.replicas} if router else {}
+    return (
+        jsonify(
+            [
+                {
+                    "bind": bind,
+                    **pool_status(engine),
+                    **({"replica": replicas[bind]} if bind in replicas else {}),
+                }
+                for bind, engine in db.engines.items()
+            ]
+        ),
+        200,
+    )
+
+
+@internal_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Endpoint to get per-endpoint latency histograms for Prometheus."""
+    return Response(request_metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
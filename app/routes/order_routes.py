@@ -1,23 +1,66 @@
 from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
 from ..services import OrderService
-from ..models import order_schema, orders_schema
+from ..models import OrderSchema, order_schema, orders_schema
+from ..bulk import chunk_size, read_items
+from ..conditional import conditional
 from ..database import db
+from ..fieldsets import parse_fields, sparse_schema
+from ..filters import parse_date_range, parse_list_query
+from ..pagination import page_response, paginate, parse_page_args, split_page
+from ..profiler import query_budget
+from ..streaming import stream_format, stream_response
 
 order_bp = Blueprint("order", __name__)
 
 
 @order_bp.route("/orders", methods=["GET"])
+@query_budget(7)
+@conditional("Orders", "Products")
 def get_orders():
-    """Endpoint to get all orders."""
+    """Endpoint to get a filtered, sorted page of orders, or stream all of them."""
     try:
-        orders = OrderService.get_all()
-        result = orders_schema.dump(orders)
-        return jsonify(result), 200
+        fields = parse_fields(OrderSchema)
+        where, sort = parse_list_query(
+            OrderService.FILTERS, OrderService.SORTS, OrderService.PAGE_KEYS
+        )
+        keys = sort[0]
+        limit, after = parse_page_args(keys)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    schema = sparse_schema(orders_schema, fields)
+
+    fmt = stream_format()
+    if fmt:
+        return stream_response(
+            OrderService.get_all,
+            keys,
+            schema,
+            fmt,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+
+    try:
+        orders, next_cursor = paginate(
+            OrderService.get_all,
+            keys,
+            limit,
+            after,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+        result = schema.dump(orders)
+        return page_response(result, next_cursor), 200
     except Exception as e:
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
 
 
 @order_bp.route("/orders", methods=["POST"])
+@query_budget(9)
 def add_order():
     """Endpoint to insert a new order."""
     json_data = request.get_json(silent=True)
@@ -37,17 +80,67 @@ def add_order():
         return jsonify({"message": f"Error inserting order: {str(e)}"}), 500
 
 
+@order_bp.route("/orders/bulk", methods=["POST"])
+def add_orders_bulk():
+    """Endpoint to insert many orders (JSON array or NDJSON) in chunks."""
+    try:
+        items = read_items()
+        size = chunk_size()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not items:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        orders, errors = orders_schema.load(items), {}
+    except ValidationError as err:
+        if "_schema" in err.messages:
+            return jsonify(err.messages), 400
+        orders, errors = err.valid_data, err.messages
+
+    valid = [i for i in range(len(items)) if i not in errors]
+    results = [{"index": i, "errors": errors[i]} for i in errors]
+    inserted = OrderService.create_bulk([orders[i] for i in valid], size)
+    results.extend({"index": i, **result} for i, result in zip(valid, inserted))
+    results.sort(key=lambda result: result["index"])
+
+    created = sum("OrderID" in result for result in results)
+    body = {"created": created, "failed": len(results) - created, "results": results}
+    return jsonify(body), 201 if created == len(results) else 207
+
+
 @order_bp.route("/orders/<int:order_id>", methods=["GET"])
+@query_budget(4)
+@conditional("Orders", "Products")
 def get_order(order_id):
     """Endpoint to get an order by ID."""
-    order = OrderService.get_by_id(order_id)
+    try:
+        fields = parse_fields(OrderSchema)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    order = OrderService.get_by_id(order_id, fields=fields)
 
     if order:
-        return order_schema.jsonify(order), 200
+        return sparse_schema(order_schema, fields).jsonify(order), 200
+    return jsonify({"message": f"Order ID {order_id} not found"}), 404
+
+
+@order_bp.route("/orders/<int:order_id>/total", methods=["GET"])
+@query_budget(2)
+@conditional("Orders")
+def get_order_total(order_id):
+    """Endpoint to get the subtotal, freight and total of an order."""
+    total = OrderService.get_total(order_id)
+
+    if total:
+        return jsonify(total), 200
     return jsonify({"message": f"Order ID {order_id} not found"}), 404
 
 
 @order_bp.route("/orders/<int:order_id>", methods=["PUT"])
+@query_budget(10)
 def update_order(order_id):
     """Endpoint to update an existing order."""
     json_data = request.get_json()
@@ -65,6 +158,7 @@ def update_order(order_id):
 
 
 @order_bp.route("/orders/<int:order_id>", methods=["DELETE"])
+@query_budget(8)
 def delete_order(order_id):
     """Endpoint to delete an order."""
     deleted = OrderService.delete(order_id)
@@ -75,14 +169,35 @@ def delete_order(order_id):
 
 
 @order_bp.route("/orders/history/<string:customer_id>", methods=["GET"])
+@query_budget(7)
+@conditional("Customers", "Orders", "Products")
 def get_customer_history(customer_id):
-    """Endpoint to get order history for a specific customer."""
-    history_data = OrderService.get_customer_history(customer_id)
+    """Endpoint to get a page of a customer's orders, newest first.
 
-    if history_data is None:
+    ``from`` and ``to`` restrict the order dates (inclusive).
+    """
+    try:
+        fields = parse_fields(OrderSchema)
+        limit, after = parse_page_args(OrderService.PAGE_KEYS)
+        date_from, date_to = parse_date_range()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    history = OrderService.get_customer_history(
+        customer_id,
+        limit=limit + 1,
+        after=after,
+        date_from=date_from,
+        date_to=date_to,
+        fields=fields,
+    )
+
+    if history is None:
         return jsonify({"message": f"Customer ID {customer_id} not found"}), 404
 
-    if not history_data:
+    if not history and after is None:
         return jsonify({"message": f"Customer ID {customer_id} has no orders"}), 200
 
-    return jsonify(history_data), 200
+    history, next_cursor = split_page(history, OrderService.PAGE_KEYS, limit)
+    result = sparse_schema(orders_schema, fields).dump(history)
+    return page_response(result, next_cursor), 200
@@ -1,23 +1,76 @@
 from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
 from ..services.product_service import ProductService
-from ..models import product_schema, products_schema
+from ..models import Product, ProductSchema, product_schema, products_schema
+from ..bulk import chunk_size, read_items
+from ..caching import product_cache
+from ..conditional import conditional
 from ..database import db
+from ..fieldsets import parse_fields, sparse_schema
+from ..filters import parse_ids, parse_list_query, parse_search
+from ..pagination import page_response, paginate, parse_page_args
+from ..profiler import query_budget
+from ..streaming import stream_format, stream_response
 
 product_bp = Blueprint("product", __name__)
 
 
 @product_bp.route("/products", methods=["GET"])
+@query_budget(3)
+@conditional("Products", cache=product_cache)
 def get_products():
-    """Endpoint to get all products."""
+    """Endpoint to get a filtered, sorted page of products, or stream all of them.
+
+    ``?ids=`` instead returns the listed products and the IDs not found.
+    """
+    try:
+        fields = parse_fields(ProductSchema)
+        ids = parse_ids(Product.ProductID)
+        if ids is None:
+            where, sort = parse_list_query(
+                ProductService.FILTERS, ProductService.SORTS, ProductService.PAGE_KEYS
+            )
+            keys = sort[0]
+            limit, after = parse_page_args(keys)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    schema = sparse_schema(products_schema, fields)
+
+    if ids is not None:
+        products, missing = ProductService.get_many(ids, fields=fields)
+        return jsonify({"items": schema.dump(products), "missing": missing}), 200
+
+    fmt = stream_format()
+    if fmt:
+        return stream_response(
+            ProductService.get_all,
+            keys,
+            schema,
+            fmt,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+
     try:
-        products = ProductService.get_all()
-        result = products_schema.dump(products)
-        return jsonify(result), 200
+        products, next_cursor = paginate(
+            ProductService.get_all,
+            keys,
+            limit,
+            after,
+            fields=fields,
+            where=where,
+            sort=sort,
+        )
+        result = schema.dump(products)
+        return page_response(result, next_cursor), 200
     except Exception as e:
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
 
 
 @product_bp.route("/products", methods=["POST"])
+@query_budget(5)
 def add_product():
     """Endpoint to insert a new product."""
     json_data = request.get_json(silent=True)
@@ -38,17 +91,73 @@ def add_product():
         return jsonify({"message": f"Error inserting product: {str(e)}"}), 500
 
 
+@product_bp.route("/products/bulk", methods=["PUT"])
+def upsert_products_bulk():
+    """Endpoint to insert or update many products (JSON array or NDJSON)."""
+    try:
+        items = read_items()
+        size = chunk_size()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not items:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        rows = products_schema.load(items, partial=True)
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    result = ProductService.upsert_bulk(rows, size)
+    return jsonify(result), 207 if result["errors"] else 200
+
+
+@product_bp.route("/products/search", methods=["GET"])
+@query_budget(2)
+@conditional("Products", cache=product_cache)
+def search_products():
+    """Endpoint to search products by name prefixes, best match first."""
+    try:
+        fields = parse_fields(ProductSchema)
+        words, limit = parse_search()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    products = ProductService.search(words, limit, fields=fields)
+    return sparse_schema(products_schema, fields).jsonify(products), 200
+
+
 @product_bp.route("/products/<int:product_id>", methods=["GET"])
+@query_budget(2)
+@conditional("Products", cache=product_cache)
 def get_product(product_id):
     """Endpoint to get a product by ID."""
-    product = ProductService.get_by_id(product_id)
+    try:
+        fields = parse_fields(ProductSchema)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    product = ProductService.get_by_id(product_id, fields=fields)
 
     if product:
-        return product_schema.jsonify(product), 200
+        return sparse_schema(product_schema, fields).jsonify(product), 200
+    return jsonify({"message": f"Product ID {product_id} not found"}), 404
+
+
+@product_bp.route("/products/<int:product_id>/sales", methods=["GET"])
+@query_budget(2)
+@conditional("Products", "Orders")
+def get_product_sales(product_id):
+    """Endpoint to get the units sold and revenue of a product."""
+    sales = ProductService.get_sales(product_id)
+
+    if sales:
+        return jsonify(sales), 200
     return jsonify({"message": f"Product ID {product_id} not found"}), 404
 
 
 @product_bp.route("/products/<int:product_id>", methods=["PUT"])
+@query_budget(7)
 def update_product(product_id):
     """Endpoint to update an existing product."""
     json_data = request.get_json()
@@ -66,6 +175,7 @@ def update_product(product_id):
 
 
 @product_bp.route("/products/<int:product_id>", methods=["DELETE"])
+@query_budget(6)
 def delete_product(product_id):
     """Endpoint to delete a product."""
     deleted = ProductService.delete(product_id)
@@ -0,0 +1,64 @@
+from flask import Blueprint, jsonify
+from ..services import SummaryService
+from ..conditional import conditional
+from ..filters import parse_month_range
+from ..profiler import query_budget
+
+summary_bp = Blueprint("summary", __name__)
+
+
+@summary_bp.route("/summaries/products/<int:product_id>", methods=["GET"])
+@query_budget(2)
+@conditional("Products", "Orders")
+def get_product_summary(product_id):
+    """Endpoint to get the monthly sales of a product.
+
+    ``from`` and ``to`` restrict the months (YYYY-MM, inclusive).
+    """
+    try:
+        month_from, month_to = parse_month_range()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    months = SummaryService.get_product_months(product_id, month_from, month_to)
+
+    if months is None:
+        return jsonify({"message": f"Product ID {product_id} not found"}), 404
+    return jsonify({"ProductID": product_id, "Months": months}), 200
+
+
+@summary_bp.route("/summaries/customers/<string:customer_id>", methods=["GET"])
+@query_budget(2)
+@conditional("Customers", "Orders")
+def get_customer_summary(customer_id):
+    """Endpoint to get the monthly orders and revenue of a customer.
+
+    ``from`` and ``to`` restrict the months (YYYY-MM, inclusive).
+    """
+    try:
+        month_from, month_to = parse_month_range()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    months = SummaryService.get_customer_months(customer_id, month_from, month_to)
+
+    if months is None:
+        return jsonify({"message": f"Customer ID {customer_id} not found"}), 404
+    return jsonify({"CustomerID": customer_id, "Months": months}), 200
+
+
+@summary_bp.route("/summaries/countries/<string:country>", methods=["GET"])
+@query_budget(2)
+@conditional("Orders")
+def get_country_summary(country):
+    """Endpoint to get the monthly orders and revenue shipped to a country.
+
+    ``from`` and ``to`` restrict the months (YYYY-MM, inclusive).
+    """
+    try:
+        month_from, month_to = parse_month_range()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    months = SummaryService.get_country_months(country, month_from, month_to)
+    return jsonify({"ShipCountry": country, "Months": months}), 200
@@ -0,0 +1,193 @@
+"""Full-text prefix search over product and customer names.
+
+On SQLite each :class:`SearchIndex` is an FTS5 table (``ProductSearch``,
+``CustomerSearch``) created together with the metadata. The service write
+methods keep it current with :meth:`SearchIndex.sync` in their transaction;
+``flask rebuild-search`` refills it after writes made outside them and bumps
+the ``Customers`` and ``Products`` versions, so search responses cached
+before the rebuild are not served again. On MySQL
+it is a FULLTEXT index on the base table, which InnoDB maintains itself, so
+``sync`` and ``rebuild`` do nothing there.
+
+Every query word must match the start of a word in one of the indexed
+columns; results are ordered by relevance (BM25 on SQLite, the natural
+language score on MySQL).
+"""
+
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import (
+    Index,
+    column,
+    delete,
+    event,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+)
+from sqlalchemy.dialects.mysql import match
+
+from .database import db
+from .models import Customer, Product
+from .versioning import touch
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    def __init__(self, model, name, weights):
+        """Index ``model``'s columns named in ``weights`` (column -> BM25
+        weight, SQLite only) in the FTS5 table ``name``."""
+        self.model = model
+        self.name = name
+        self.weights = weights
+        (self.key,) = model.__table__.primary_key.columns
+        # Integer keys are the FTS rowid; other keys are stored unindexed.
+        self.rowid = self.key.type.python_type is int
+        key_name = "rowid" if self.rowid else self.key.name
+        self.fts = table(name, column(key_name), *(column(c) for c in weights))
+        self.fts_key = self.fts.c[key_name]
+        self.fulltext = Index(
+            f"ft_{model.__tablename__}",
+            *(model.__table__.c[c] for c in weights),
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql")
+
+    def create(self, connection):
+        """Create the FTS5 table or the FULLTEXT index if missing."""
+        if connection.dialect.name == "mysql":
+            self.fulltext.create(connection, checkfirst=True)
+            return
+        columns = [_quote(c) for c in self.weights]
+        if not self.rowid:
+            columns.insert(0, f"{_quote(self.key.name)} UNINDEXED")
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {_quote(self.name)} USING fts5("
+            f"{', '.join(columns)}, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    def drop(self, connection):
+        if connection.dialect.name != "mysql":
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {_quote(self.name)}")
+
+    def _source(self):
+        base = self.model.__table__
+        return select(base.c[self.key.name], *(base.c[c] for c in self.weights))
+
+    def _columns(self):
+        return [self.fts_key.name, *self.weights]
+
+    def rebuild(self, connection):
+        """Refill the FTS5 table from the base table; returns its row count,
+        ``None`` on MySQL."""
+        if connection.dialect.name == "mysql":
+            return None
+        connection.execute(delete(self.fts))
+        stmt = insert(self.fts).from_select(self._columns(), self._source())
+        return connection.execute(stmt).rowcount
+
+    def sync(self, keys, session=None):
+        """Re-index the rows with primary key in ``keys`` in the transaction
+        of ``session`` (default ``db.session``): deleted rows leave the index,
+        others are (re)added."""
+        session = db.session if session is None else session
+        keys = list(keys)
+        if not keys or session.get_bind().dialect.name == "mysql":
+            return
+        # Core statements do not autoflush; the base rows must be current.
+        session.flush()
+        # Unindexed keys are matched by a scan of the FTS5 table, which only
+        # matters for large bulk writes; customers are few.
+        session.execute(delete(self.fts).where(self.fts_key.in_(keys)))
+        source = self._source().where(self.key.in_(keys))
+        session.execute(insert(self.fts).from_select(self._columns(), source))
+
+    def add(self, condition):
+        """Index the base rows matching ``condition`` (rows just inserted
+        without a known key), replacing any stale entries for their keys."""
+        if db.session.get_bind().dialect.name == "mysql":
+            return
+        db.session.flush()
+        keys = select(self.key).where(condition)
+        db.session.execute(delete(self.fts).where(self.fts_key.in_(keys)))
+        source = self._source().where(condition)
+        db.session.execute(insert(self.fts).from_select(self._columns(), source))
+
+    def filter(self, query, words, session=None):
+        """Restrict an ORM ``query`` over the model to rows matching every
+        word as a prefix, best match first. ``session`` (default
+        ``db.session``) is the one ``query`` runs on."""
+        session = db.session if session is None else session
+        if session.get_bind().dialect.name == "mysql":
+            columns = [self.model.__table__.c[c] for c in self.weights]
+            against = " ".join(f"+{word}*" for word in words)
+            score = match(*columns, against=against).in_boolean_mode()
+            return query.filter(score).order_by(score.desc())
+
+        expression = " ".join(f'"{word}"*' for word in words)
+        fts = literal_column(_quote(self.name))
+        return (
+            query.join(self.fts, self.fts_key == self.key)
+            .filter(fts.op("MATCH")(expression))
+            .order_by(func.bm25(fts, *self._bm25_weights()))
+        )
+
+    def _bm25_weights(self):
+        weights = list(self.weights.values())
+        return weights if self.rowid else [0, *weights]
+
+
+product_search = SearchIndex(Product, "ProductSearch", {"ProductName": 1})
+customer_search = SearchIndex(
+    Customer, "CustomerSearch", {"CompanyName": 10, "ContactName": 5, "City": 1}
+)
+SEARCH_INDEXES = (product_search, customer_search)
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_indexes(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        for index in SEARCH_INDEXES:
+            index.create(connection)
+
+
+@event.listens_for(db.metadata, "after_drop")
+def _drop_indexes(target, connection, **kw):
+    for index in SEARCH_INDEXES:
+        index.drop(connection)
+
+
+def rebuild(connection):
+    """Refill every FTS5 table; returns row counts (empty on MySQL)."""
+    counts = {}
+    for index in SEARCH_INDEXES:
+        count = index.rebuild(connection)
+        if count is not None:
+            counts[index.name] = count
+    return counts
+
+
+@click.command("rebuild-search")
+@with_appcontext
+def rebuild_search_command():
+    """Refill the full-text search tables from the products and customers."""
+    start = time.perf_counter()
+    counts = rebuild(db.session.connection())
+    touch("Customers", "Products")
+    db.session.commit()
+    elapsed = time.perf_counter() - start
+    click.echo(
+        ", ".join(f"{count} {table}" for table, count in counts.items())
+        + f" in {elapsed:.1f}s"
+    )
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_search_command)
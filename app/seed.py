@@ -0,0 +1,288 @@
+"""``flask seed``: deterministic synthetic Northwind data at a scale factor.
+
+Scale 1 is 100 customers, 80 products and 10,000 orders; scale 100 is 10k
+customers, 800 products, 1M orders and about 5M order lines. Order counts per
+customer and product popularity follow a Zipf-like skew, order dates grow
+denser towards the end of the ten-year range and carry a year-end peak, and
+orders have 1 to 20 lines (about 5 on average). Rows are written with Core
+``executemany`` inserts in batches of ``--batch-size``; the monthly sales
+summaries and the search tables are rebuilt at the end.
+"""
+
+import itertools
+import operator
+import random
+import string
+import time
+from datetime import date, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+
+from .database import db
+from .models import Customer, Order, OrderDetail, Product
+from . import migrations, search
+from .services.summary_service import rebuild
+from .versioning import touch
+
+FIRST_ORDER_DATE = date(1996, 7, 4)
+DAYS = 3650
+MAX_LINES = 20
+DISCOUNTS = (0, 0, 0, 0.05, 0.1, 0.15, 0.2, 0.25)
+COUNTRIES = (
+    "Germany", "USA", "France", "Brazil", "UK", "Spain", "Mexico", "Venezuela",
+    "Italy", "Argentina", "Canada", "Sweden", "Austria", "Finland", "Denmark",
+    "Portugal", "Belgium", "Switzerland", "Ireland", "Norway", "Poland",
+)  # fmt: skip
+
+
+def sizes(scale):
+    return {
+        "customers": 100 * scale,
+        "products": 80 * max(1, scale // 10),
+        "orders": 10000 * scale,
+    }
+
+
+def customer_id(index):
+    """Five-letter CustomerID of the ``index``-th generated customer."""
+    letters = []
+    for _ in range(5):
+        index, digit = divmod(index, 26)
+        letters.append(string.ascii_uppercase[digit])
+    return "".join(reversed(letters))
+
+
+def _zipf_weights(count, exponent):
+    return list(
+        itertools.accumulate(1 / (rank**exponent) for rank in range(1, count + 1))
+    )
+
+
+def _order_day_weights():
+    # Volume grows threefold over the range, with a November/December peak.
+    weights = []
+    for day in range(DAYS):
+        month = (FIRST_ORDER_DATE + timedelta(days=day)).month
+        weights.append((1 + 2 * day / DAYS) * (1.5 if month >= 11 else 1))
+    return list(itertools.accumulate(weights))
+
+
+def _line_count_weights():
+    # Geometric-like, 1..MAX_LINES lines, mean about 5.
+    return list(itertools.accumulate(0.8 ** (k - 1) for k in range(1, MAX_LINES + 1)))
+
+
+CUSTOMER_FIELDS = (
+    "CustomerID", "CompanyName", "ContactName", "ContactTitle", "City",
+    "Country", "Phone",
+)  # fmt: skip
+PRODUCT_FIELDS = (
+    "ProductID", "ProductName", "SupplierID", "CategoryID", "QuantityPerUnit",
+    "UnitPrice", "UnitsInStock", "UnitsOnOrder", "ReorderLevel", "Discontinued",
+)  # fmt: skip
+ORDER_FIELDS = (
+    "OrderID", "CustomerID", "EmployeeID", "OrderDate", "RequiredDate",
+    "ShippedDate", "ShipVia", "Freight", "ShipCity", "ShipCountry",
+)  # fmt: skip
+DETAIL_FIELDS = ("OrderID", "ProductID", "UnitPrice", "Quantity", "Discount")
+
+
+def customers(count, rng):
+    for i in range(count):
+        yield (
+            customer_id(i),
+            f"Company {i}",
+            f"Contact {i}",
+            rng.choice(("Owner", "Sales Manager", "Accounting")),
+            f"City {i % 500}",
+            COUNTRIES[int(rng.paretovariate(1.2)) % len(COUNTRIES)],
+            f"{rng.randrange(10**9):09d}",
+        )
+
+
+def products(count, rng):
+    for i in range(1, count + 1):
+        yield (
+            i,
+            f"Product {i}",
+            rng.randint(1, 29),
+            rng.randint(1, 8),
+            f"{rng.choice((10, 12, 24, 48))} boxes",
+            round(rng.lognormvariate(3, 0.8), 2),
+            rng.randint(0, 120),
+            rng.choice((0, 0, 0, 10, 20, 40)),
+            rng.choice((0, 5, 10, 15, 20, 25, 30)),
+            rng.random() < 0.1,
+        )
+
+
+def orders(count, customer_count, rng):
+    # Shuffle so the busiest customers are not simply the first IDs.
+    ids = [customer_id(i) for i in range(customer_count)]
+    rng.shuffle(ids)
+    owners = rng.choices(ids, cum_weights=_zipf_weights(customer_count, 0.8), k=count)
+    days = rng.choices(range(DAYS), cum_weights=_order_day_weights(), k=count)
+    days.sort()
+    # Dates are written as ISO strings, looked up by day offset.
+    dates = [
+        (FIRST_ORDER_DATE + timedelta(days=d)).isoformat() for d in range(DAYS + 31)
+    ]
+
+    random = rng.random
+    for i in range(count):
+        day = days[i]
+        shipped = dates[day + int(random() * 30) + 1] if random() >= 0.03 else None
+        yield (
+            i + 1,
+            owners[i],
+            int(random() * 9) + 1,
+            dates[day],
+            dates[day + 28],
+            shipped,
+            int(random() * 3) + 1,
+            round(rng.expovariate(1 / 80), 2),
+            f"City {i % 500}",
+            # Skewed towards the first (largest) markets.
+            COUNTRIES[int(random() ** 2 * len(COUNTRIES))],
+        )
+
+
+def details(order_ids, product_count, prices, rng):
+    weights = _zipf_weights(product_count, 0.7)
+    product_ids = range(1, product_count + 1)
+    lines = rng.choices(
+        range(1, MAX_LINES + 1), cum_weights=_line_count_weights(), k=len(order_ids)
+    )
+    random = rng.random
+    for order_id, count in zip(order_ids, lines):
+        for product_id in set(rng.choices(product_ids, cum_weights=weights, k=count)):
+            yield (
+                order_id,
+                product_id,
+                prices[product_id],
+                int(random() * 100) + 1,
+                DISCOUNTS[int(random() * len(DISCOUNTS))],
+            )
+
+
+def _batched(rows, size):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _insert(connection, model, fields, rows, batch_size):
+    """Insert ``rows`` (tuples of ``fields``) in batches of ``batch_size``.
+
+    The rows go straight to the driver's ``executemany``, skipping per-row
+    parameter processing, so values must already be in their database form
+    (dates as ISO strings).
+    """
+    compiled = insert(model.__table__).compile(
+        dialect=connection.dialect, column_keys=fields
+    )
+    sql = str(compiled)
+    if compiled.positional:
+        order = [fields.index(key) for key in compiled.positiontup]
+        if order == list(range(len(fields))):
+            convert = None
+        else:
+            convert = operator.itemgetter(*order)
+    else:
+        convert = lambda row: dict(zip(fields, row))  # noqa: E731
+
+    count = 0
+    for batch in _batched(rows, batch_size):
+        connection.exec_driver_sql(
+            sql, batch if convert is None else [convert(row) for row in batch]
+        )
+        count += len(batch)
+    return count
+
+
+def seed(scale, random_seed=0, batch_size=50000):
+    """Fill the (empty) tables at ``scale``; returns the row count per table."""
+    rng = random.Random(random_seed)
+    size = sizes(scale)
+
+    # A connection of its own: PRAGMA synchronous cannot change inside a
+    # transaction, so it is restored after the commit, before the connection
+    # goes back to the pool.
+    with db.engine.connect() as connection:
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+            # Bulk load: durability is restored by the final commit.
+            connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        try:
+            counts = _load(connection, size, rng, batch_size)
+            tables = list(counts)
+            counts.update(rebuild(connection))
+            counts.update(search.rebuild(connection))
+            connection.commit()
+        finally:
+            if sqlite:
+                connection.rollback()
+                connection.exec_driver_sql(f"PRAGMA synchronous={synchronous}")
+
+    touch(*tables)
+    db.session.commit()
+    return counts
+
+
+def _load(connection, size, rng, batch_size):
+    counts = {}
+    product_rows = list(products(size["products"], rng))
+    prices = {row[0]: row[5] for row in product_rows}
+    counts["Customers"] = _insert(
+        connection,
+        Customer,
+        CUSTOMER_FIELDS,
+        customers(size["customers"], rng),
+        batch_size,
+    )
+    counts["Products"] = _insert(
+        connection, Product, PRODUCT_FIELDS, product_rows, batch_size
+    )
+
+    counts["Orders"] = counts["OrderDetails"] = 0
+    order_rows = orders(size["orders"], size["customers"], rng)
+    for batch in _batched(order_rows, batch_size):
+        counts["Orders"] += _insert(connection, Order, ORDER_FIELDS, batch, batch_size)
+        counts["OrderDetails"] += _insert(
+            connection,
+            OrderDetail,
+            DETAIL_FIELDS,
+            details([row[0] for row in batch], size["products"], prices, rng),
+            batch_size,
+        )
+    return counts
+
+
+@click.command("seed")
+@click.option("--scale", type=int, default=1, show_default=True)
+@click.option("--seed", "random_seed", type=int, default=0, show_default=True)
+@click.option("--batch-size", type=int, default=50000, show_default=True)
+@click.option("--reset", is_flag=True, help="Drop all tables and migrate afresh.")
+@with_appcontext
+def seed_command(scale, random_seed, batch_size, reset):
+    """Generate synthetic Northwind data at a scale factor."""
+    if reset:
+        db.drop_all()
+    migrations.upgrade(db.engine)
+    if db.session.query(Order.OrderID).first() is not None:
+        raise click.ClickException("Orders is not empty; use --reset to replace it.")
+
+    start = time.perf_counter()
+    counts = seed(scale, random_seed, batch_size)
+    elapsed = time.perf_counter() - start
+    click.echo(
+        ", ".join(f"{count} {table}" for table, count in counts.items())
+        + f" in {elapsed:.1f}s"
+    )
+
+
+def init_app(app):
+    app.cli.add_command(seed_command)
@@ -0,0 +1,163 @@
+"""Precompiled serializers for the marshmallow output schemas.
+
+``Schema.dump`` dispatches through every field object for every row. For the
+field types our schemas use, :class:`CompiledSchema` instead generates one
+flat Python function per schema (honoring ``only``/``exclude``) that reads
+the attributes and converts them inline, producing exactly what marshmallow
+would. Schemas with hooks or other field types, and dict inputs, keep using
+marshmallow, which also remains in charge of ``load``/validation.
+"""
+
+import datetime as dt
+import decimal
+
+from marshmallow import fields
+
+from .database import ma
+from .metrics import request_metrics
+
+_Decimal = decimal.Decimal
+
+
+def _to_decimal(value):
+    # Mirrors fields.Decimal._format_num without places/rounding.
+    return value if type(value) is _Decimal else _Decimal(str(value))
+
+
+def _to_text(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def _ymd(value):
+    # date.isoformat() equals strftime("%Y-%m-%d") except for years < 1000,
+    # which strftime does not zero-pad.
+    if type(value) is dt.date and value.year >= 1000:
+        return value.isoformat()
+    return value.strftime("%Y-%m-%d")
+
+
+def _expression(field, name, var, namespace):
+    """Python expression serializing ``var`` like ``field`` would, or ``None``."""
+    kind = type(field)
+
+    if kind in (fields.Raw, fields.Boolean):
+        return var
+
+    if kind is fields.Integer and not field.as_string:
+        return f"({var} if type({var}) is int else int({var}))"
+
+    if kind is fields.String:
+        return f"({var} if type({var}) is str else _to_text({var}))"
+
+    if kind is fields.Decimal:
+        if field.places is None and field.rounding is None:
+            if not field.as_string and not field.allow_nan:
+                return f"_to_decimal({var})"
+        # Quantizing (places/rounding) is left to the field itself.
+        namespace[f"_field_{name}"] = field
+        return f"_field_{name}._serialize({var}, None, None)"
+
+    if kind is fields.Date and field.format == "%Y-%m-%d":
+        return f"_ymd({var})"
+
+    if kind in (fields.Date, fields.DateTime) and field.format not in (
+        field.SERIALIZATION_FUNCS
+    ):
+        namespace[f"_format_{name}"] = field.format
+        return f"{var}.strftime(_format_{name})"
+
+    if kind is fields.Nested and isinstance(field.schema, CompiledSchema):
+        nested = field.schema._row_serializer()
+        if nested is None:
+            return None
+        namespace[f"_nested_{name}"] = nested
+        if field.schema.many or field.many:
+            return f"[_nested_{name}(item) for item in {var}]"
+        return f"_nested_{name}({var})"
+
+    return None
+
+
+def compile_schema(schema):
+    """Build the row serializer for ``schema``, or ``None`` if unsupported."""
+    if any(schema._hooks[tag] for tag in ("pre_dump", "post_dump")):
+        return None
+
+    namespace = {
+        "_to_decimal": _to_decimal,
+        "_to_text": _to_text,
+        "_ymd": _ymd,
+        "_fallback": lambda obj: ma.Schema._serialize(schema, obj),
+    }
+    reads, items = [], []
+    for i, (name, field) in enumerate(schema.dump_fields.items()):
+        attribute = field.attribute or name
+        if not attribute.isidentifier() or field.dump_default is not fields.missing_:
+            return None
+
+        var = f"v{i}"
+        expression = _expression(field, str(i), var, namespace)
+        if expression is None:
+            return None
+
+        key = field.data_key if field.data_key is not None else name
+        reads.append((var, attribute))
+        items.append(f"        {key!r}: None if {var} is None else {expression},")
+
+    # Loaded ORM attributes live in the instance __dict__; reading them there
+    # skips the descriptor machinery. Anything else (unloaded attributes,
+    # plain objects) goes through getattr, then through marshmallow.
+    source = "\n".join(
+        [
+            "def _slow(obj):",
+            "    try:",
+            *(f"        {var} = obj.{attribute}" for var, attribute in reads),
+            "    except AttributeError:",
+            "        return _fallback(obj)",
+            "    return {",
+            *items,
+            "    }",
+            "",
+            "def serialize(obj):",
+            "    try:",
+            "        d = obj.__dict__",
+            *(f"        {var} = d[{attribute!r}]" for var, attribute in reads),
+            "    except (AttributeError, KeyError):",
+            "        return _slow(obj)",
+            "    return {",
+            *items,
+            "    }",
+        ]
+    )
+    exec(compile(source, f"<serializer {type(schema).__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+class CompiledSchema(ma.Schema):
+    """``ma.Schema`` whose ``dump`` runs a generated per-row function."""
+
+    def _row_serializer(self):
+        try:
+            return self._compiled
+        except AttributeError:
+            self._compiled = compile_schema(self)
+            return self._compiled
+
+    @request_metrics.timed_serialization
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else bool(many)
+        serializer = self._row_serializer()
+        if serializer is None or obj is None:
+            return super().dump(obj, many=many)
+
+        if not many:
+            if hasattr(obj, "__getitem__"):
+                return super().dump(obj, many=False)
+            return serializer(obj)
+
+        rows = obj if isinstance(obj, (list, tuple)) else list(obj)
+        if rows and hasattr(rows[0], "__getitem__"):
+            return super().dump(rows, many=True)
+        return [serializer(row) for row in rows]
@@ -1,3 +1,8 @@
+from .async_customer_service import AsyncCustomerService
+from .async_order_service import AsyncOrderService
+from .async_product_service import AsyncProductService
+from .async_summary_service import AsyncSummaryService
 from .customer_service import CustomerService
 from .order_service import OrderService
 from .product_service import ProductService
+from .summary_service import SummaryService
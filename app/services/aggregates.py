@@ -0,0 +1,23 @@
+"""SQL expressions shared by the aggregation queries."""
+
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from ..models import OrderDetail
+
+CENT = Decimal("0.01")
+
+
+def line_total():
+    """``UnitPrice * Quantity * (1 - Discount)`` of an order line."""
+    return (
+        OrderDetail.UnitPrice
+        * OrderDetail.Quantity
+        * (1 - func.coalesce(OrderDetail.Discount, 0))
+    )
+
+
+def money(value):
+    """Round an aggregated amount to cents (SQLite sums in floating point)."""
+    return Decimal(str(value or 0)).quantize(CENT)
@@ -0,0 +1,102 @@
+from ..fieldsets import column_options
+from ..models import Customer, CustomerMonthlySales
+from ..pagination import keyset_scalars
+from ..search import customer_search
+from ..versioning import touch
+from .customer_service import (
+    CustomerService,
+    customer_revenue,
+    in_request_order,
+    search_customers,
+)
+from sqlalchemy import delete, select
+
+
+def _after_write(session, keys, *tables):
+    customer_search.sync(keys, session=session)
+    touch("Customers", *tables, session=session)
+
+
+class AsyncCustomerService:
+    """:class:`CustomerService` reads and writes on an ``AsyncSession``.
+
+    Writes keep the search index and table versions current in their
+    transaction just as the synchronous service does, so the Flask app's
+    caches see them. Reads shared with that service run through
+    ``run_sync``, which still suspends the task on every query.
+    """
+
+    PAGE_KEYS = CustomerService.PAGE_KEYS
+    FILTERS = CustomerService.FILTERS
+    SORTS = CustomerService.SORTS
+
+    @staticmethod
+    async def get_all(
+        session, limit=None, after=None, fields=None, where=(), sort=None
+    ):
+        keys, descending = sort or (AsyncCustomerService.PAGE_KEYS, False)
+        stmt = select(Customer).options(*column_options(Customer, fields, keys))
+        stmt = stmt.where(*where)
+        return await keyset_scalars(session, stmt, keys, limit, after, descending)
+
+    @staticmethod
+    async def get_by_id(session, customer_id, fields=None):
+        return await session.get(
+            Customer, customer_id, options=column_options(Customer, fields)
+        )
+
+    @staticmethod
+    async def get_many(session, customer_ids, fields=None):
+        stmt = (
+            select(Customer)
+            .options(*column_options(Customer, fields))
+            .where(Customer.CustomerID.in_(customer_ids))
+        )
+        found = {c.CustomerID: c for c in await session.scalars(stmt)}
+        return in_request_order(customer_ids, found)
+
+    @staticmethod
+    async def search(session, words, limit, fields=None):
+        return await session.run_sync(search_customers, words, limit, fields)
+
+    @staticmethod
+    async def get_revenue(session, customer_id, date_from=None, date_to=None):
+        return await session.run_sync(customer_revenue, customer_id, date_from, date_to)
+
+    @staticmethod
+    async def create(session, data):
+        new_customer = Customer(**data)
+        session.add(new_customer)
+        await session.run_sync(_after_write, [new_customer.CustomerID])
+        await session.commit()
+        return new_customer
+
+    @staticmethod
+    async def update(session, customer_id, data):
+        customer = await session.get(Customer, customer_id)
+        if not customer:
+            return None
+
+        for key, value in data.items():
+            setattr(customer, key, value)
+
+        await session.run_sync(_after_write, {customer_id, customer.CustomerID})
+        await session.commit()
+        return customer
+
+    @staticmethod
+    async def delete(session, customer_id):
+        customer = await session.get(Customer, customer_id)
+        if not customer:
+            return False
+
+        await session.delete(customer)
+        # Deleting a customer detaches its orders (CustomerID is nulled).
+        await session.execute(
+            delete(CustomerMonthlySales).where(
+                CustomerMonthlySales.CustomerID == customer_id
+            )
+        )
+        await session.run_sync(_after_write, [customer_id], "Orders")
+        await session.commit()
+        return True
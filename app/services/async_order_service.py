@@ -0,0 +1,104 @@
+from ..models import Order
+from ..pagination import keyset_scalars
+from ..versioning import touch
+from .order_service import (
+    OrderService,
+    change_order,
+    customer_history,
+    new_order,
+    order_total,
+    read_query,
+)
+from .summary_service import SalesDelta
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+
+def _after_write(session, delta):
+    delta.apply(session=session)
+    touch("Orders", session=session)
+
+
+class AsyncOrderService:
+    """:class:`OrderService` reads and writes on an ``AsyncSession``.
+
+    Lazy loads cannot run on an ``AsyncSession``, so every order that is
+    serialized or counted into the summaries has its lines loaded up front.
+    Reads shared with :class:`OrderService` run through ``run_sync``.
+    """
+
+    PAGE_KEYS = OrderService.PAGE_KEYS
+    FILTERS = OrderService.FILTERS
+    SORTS = OrderService.SORTS
+
+    @staticmethod
+    async def get_all(
+        session, limit=None, after=None, fields=None, where=(), sort=None
+    ):
+        keys, descending = sort or (AsyncOrderService.PAGE_KEYS, False)
+        stmt = read_query(fields, keys, select(Order)).where(*where)
+        return await keyset_scalars(session, stmt, keys, limit, after, descending)
+
+    @staticmethod
+    async def get_by_id(session, order_id, fields=None):
+        stmt = read_query(fields, query=select(Order)).where(Order.OrderID == order_id)
+        # Refresh an order written earlier in the session with its products.
+        stmt = stmt.execution_options(populate_existing=True)
+        return await session.scalar(stmt)
+
+    @staticmethod
+    async def get_total(session, order_id):
+        return await session.run_sync(order_total, order_id)
+
+    @staticmethod
+    async def get_customer_history(
+        session,
+        customer_id,
+        limit=None,
+        after=None,
+        date_from=None,
+        date_to=None,
+        fields=None,
+    ):
+        return await session.run_sync(
+            customer_history, customer_id, limit, after, date_from, date_to, fields
+        )
+
+    @staticmethod
+    async def _load(session, order_id):
+        return await session.get(Order, order_id, options=[selectinload(Order.details)])
+
+    @staticmethod
+    async def create(session, data):
+        order = new_order(data)
+        session.add(order)
+        await session.flush()
+        delta = SalesDelta()
+        delta.add_order(order)
+        await session.run_sync(_after_write, delta)
+        await session.commit()
+        return await AsyncOrderService.get_by_id(session, order.OrderID)
+
+    @staticmethod
+    async def update(session, order_id, data):
+        order = await AsyncOrderService._load(session, order_id)
+        if not order:
+            return None
+
+        delta = change_order(order, data)
+        await session.run_sync(_after_write, delta)
+        await session.commit()
+        return await AsyncOrderService.get_by_id(session, order_id)
+
+    @staticmethod
+    async def delete(session, order_id):
+        order = await AsyncOrderService._load(session, order_id)
+        if not order:
+            return False
+
+        delta = SalesDelta()
+        delta.add_order(order, -1)
+        await session.delete(order)
+        await session.run_sync(_after_write, delta)
+        await session.commit()
+        return True
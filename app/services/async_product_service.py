@@ -0,0 +1,98 @@
+from ..fieldsets import column_options
+from ..models import Product
+from ..pagination import keyset_scalars
+from ..search import product_search
+from ..versioning import touch
+from .product_service import ProductService, product_sales, search_products
+from sqlalchemy import select
+
+
+def _after_write(session, keys):
+    product_search.sync(keys, session=session)
+    touch("Products", session=session)
+
+
+class AsyncProductService:
+    """:class:`ProductService` reads and writes on an ``AsyncSession``.
+
+    Writes bump the ``Products`` version, which also retires the Flask app's
+    product cache entries on their next validation. Reads shared with the
+    synchronous service run through ``run_sync``.
+    """
+
+    PAGE_KEYS = ProductService.PAGE_KEYS
+    FILTERS = ProductService.FILTERS
+    SORTS = ProductService.SORTS
+
+    @staticmethod
+    async def get_all(
+        session, limit=None, after=None, fields=None, where=(), sort=None
+    ):
+        keys, descending = sort or (AsyncProductService.PAGE_KEYS, False)
+        stmt = select(Product).options(*column_options(Product, fields, keys))
+        stmt = stmt.where(*where)
+        return await keyset_scalars(session, stmt, keys, limit, after, descending)
+
+    @staticmethod
+    async def get_by_id(session, product_id, fields=None):
+        return await session.get(
+            Product, product_id, options=column_options(Product, fields)
+        )
+
+    @staticmethod
+    async def get_many(session, product_ids, fields=None):
+        stmt = (
+            select(Product)
+            .options(*column_options(Product, fields))
+            .where(Product.ProductID.in_(product_ids))
+        )
+        found = {p.ProductID: p for p in await session.scalars(stmt)}
+        missing = [key for key in product_ids if key not in found]
+        return [found[key] for key in product_ids if key in found], missing
+
+    @staticmethod
+    async def search(session, words, limit, fields=None):
+        return await session.run_sync(search_products, words, limit, fields)
+
+    @staticmethod
+    async def get_sales(session, product_id):
+        return await session.run_sync(product_sales, product_id)
+
+    @staticmethod
+    async def create(session, data):
+        if "Discontinued" in data:
+            data["Discontinued"] = bool(data["Discontinued"])
+
+        new_product = Product(**data)
+        session.add(new_product)
+        await session.flush()
+        await session.run_sync(_after_write, [new_product.ProductID])
+        await session.commit()
+        return new_product
+
+    @staticmethod
+    async def update(session, product_id, data):
+        product = await session.get(Product, product_id)
+        if not product:
+            return None
+
+        for key, value in data.items():
+            if key == "Discontinued":
+                setattr(product, key, bool(value))
+            else:
+                setattr(product, key, value)
+
+        await session.run_sync(_after_write, {product_id, product.ProductID})
+        await session.commit()
+        return product
+
+    @staticmethod
+    async def delete(session, product_id):
+        product = await session.get(Product, product_id)
+        if not product:
+            return False
+
+        await session.delete(product)
+        await session.run_sync(_after_write, [product_id])
+        await session.commit()
+        return True
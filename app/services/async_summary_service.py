@@ -0,0 +1,20 @@
+from .summary_service import country_months, customer_months, product_months
+
+
+class AsyncSummaryService:
+    """:class:`SummaryService` reads on an ``AsyncSession``, run through
+    ``run_sync``."""
+
+    @staticmethod
+    async def get_product_months(session, product_id, month_from=None, month_to=None):
+        return await session.run_sync(product_months, product_id, month_from, month_to)
+
+    @staticmethod
+    async def get_customer_months(session, customer_id, month_from=None, month_to=None):
+        return await session.run_sync(
+            customer_months, customer_id, month_from, month_to
+        )
+
+    @staticmethod
+    async def get_country_months(session, country, month_from=None, month_to=None):
+        return await session.run_sync(country_months, country, month_from, month_to)
@@ -1,26 +1,76 @@
+from ..bulk import upsert_rows, upsert_totals, write_chunks
+from ..caching import customer_entities
 from ..database import db
-from ..models import Customer
+from ..models import Customer, CustomerMonthlySales, Order, OrderDetail
+from ..fieldsets import column_options
+from ..pagination import keyset_rows
+from ..replicas import replica_read
+from ..search import customer_search
+from ..versioning import touch
+from .aggregates import line_total, money
+from sqlalchemy import and_, delete, func, select
 
 
 class CustomerService:
+    PAGE_KEYS = (Customer.CustomerID,)
+    # Columns the list endpoint filters and sorts on (app.filters)
+    FILTERS = (Customer.Country,)
+    SORTS = (Customer.Country,)
+
+    @staticmethod
+    @replica_read
+    def get_all(limit=None, after=None, fields=None, where=(), sort=None):
+        keys, descending = sort or (CustomerService.PAGE_KEYS, False)
+        query = Customer.query.options(*column_options(Customer, fields, keys))
+        return keyset_rows(query.filter(*where), keys, limit, after, descending)
+
+    @staticmethod
+    @replica_read
+    def get_by_id(customer_id, fields=None):
+        return customer_entities.load(customer_id, column_options(Customer, fields))
+
+    @staticmethod
+    @replica_read
+    def get_many(customer_ids, fields=None):
+        """Customers with the given IDs in the order asked for, and the IDs
+        that do not exist.
+
+        IDs are matched case-insensitively, as MySQL's collation compares
+        them: ``alfki`` finds ``ALFKI`` and repeats of an ID in another case
+        are dropped.
+        """
+        found = customer_entities.load_many(
+            customer_ids, column_options(Customer, fields)
+        )
+        return in_request_order(customer_ids, found)
+
     @staticmethod
-    def get_all():
-        return Customer.query.all()
+    @replica_read
+    def search(words, limit, fields=None):
+        """Customers whose company name, contact name or city has every word
+        as a prefix, best match first."""
+        return search_customers(db.session, words, limit, fields)
 
     @staticmethod
-    def get_by_id(customer_id):
-        return Customer.query.get(customer_id)
+    def get_revenue(customer_id, date_from=None, date_to=None):
+        """Order count and line revenue of a customer, or ``None``.
+
+        ``date_from``/``date_to`` bound ``OrderDate`` (inclusive).
+        """
+        return customer_revenue(db.session, customer_id, date_from, date_to)
 
     @staticmethod
     def create(data):
         new_customer = Customer(**data)
         db.session.add(new_customer)
+        customer_search.sync([new_customer.CustomerID])
+        touch("Customers")
         db.session.commit()
         return new_customer
 
     @staticmethod
     def update(customer_id, data):
-        customer = Customer.query.get(customer_id)
+        customer = customer_entities.load(customer_id)
         if not customer:
             return None
 
@@ -28,15 +78,105 @@ class CustomerService:
         for key, value in data.items():
             setattr(customer, key, value)
 
+        customer_search.sync({customer_id, customer.CustomerID})
+        touch("Customers")
         db.session.commit()
         return customer
 
     @staticmethod
     def delete(customer_id):
-        customer = Customer.query.get(customer_id)
+        customer = customer_entities.load(customer_id)
         if not customer:
             return False
 
         db.session.delete(customer)
+        customer_search.sync([customer_id])
+        # Deleting a customer detaches its orders (CustomerID is nulled).
+        db.session.execute(
+            delete(CustomerMonthlySales).where(
+                CustomerMonthlySales.CustomerID == customer_id
+            )
+        )
+        touch("Customers", "Orders")
         db.session.commit()
         return True
+
+    @staticmethod
+    def upsert_bulk(rows, chunk_size):
+        """Upsert ``rows`` in chunks of ``chunk_size``, one transaction each.
+
+        Returns the inserted/updated/unchanged counts and, per failed chunk,
+        its offset, size and error.
+        """
+
+        def write(chunk):
+            counts = upsert_rows(Customer, chunk)
+            if counts["inserted"] or counts["updated"]:
+                customer_search.sync(row["CustomerID"] for row in chunk)
+                touch("Customers")
+            return counts
+
+        return upsert_totals(write_chunks(rows, chunk_size, write))
+
+
+def in_request_order(customer_ids, found):
+    """Customers of ``found`` (keyed by ID) in the order of ``customer_ids``,
+    and the IDs that are not found.
+
+    IDs are matched case-insensitively, as MySQL's collation compares them.
+    """
+    found = {key.casefold(): customer for key, customer in found.items()}
+    customers, missing, seen = [], [], set()
+    for key in customer_ids:
+        folded = key.casefold()
+        if folded in seen:
+            continue
+        seen.add(folded)
+        if folded in found:
+            customers.append(found[folded])
+        else:
+            missing.append(key)
+    return customers, missing
+
+
+def search_customers(session, words, limit, fields=None):
+    """:meth:`CustomerService.search` on ``session``."""
+    query = session.query(Customer).options(
+        *column_options(Customer, fields, CustomerService.PAGE_KEYS)
+    )
+    return customer_search.filter(query, words, session).limit(limit).all()
+
+
+def customer_revenue(session, customer_id, date_from=None, date_to=None):
+    """:meth:`CustomerService.get_revenue` on ``session``."""
+    matching = [Order.CustomerID == Customer.CustomerID]
+    if date_from is not None:
+        matching.append(Order.OrderDate >= date_from)
+    if date_to is not None:
+        matching.append(Order.OrderDate <= date_to)
+
+    stmt = (
+        select(
+            func.count(func.distinct(Order.OrderID)),
+            func.count(OrderDetail.ProductID),
+            func.sum(line_total()),
+        )
+        .select_from(Customer)
+        .outerjoin(Order, and_(*matching))
+        .outerjoin(OrderDetail, OrderDetail.OrderID == Order.OrderID)
+        .where(Customer.CustomerID == customer_id)
+        .group_by(Customer.CustomerID)
+    )
+    row = session.execute(stmt).first()
+    if row is None:
+        return None
+
+    orders, lines, revenue = row
+    return {
+        "CustomerID": customer_id,
+        "From": date_from.isoformat() if date_from else None,
+        "To": date_to.isoformat() if date_to else None,
+        "Orders": orders,
+        "Lines": lines,
+        "Revenue": money(revenue),
+    }
@@ -1,30 +1,194 @@
+from ..bulk import write_chunks
 from ..database import db
-from ..models import Order, OrderDetail, orders_schema, Customer
-from sqlalchemy import desc
+from ..fieldsets import column_options
+from ..models import Order, OrderDetail, Product, Customer
+from ..pagination import keyset_filter, keyset_rows, next_section
+from ..replicas import replica_read
+from ..versioning import touch
+from .aggregates import line_total, money
+from .summary_service import SUMMARY_COLUMNS, SalesDelta
+from sqlalchemy import and_, func, insert, select, text
+from sqlalchemy.orm import selectinload
+
+
+def with_details(query):
+    """Eager-load order lines and their products with one batched IN query each."""
+    return query.options(
+        selectinload(Order.details)
+        .selectinload(OrderDetail.product)
+        .load_only(Product.ProductID, Product.ProductName)
+    )
+
+
+def read_query(fields=None, required=(), query=None):
+    """Order query loading only what ``fields`` needs.
+
+    Order lines and products are loaded only when ``details`` is requested.
+    ``query`` is the base query, ``Order.query`` by default; pass
+    ``select(Order)`` for an ``AsyncSession``.
+    """
+    if query is None:
+        query = Order.query
+    query = query.options(*column_options(Order, fields, required))
+    if fields is None or "details" in fields:
+        query = with_details(query)
+    return query
+
+
+def new_order(data):
+    """Unsaved ``Order`` with its lines from ``OrderSchema`` data."""
+    details_data = data.pop("details", [])
+
+    order = Order(**data)
+
+    for detail in details_data:
+        order.details.append(OrderDetail(**detail))
+    return order
+
+
+def change_order(order, data):
+    """Apply ``OrderSchema`` data to ``order`` and return the summary changes.
+
+    Lines are not editable through an update. The order moves between
+    summary rows only if its keys change, which loads its lines.
+    """
+    data.pop("details", None)
+
+    delta = SalesDelta()
+    moved = any(
+        key in data and data[key] != getattr(order, key) for key in SUMMARY_COLUMNS
+    )
+    if moved:
+        delta.add_order(order, -1)
+
+    # Simple attribute update loop
+    for key, value in data.items():
+        setattr(order, key, value)
+
+    if moved:
+        delta.add_order(order)
+    return delta
+
+
+DETAIL_COLUMNS = [column.key for column in OrderDetail.__table__.columns]
+
+
+# Connection.info key: auto_increment_increment of a MySQL connection whose
+# multi-row INSERTs get consecutive ids, else None.
+AUTOINC_STEP = "orders.autoinc_step"
+
+
+def _autoinc_step(session):
+    """Id step of one multi-row INSERT, or ``None`` if its ids may have gaps.
+
+    InnoDB reserves consecutive auto-increment values for a multi-row INSERT
+    only with ``innodb_autoinc_lock_mode`` 0 or 1; the default of 2 since
+    MySQL 8.0 (interleaved) gives no such guarantee, so set it to 1 on
+    servers that take bulk order imports. Read once per connection.
+    """
+    info = session.connection().info
+    if AUTOINC_STEP not in info:
+        mode, step = session.execute(
+            text("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+        ).one()
+        info[AUTOINC_STEP] = step if mode in (0, 1) else None
+    return info[AUTOINC_STEP]
+
+
+def insert_headers(rows):
+    """Insert order header rows and return their OrderIDs in input order.
+
+    Dialects with ordered multi-row RETURNING (SQLite) get a single batched
+    INSERT. On MySQL the headers go out as one multi-row INSERT and the ids
+    are counted on from ``LAST_INSERT_ID()``, the id of its first row, when
+    the server hands them out consecutively (see :func:`_autoinc_step`).
+    Otherwise, or when rows carry their own OrderID, each header is inserted
+    with a statement of its own inside the caller's transaction.
+    """
+    table = Order.__table__
+    columns = [column.key for column in table.columns]
+    rows = [{key: row.get(key) for key in columns} for row in rows]
+
+    session = db.session
+    dialect = session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(table).returning(table.c.OrderID, sort_by_parameter_order=True)
+        return session.execute(stmt, rows).scalars().all()
+
+    generated = all(row["OrderID"] is None for row in rows)
+    step = generated and dialect.name == "mysql" and _autoinc_step(session)
+    if step:
+        session.execute(insert(table).values(rows))
+        first = session.execute(select(func.last_insert_id())).scalar_one()
+        return list(range(first, first + len(rows) * step, step))
+
+    return [session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
 
 
 class OrderService:
+    PAGE_KEYS = (Order.OrderDate, Order.OrderID)
+    # Columns the list endpoint filters and sorts on (app.filters)
+    FILTERS = (Order.CustomerID, Order.OrderDate, Order.ShippedDate)
+    SORTS = (Order.OrderDate, Order.ShippedDate, Order.CustomerID)
+
     @staticmethod
-    def get_all():
-        return Order.query.all()
+    @replica_read
+    def get_all(limit=None, after=None, fields=None, where=(), sort=None):
+        keys, descending = sort or (OrderService.PAGE_KEYS, False)
+        query = read_query(fields, keys).filter(*where)
+        return keyset_rows(query, keys, limit, after, descending)
 
     @staticmethod
-    def get_by_id(order_id):
-        return Order.query.filter_by(OrderID=order_id).first()
+    @replica_read
+    def get_by_id(order_id, fields=None):
+        return read_query(fields).filter_by(OrderID=order_id).first()
 
     @staticmethod
     def create(data):
-        details_data = data.pop("details", [])
+        order = new_order(data)
+        db.session.add(order)
+        db.session.flush()
+        order_id = order.OrderID
+        delta = SalesDelta()
+        delta.add_order(order)
+        delta.apply()
+        touch("Orders")
+        db.session.commit()
+        # Reload with the lines and products batched instead of lazy-loading
+        # one product per line while the response is serialized.
+        return OrderService.get_by_id(order_id)
+
+    @staticmethod
+    def create_bulk(orders, chunk_size):
+        """Insert ``orders`` in chunks of ``chunk_size``, one transaction each.
 
-        new_order = Order(**data)
+        Returns one ``{"OrderID": ...}`` or ``{"error": ...}`` per input
+        order; a failing chunk is rolled back and reported as a whole.
+        """
 
-        for detail in details_data:
-            new_detail = OrderDetail(**detail)
-            new_order.details.append(new_detail)
+        def write(chunk):
+            order_ids = insert_headers(chunk)
+            lines = [
+                {key: detail.get(key) for key in DETAIL_COLUMNS} | {"OrderID": order_id}
+                for order_id, order in zip(order_ids, chunk)
+                for detail in order.get("details", [])
+            ]
+            if lines:
+                db.session.execute(insert(OrderDetail.__table__), lines)
+            delta = SalesDelta()
+            for order in chunk:
+                delta.add_mapping(order)
+            delta.apply()
+            touch("Orders")
+            return order_ids
 
-        db.session.add(new_order)
-        db.session.commit()
-        return new_order
+        results = []
+        for _, chunk, order_ids, error in write_chunks(orders, chunk_size, write):
+            if error is not None:
+                results.extend({"error": error} for _ in chunk)
+            else:
+                results.extend({"OrderID": order_id} for order_id in order_ids)
+        return results
 
     @staticmethod
     def update(order_id, data):
@@ -32,14 +196,10 @@ class OrderService:
         if not order:
             return None
 
-        data.pop("details", None)
-
-        # Simple attribute update loop
-        for key, value in data.items():
-            setattr(order, key, value)
-
+        change_order(order, data).apply()
+        touch("Orders")
         db.session.commit()
-        return order
+        return OrderService.get_by_id(order_id)
 
     @staticmethod
     def delete(order_id):
@@ -47,19 +207,113 @@ class OrderService:
         if not order:
             return False
 
+        delta = SalesDelta()
+        delta.add_order(order, -1)
+        delta.apply()
         db.session.delete(order)
+        touch("Orders")
         db.session.commit()
         return True
 
     @staticmethod
-    def get_customer_history(customer_id):
-        if not Customer.query.get(customer_id):
-            return None
+    def get_total(order_id):
+        """Line subtotal, freight and total of an order, or ``None``."""
+        return order_total(db.session, order_id)
+
+    @staticmethod
+    @replica_read
+    def get_customer_history(
+        customer_id, limit=None, after=None, date_from=None, date_to=None, fields=None
+    ):
+        """Orders of a customer, newest first, or ``None`` if it does not exist.
+
+        A single statement outer-joins the customer row to its orders, so a
+        customer without matching orders still yields one (order-less) row.
+        The orders are read through the (CustomerID, OrderDate) index; a page
+        after a dated cursor that runs out of dated orders is completed with
+        the undated ones by a second range scan.
+        """
+        return customer_history(
+            db.session, customer_id, limit, after, date_from, date_to, fields
+        )
+
+
+def order_total(session, order_id):
+    """:meth:`OrderService.get_total` on ``session``."""
+    stmt = (
+        select(
+            Order.Freight,
+            func.count(OrderDetail.ProductID),
+            func.sum(line_total()),
+        )
+        .outerjoin(OrderDetail, OrderDetail.OrderID == Order.OrderID)
+        .where(Order.OrderID == order_id)
+        .group_by(Order.OrderID, Order.Freight)
+    )
+    row = session.execute(stmt).first()
+    if row is None:
+        return None
 
-        history = (
-            Order.query.filter_by(CustomerID=customer_id)
-            .order_by(desc(Order.OrderDate))
-            .all()
+    freight, lines, subtotal = row
+    return {
+        "OrderID": order_id,
+        "Lines": lines,
+        "Subtotal": money(subtotal),
+        "Freight": money(freight),
+        "Total": money(subtotal) + money(freight),
+    }
+
+
+def customer_history(
+    session,
+    customer_id,
+    limit=None,
+    after=None,
+    date_from=None,
+    date_to=None,
+    fields=None,
+):
+    """:meth:`OrderService.get_customer_history` on ``session``."""
+    keys = OrderService.PAGE_KEYS
+    matching = [Order.CustomerID == Customer.CustomerID]
+    if date_from is not None:
+        matching.append(Order.OrderDate >= date_from)
+    if date_to is not None:
+        matching.append(Order.OrderDate <= date_to)
+
+    def read(condition, limit):
+        query = (
+            session.query(Customer.CustomerID, Order)
+            .select_from(Customer)
+            .outerjoin(Order, and_(*matching, *condition))
+            .filter(Customer.CustomerID == customer_id)
+            .options(*column_options(Order, fields, keys))
+            .order_by(*(key.desc() for key in keys))
         )
+        if fields is None or "details" in fields:
+            query = with_details(query)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    if after is None:
+        return _orders(read((), limit))
+
+    rows = read([keyset_filter(keys, after, descending=True)], limit)
+    orders = _orders(rows)
+    # A date range already leaves the undated orders out.
+    tail = None
+    if date_from is None and date_to is None:
+        tail = next_section(keys, after, descending=True)
+    full = orders is None or (limit is not None and len(orders) >= limit)
+    if tail is not None and not full:
+        remaining = None if limit is None else limit - len(orders)
+        orders += _orders(read([tail], remaining))
+    return orders
+
 
-        return orders_schema.dump(history)
+def _orders(rows):
+    # Orders of the customer-to-order outer join; None if no customer row.
+    if not rows:
+        return None
+    return [order for _, order in rows if order is not None]
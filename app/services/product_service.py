@@ -1,15 +1,59 @@
+from ..caching import product_cache, product_entities
+from ..bulk import upsert_rows, upsert_totals, write_chunks
 from ..database import db
-from ..models import Product
+from ..models import OrderDetail, Product
+from ..fieldsets import column_options
+from ..pagination import keyset_rows
+from ..replicas import replica_read
+from ..search import product_search
+from ..versioning import touch
+from .aggregates import line_total, money
+from sqlalchemy import func, select
 
 
 class ProductService:
+    PAGE_KEYS = (Product.ProductID,)
+    # Columns the list endpoint filters and sorts on (app.filters)
+    FILTERS = (
+        Product.CategoryID,
+        Product.SupplierID,
+        Product.Discontinued,
+        Product.UnitPrice,
+        Product.UnitsInStock,
+    )
+    SORTS = (Product.ProductName, Product.UnitPrice, Product.UnitsInStock)
+
+    @staticmethod
+    @replica_read
+    def get_all(limit=None, after=None, fields=None, where=(), sort=None):
+        keys, descending = sort or (ProductService.PAGE_KEYS, False)
+        query = Product.query.options(*column_options(Product, fields, keys))
+        return keyset_rows(query.filter(*where), keys, limit, after, descending)
+
+    @staticmethod
+    @replica_read
+    def get_by_id(product_id, fields=None):
+        return product_entities.load(product_id, column_options(Product, fields))
+
     @staticmethod
-    def get_all():
-        return Product.query.all()
+    @replica_read
+    def get_many(product_ids, fields=None):
+        """Products with the given IDs in the order asked for, and the IDs
+        that do not exist."""
+        found = product_entities.load_many(product_ids, column_options(Product, fields))
+        missing = [key for key in product_ids if key not in found]
+        return [found[key] for key in product_ids if key in found], missing
 
     @staticmethod
-    def get_by_id(product_id):
-        return Product.query.get(product_id)
+    @replica_read
+    def search(words, limit, fields=None):
+        """Products whose name has every word as a prefix, best match first."""
+        return search_products(db.session, words, limit, fields)
+
+    @staticmethod
+    def get_sales(product_id):
+        """Order lines, units sold and line revenue of a product, or ``None``."""
+        return product_sales(db.session, product_id)
 
     @staticmethod
     def create(data):
@@ -18,12 +62,16 @@ class ProductService:
 
         new_product = Product(**data)
         db.session.add(new_product)
+        db.session.flush()
+        product_search.sync([new_product.ProductID])
+        touch("Products")
         db.session.commit()
+        product_cache.invalidate()
         return new_product
 
     @staticmethod
     def update(product_id, data):
-        product = Product.query.get(product_id)
+        product = product_entities.load(product_id)
         if not product:
             return None
 
@@ -34,15 +82,82 @@ class ProductService:
             else:
                 setattr(product, key, value)
 
+        product_search.sync({product_id, product.ProductID})
+        touch("Products")
         db.session.commit()
+        product_cache.invalidate()
         return product
 
     @staticmethod
     def delete(product_id):
-        product = Product.query.get(product_id)
+        product = product_entities.load(product_id)
         if not product:
             return False
 
         db.session.delete(product)
+        product_search.sync([product_id])
+        touch("Products")
         db.session.commit()
+        product_cache.invalidate()
         return True
+
+    @staticmethod
+    def upsert_bulk(rows, chunk_size):
+        """Upsert ``rows`` in chunks of ``chunk_size``, one transaction each.
+
+        Returns the inserted/updated/unchanged counts and, per failed chunk,
+        its offset, size and error.
+        """
+
+        def write(chunk):
+            keys = [
+                row["ProductID"] for row in chunk if row.get("ProductID") is not None
+            ]
+            if len(keys) < len(chunk):
+                # Rows without a key get one above the current maximum.
+                last_id = db.session.scalar(select(func.max(Product.ProductID)))
+            counts = upsert_rows(Product, chunk)
+            if counts["inserted"] or counts["updated"]:
+                product_search.sync(keys)
+                if len(keys) < len(chunk):
+                    product_search.add(Product.ProductID > (last_id or 0))
+                touch("Products")
+            return counts
+
+        totals = upsert_totals(write_chunks(rows, chunk_size, write))
+        product_cache.invalidate()
+        return totals
+
+
+def search_products(session, words, limit, fields=None):
+    """:meth:`ProductService.search` on ``session``."""
+    query = session.query(Product).options(
+        *column_options(Product, fields, ProductService.PAGE_KEYS)
+    )
+    return product_search.filter(query, words, session).limit(limit).all()
+
+
+def product_sales(session, product_id):
+    """:meth:`ProductService.get_sales` on ``session``."""
+    stmt = (
+        select(
+            func.count(OrderDetail.OrderID),
+            func.sum(OrderDetail.Quantity),
+            func.sum(line_total()),
+        )
+        .select_from(Product)
+        .outerjoin(OrderDetail, OrderDetail.ProductID == Product.ProductID)
+        .where(Product.ProductID == product_id)
+        .group_by(Product.ProductID)
+    )
+    row = session.execute(stmt).first()
+    if row is None:
+        return None
+
+    lines, units, revenue = row
+    return {
+        "ProductID": product_id,
+        "Lines": lines,
+        "Units": units or 0,
+        "Revenue": money(revenue),
+    }
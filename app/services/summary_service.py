@@ -0,0 +1,286 @@
+"""Monthly sales summaries per product, customer and ship country.
+
+The summary tables are maintained incrementally: every OrderService write
+collects the contribution of the orders it adds or removes in a
+:class:`SalesDelta` and applies it with one upsert per table in the same
+transaction. :func:`rebuild` recomputes them from the order lines (``flask
+rebuild-summaries``). Orders without an ``OrderDate`` are not summarized,
+nor are orders without a customer or ship country in those summaries.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import and_, delete, func, insert, select
+
+from ..database import db, upsert
+from ..models import (
+    CountryMonthlySales,
+    Customer,
+    CustomerMonthlySales,
+    Order,
+    OrderDetail,
+    Product,
+    ProductMonthlySales,
+)
+from .aggregates import line_total, money
+
+# Order columns that decide which summary rows an order counts towards.
+SUMMARY_COLUMNS = ("OrderDate", "CustomerID", "ShipCountry")
+
+
+def _decimal(value):
+    if value is None:
+        return Decimal(0)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class SalesDelta:
+    """Pending changes to the summary tables, keyed by summary row."""
+
+    def __init__(self):
+        # (ProductID, Month) -> [Lines, Units, Revenue]
+        self.products = defaultdict(lambda: [0, 0, Decimal(0)])
+        # (CustomerID or ShipCountry, Month) -> [Orders, Lines, Revenue]
+        self.customers = defaultdict(lambda: [0, 0, Decimal(0)])
+        self.countries = defaultdict(lambda: [0, 0, Decimal(0)])
+
+    def add(self, order_date, customer_id, country, lines, sign=1):
+        """Count one order; ``lines`` are ``(ProductID, UnitPrice, Quantity,
+        Discount)`` tuples. ``sign=-1`` removes it again."""
+        if order_date is None:
+            return
+        month = order_date.strftime("%Y-%m")
+
+        line_count, revenue = 0, Decimal(0)
+        for product_id, unit_price, quantity, discount in lines:
+            amount = _decimal(unit_price) * (quantity or 0) * (1 - _decimal(discount))
+            row = self.products[(product_id, month)]
+            row[0] += sign
+            row[1] += sign * (quantity or 0)
+            row[2] += sign * amount
+            line_count += 1
+            revenue += amount
+
+        for key, rows in ((customer_id, self.customers), (country, self.countries)):
+            if key is not None:
+                row = rows[(key, month)]
+                row[0] += sign
+                row[1] += sign * line_count
+                row[2] += sign * revenue
+
+    def add_order(self, order, sign=1):
+        """Count an ``Order`` instance (loads its lines if needed)."""
+        lines = [
+            (detail.ProductID, detail.UnitPrice, detail.Quantity, detail.Discount)
+            for detail in order.details
+        ]
+        self.add(order.OrderDate, order.CustomerID, order.ShipCountry, lines, sign)
+
+    def add_mapping(self, order, sign=1):
+        """Count an order given as a dict, as loaded by ``OrderSchema``."""
+        lines = [
+            (
+                detail.get("ProductID"),
+                detail.get("UnitPrice"),
+                detail.get("Quantity"),
+                detail.get("Discount"),
+            )
+            for detail in order.get("details", [])
+        ]
+        self.add(
+            order.get("OrderDate"),
+            order.get("CustomerID"),
+            order.get("ShipCountry"),
+            lines,
+            sign,
+        )
+
+    def apply(self, session=None):
+        """Add the pending changes to the summary tables, one upsert each, in
+        the transaction of ``session`` (default ``db.session``)."""
+        session = db.session if session is None else session
+        for model, key, counters, changes in (
+            (ProductMonthlySales, "ProductID", ("Lines", "Units"), self.products),
+            (CustomerMonthlySales, "CustomerID", ("Orders", "Lines"), self.customers),
+            (CountryMonthlySales, "ShipCountry", ("Orders", "Lines"), self.countries),
+        ):
+            columns = (*counters, "Revenue")
+            rows = [
+                {key: key_value, "Month": month, **dict(zip(columns, values))}
+                for (key_value, month), values in changes.items()
+                if any(values)
+            ]
+            if not rows:
+                continue
+            table = model.__table__
+            stmt = upsert(
+                table,
+                None,
+                lambda new: {
+                    name: table.c[name] + getattr(new, name) for name in columns
+                },
+                session,
+            )
+            session.execute(stmt, rows)
+
+
+def month_of(column, dialect):
+    """SQL expression for the ``YYYY-MM`` month of a date column."""
+    if dialect.name == "mysql":
+        return func.date_format(column, "%Y-%m")
+    return func.strftime("%Y-%m", column)
+
+
+def rebuild(connection):
+    """Recompute every summary table from the orders; returns row counts."""
+    month = month_of(Order.OrderDate, connection.dialect)
+    revenue = func.coalesce(func.sum(line_total()), 0)
+    order_lines = (
+        select()
+        .select_from(Order)
+        .outerjoin(OrderDetail, OrderDetail.OrderID == Order.OrderID)
+        .where(Order.OrderDate.is_not(None))
+    )
+    sources = {
+        ProductMonthlySales: select(
+            OrderDetail.ProductID,
+            month,
+            func.count(),
+            func.coalesce(func.sum(OrderDetail.Quantity), 0),
+            revenue,
+        )
+        .join(Order, Order.OrderID == OrderDetail.OrderID)
+        .where(Order.OrderDate.is_not(None))
+        .group_by(OrderDetail.ProductID, month),
+    }
+    for model, key in (
+        (CustomerMonthlySales, Order.CustomerID),
+        (CountryMonthlySales, Order.ShipCountry),
+    ):
+        sources[model] = (
+            order_lines.add_columns(
+                key,
+                month,
+                func.count(func.distinct(Order.OrderID)),
+                func.count(OrderDetail.ProductID),
+                revenue,
+            )
+            .where(key.is_not(None))
+            .group_by(key, month)
+        )
+
+    counts = {}
+    for model, source in sources.items():
+        table = model.__table__
+        connection.execute(delete(table))
+        columns = [column.key for column in table.columns]
+        result = connection.execute(insert(table).from_select(columns, source))
+        counts[table.name] = result.rowcount
+    return counts
+
+
+def _months(model, month_from, month_to):
+    conditions = []
+    if month_from is not None:
+        conditions.append(model.Month >= month_from)
+    if month_to is not None:
+        conditions.append(model.Month <= month_to)
+    return conditions
+
+
+class SummaryService:
+    @staticmethod
+    def get_product_months(product_id, month_from=None, month_to=None):
+        """Monthly lines, units and revenue of a product, oldest first, or
+        ``None`` if the product does not exist."""
+        return product_months(db.session, product_id, month_from, month_to)
+
+    @staticmethod
+    def get_customer_months(customer_id, month_from=None, month_to=None):
+        """Monthly orders, lines and revenue of a customer, oldest first, or
+        ``None`` if the customer does not exist."""
+        return customer_months(db.session, customer_id, month_from, month_to)
+
+    @staticmethod
+    def get_country_months(country, month_from=None, month_to=None):
+        """Monthly orders, lines and revenue shipped to ``country``."""
+        return country_months(db.session, country, month_from, month_to)
+
+
+def product_months(session, product_id, month_from=None, month_to=None):
+    """:meth:`SummaryService.get_product_months` on ``session``."""
+    summary = ProductMonthlySales
+    matching = [
+        summary.ProductID == Product.ProductID,
+        summary.Lines > 0,
+        *_months(summary, month_from, month_to),
+    ]
+    stmt = (
+        select(summary.Month, summary.Lines, summary.Units, summary.Revenue)
+        .select_from(Product)
+        .outerjoin(summary, and_(*matching))
+        .where(Product.ProductID == product_id)
+        .order_by(summary.Month)
+    )
+    rows = session.execute(stmt).all()
+    if not rows:
+        return None
+    return [
+        {"Month": month, "Lines": lines, "Units": units, "Revenue": money(revenue)}
+        for month, lines, units, revenue in rows
+        if month is not None
+    ]
+
+
+def customer_months(session, customer_id, month_from=None, month_to=None):
+    """:meth:`SummaryService.get_customer_months` on ``session``."""
+    summary = CustomerMonthlySales
+    matching = [
+        summary.CustomerID == Customer.CustomerID,
+        summary.Orders > 0,
+        *_months(summary, month_from, month_to),
+    ]
+    stmt = (
+        select(summary.Month, summary.Orders, summary.Lines, summary.Revenue)
+        .select_from(Customer)
+        .outerjoin(summary, and_(*matching))
+        .where(Customer.CustomerID == customer_id)
+        .order_by(summary.Month)
+    )
+    rows = session.execute(stmt).all()
+    if not rows:
+        return None
+    return [
+        {
+            "Month": month,
+            "Orders": orders,
+            "Lines": lines,
+            "Revenue": money(revenue),
+        }
+        for month, orders, lines, revenue in rows
+        if month is not None
+    ]
+
+
+def country_months(session, country, month_from=None, month_to=None):
+    """:meth:`SummaryService.get_country_months` on ``session``."""
+    summary = CountryMonthlySales
+    stmt = (
+        select(summary.Month, summary.Orders, summary.Lines, summary.Revenue)
+        .where(
+            summary.ShipCountry == country,
+            summary.Orders > 0,
+            *_months(summary, month_from, month_to),
+        )
+        .order_by(summary.Month)
+    )
+    return [
+        {
+            "Month": month,
+            "Orders": orders,
+            "Lines": lines,
+            "Revenue": money(revenue),
+        }
+        for month, orders, lines, revenue in session.execute(stmt)
+    ]
@@ -0,0 +1,58 @@
+"""Streaming responses for clients that need a whole table in one request.
+
+Rows are read in keyset batches of ``STREAM_BATCH_SIZE``, serialized batch by
+batch and written straight to the socket, so memory stays bounded by a single
+batch however large the table is.
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+from .pagination import row_key
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def stream_format():
+    """``"ndjson"``, ``"json"`` or ``None`` when the client wants a normal page."""
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    if best == NDJSON_MIMETYPE:
+        return "ndjson"
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return "json"
+    return None
+
+
+def iter_batches(fetch, keys, batch_size, **kwargs):
+    """Yield successive keyset batches of rows from ``fetch``."""
+    after = None
+    while True:
+        rows = fetch(limit=batch_size, after=after, **kwargs)
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = row_key(rows[-1], keys)
+
+
+def stream_response(fetch, keys, schema, fmt, **kwargs):
+    """Stream every row from ``fetch`` as NDJSON or as a chunked JSON array."""
+    batch_size = current_app.config["STREAM_BATCH_SIZE"]
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        for rows in iter_batches(fetch, keys, batch_size, **kwargs):
+            yield "".join(dumps(item) + "\n" for item in schema.dump(rows))
+
+    def generate_json():
+        separator = "["
+        for rows in iter_batches(fetch, keys, batch_size, **kwargs):
+            items = schema.dump(rows)
+            yield separator + ",".join(dumps(item) for item in items)
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    if fmt == "ndjson":
+        return Response(
+            stream_with_context(generate_ndjson()), mimetype=NDJSON_MIMETYPE
+        )
+    return Response(stream_with_context(generate_json()), mimetype="application/json")
@@ -0,0 +1,96 @@
+"""Per-table change counters backing ETags and cache invalidation.
+
+Every service write calls :func:`touch` inside its transaction, so the
+counters in ``TableVersions`` move exactly when the data does and any worker
+process can tell whether its view of a table is current with one small
+primary-key read. Writes made outside the services are not tracked.
+
+The versions :func:`table_state` reads are remembered for the rest of the
+transaction, per database they were read from, so :func:`table_version`
+answers the entity caches without a second query in the same request.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from .database import db, upsert
+from .models import TableVersion
+from .replicas import replica_read
+
+# Session.info key: {(table name, engine): version} read in the current
+# transaction.
+KNOWN = "versioning.known"
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def touch(*tables, session=None):
+    """Bump the change counter of ``tables`` in the current transaction of
+    ``session`` (default ``db.session``)."""
+    session = db.session if session is None else session
+    now = _now()
+    table = TableVersion.__table__
+    for name in tables:
+        stmt = upsert(
+            table,
+            {"TableName": name, "Version": 1, "UpdatedAt": now},
+            lambda new: {"Version": table.c.Version + 1, "UpdatedAt": new.UpdatedAt},
+            session,
+        )
+        session.execute(stmt)
+    session.info.pop(KNOWN, None)
+
+
+@replica_read
+def table_state(tables):
+    """``(versions, last_modified)`` of ``tables`` in a single query.
+
+    Tables that were never written through the services report version 0 and
+    contribute no modification time. Read from the same replica as the data
+    it validates, so the versions never run ahead of the response.
+    """
+    return _read_state(tables)
+
+
+def _read_state(tables):
+    rows = db.session.execute(
+        db.select(
+            TableVersion.TableName, TableVersion.Version, TableVersion.UpdatedAt
+        ).where(TableVersion.TableName.in_(tables))
+    ).all()
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+
+    versions = tuple(found.get(name, (0, None))[0] for name in tables)
+    stamps = [updated_at for _, updated_at in found.values()]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc) if stamps else None
+    known = db.session.info.setdefault(KNOWN, {})
+    bind = db.session.get_bind()
+    known.update(((name, bind), version) for name, version in zip(tables, versions))
+    return versions, last_modified
+
+
+def table_version(table):
+    """Version of ``table`` in the database this session reads from now.
+
+    Served from the versions :func:`table_state` read earlier in the
+    transaction when possible; not a :func:`replica_read` itself, so it
+    follows the routing of the caller.
+    """
+    known = db.session.info.get(KNOWN, {})
+    version = known.get((table, db.session.get_bind()))
+    if version is None:
+        (version,), _ = _read_state((table,))
+    return version
+
+
+def _forget(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(KNOWN, None)
+
+
+def init_app(app):
+    if not event.contains(db.session, "after_transaction_end", _forget):
+        event.listen(db.session, "after_transaction_end", _forget)
@@ -0,0 +1,12 @@
+"""ASGI entry point, e.g. ``uvicorn asgi:app --workers 4``.
+
+Serves the asynchronous customer, product, order and summary endpoints of
+:mod:`app.asgi` on the asyncio engine; ``run.py`` serves the full Flask
+app. Compare the two with ``python -m benchmarks.bench_concurrency``.
+"""
+
+import os
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app(os.environ.get("FLASK_CONFIG", "prod"))
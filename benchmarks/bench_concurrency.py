@@ -0,0 +1,276 @@
+"""Throughput of one server process as concurrent clients grow, under DB latency.
+
+    python -m benchmarks.bench_concurrency --scale 1 --latency 20 \\
+        --concurrency 1,16,64,256 --duration 5 [--servers wsgi,asgi] \\
+        [--threads 16 --pool-size 64 --max-overflow 0]
+
+Runs the production config against a copy of the dataset and adds
+``--latency`` milliseconds to every SQL statement, standing in for the
+network round trip to MySQL. For each ``--concurrency`` level that many
+client threads send a mix of primary-key reads for ``--duration`` seconds to
+each server in turn:
+
+``wsgi``
+    the Flask app on a Werkzeug server with ``--threads`` request threads,
+    as a gunicorn ``gthread`` worker runs it; the latency is a
+    ``time.sleep`` holding the request thread.
+``asgi``
+    the asyncio app (:mod:`app.asgi`) under uvicorn on one event loop; the
+    latency is an ``asyncio.sleep`` that suspends only the request's task.
+
+Both share the connection pool settings and run without the response and
+entity caches, so every read goes to the database; ``queries/req`` shows
+what each app sends per request (the Flask app also reads the table versions
+for its ETags) and ``in flight`` how many statements the process kept
+waiting on the database on average. The checkout wait column (WSGI only,
+from :func:`app.pool.pool_status`) shows requests queueing for a connection.
+
+A WSGI process keeps at most ``--threads`` requests in flight, however large
+its pool. The ASGI process needs no thread per request and is bounded by its
+pool and by the CPU of its event loop, which also parses, loads and
+serializes every request; giving the WSGI server as many threads as pooled
+connections closes the gap for as long as cores and stack memory allow.
+With SQLite, aiosqlite still runs each connection on a thread of its own;
+aiomysql needs none.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import threading
+import time
+
+import uvicorn
+from sqlalchemy import event
+from sqlalchemy.util import await_only
+
+from app.asgi import create_asgi_app
+from app.database import db
+from app.pool import pool_status
+from app.seed import customer_id, sizes
+
+from .bench_endpoints import (
+    ServerDriver,
+    ensure_dataset,
+    http_request,
+    make_app,
+    percentile,
+)
+
+SERVERS = ("wsgi", "asgi")
+
+
+class AsgiServerDriver:
+    name = "asgi"
+
+    def __init__(self, app):
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+        (socket,) = self.server.servers[0].sockets
+        self.port = socket.getsockname()[1]
+
+    def request(self, method, path, body=None):
+        return http_request(self.port, method, path, body)
+
+    def close(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def read_mix(size, rng):
+    """A random primary-key read: customer, product or order."""
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f"/customers/{customer_id(rng.randrange(size['customers']))}"
+    if kind == 1:
+        return f"/products/{rng.randint(1, size['products'])}"
+    return f"/orders/{rng.randint(1, size['orders'])}"
+
+
+def run_level(driver, size, clients, duration, random_seed):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        rng = random.Random(random_seed * 1000 + index)
+        mine, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, _ = driver.request("GET", read_mix(size, rng))
+            mine.append(time.perf_counter() - start)
+            failed += status >= 400
+        latencies.extend(mine)
+        errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def wsgi_server(app, latency, threads):
+    """Driver and sync engine of the Flask app, statements delayed by
+    ``latency`` seconds on the request thread."""
+    with app.app_context():
+        engine = db.engine
+
+    def delay(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency)
+
+    event.listen(engine, "before_cursor_execute", delay)
+    return ServerDriver(app, threads), engine
+
+
+def asgi_server(config_name, latency):
+    """Driver and sync facade of the async engine of the ASGI app,
+    statements delayed by ``latency`` seconds on the event loop."""
+    app = create_asgi_app(config_name)
+    engine = app.state.engine.sync_engine
+
+    def delay(conn, cursor, statement, parameters, context, executemany):
+        # Runs in the greenlet of the awaiting task: suspend, don't block.
+        await_only(asyncio.sleep(latency))
+
+    event.listen(engine, "before_cursor_execute", delay)
+    return AsgiServerDriver(app), engine
+
+
+def run_server(server, driver, engine, size, args):
+    """One result per ``--concurrency`` level against ``driver``."""
+    statements = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    levels = []
+    for clients in (int(n) for n in args.concurrency.split(",")):
+        before = statements[0]
+        if server == "wsgi":
+            waits_before = pool_status(engine)["wait_seconds_total"]
+        result = {"server": server}
+        result.update(run_level(driver, size, clients, args.duration, args.seed))
+        result["queries_per_request"] = (statements[0] - before) / max(
+            result["requests"], 1
+        )
+        # Little's law: statements waiting on the database at any moment.
+        result["queries_in_flight"] = (
+            result["throughput_rps"]
+            * result["queries_per_request"]
+            * args.latency
+            / 1000
+        )
+        wait = ""
+        if server == "wsgi":
+            status = pool_status(engine)
+            result["checkout_wait_s"] = status["wait_seconds_total"] - waits_before
+            result["checkout_wait_max_ms"] = status["wait_seconds_max"] * 1000
+            wait = f"  checkout wait {result['checkout_wait_s']:7.2f} s"
+        levels.append(result)
+        print(
+            f"{server} {clients:4} clients {result['throughput_rps']:8.1f} req/s"
+            f"  p50 {result['p50_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms"
+            f"  queries/req {result['queries_per_request']:4.1f}"
+            f"  in flight {result['queries_in_flight']:5.1f}"
+            f"{wait}  errors {result['errors']}"
+        )
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="dataset file (default bench-<scale>.db)")
+    parser.add_argument("--latency", type=float, default=20, help="ms per query")
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--duration", type=float, default=5, help="s per level")
+    parser.add_argument("--servers", default=",".join(SERVERS))
+    parser.add_argument("--threads", type=int, default=16, help="WSGI threads")
+    parser.add_argument("--pool-size", type=int, default=64)
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--output", default="bench-concurrency.json")
+    args = parser.parse_args()
+
+    servers = args.servers.split(",")
+    unknown = sorted(set(servers) - set(SERVERS))
+    if unknown:
+        parser.error(f"unknown servers: {', '.join(unknown)}")
+
+    path = args.db or f"bench-{args.scale}.db"
+    ensure_dataset(path, args.scale, args.seed)
+    size = sizes(args.scale)
+
+    scratch = f"{path}.run"
+    shutil.copyfile(path, scratch)
+    app = make_app(
+        scratch,
+        False,
+        ENTITY_CACHE_ENABLED=False,
+        DB_POOL_SIZE=args.pool_size,
+        DB_MAX_OVERFLOW=args.max_overflow,
+        DB_POOL_TIMEOUT=60,
+    )
+    latency = args.latency / 1000
+    levels = []
+    try:
+        for server in servers:
+            if server == "wsgi":
+                driver, engine = wsgi_server(app, latency, args.threads)
+            else:
+                driver, engine = asgi_server("bench", latency)
+            try:
+                levels.extend(run_server(server, driver, engine, size, args))
+            finally:
+                # Stopping uvicorn disposes of the async engine itself.
+                driver.close()
+                if server == "wsgi":
+                    engine.dispose()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(scratch + suffix):
+                os.remove(scratch + suffix)
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "latency_ms": args.latency,
+            "duration_s": args.duration,
+            "servers": servers,
+            "wsgi_threads": args.threads,
+            "pool_size": args.pool_size,
+            "max_overflow": args.max_overflow,
+        },
+        "levels": levels,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Drive every API route against a scale-factor dataset and record latencies.
+
+    python -m benchmarks.bench_endpoints --scale 10 --requests 200 \\
+        --output results.json [--server]
+
+Seeds a SQLite database (see :mod:`app.seed`) unless ``--db`` already
+exists, copies it so write routes never change it, runs the app with the
+production config against it and sends ``--requests`` requests to each
+route, through the Flask test client or, with ``--server``, over HTTP to a
+local Werkzeug server. Throughput, p50/p95/p99 latency and peak RSS are
+printed and written to ``--output``; compare two result files with
+:mod:`benchmarks.compare`.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler, make_server
+
+from app import create_app
+from app.config import ProductionConfig, config_by_name
+from app.database import db
+from app.seed import customer_id, seed, sizes
+
+WARMUP = 5
+
+
+class TestClientDriver:
+    name = "test_client"
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server handling requests on a fixed number of threads, as a
+    gunicorn ``gthread`` worker does; further connections wait their turn."""
+
+    def __init__(self, host, port, app, threads, **kwargs):
+        super().__init__(host, port, app, **kwargs)
+        self.executor = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        # socketserver.ThreadingMixIn.process_request_thread
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self.executor.shutdown()
+        super().server_close()
+
+
+def http_request(port, method, path, body=None):
+    """``(status, body)`` of one request on a new connection to ``port``."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {}
+    if body is not None:
+        body = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+class ServerDriver:
+    name = "server"
+
+    def __init__(self, app, threads=None):
+        """Serve ``app`` on a thread per request, or on ``threads`` threads."""
+        if threads is None:
+            self.server = make_server(
+                "127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler
+            )
+        else:
+            self.server = PooledWSGIServer(
+                "127.0.0.1", 0, app, threads, handler=_QuietHandler
+            )
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, body=None):
+        return http_request(self.server.port, method, path, body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def routes(size, rng):
+    """``(name, method, make_request)`` for every route.
+
+    ``make_request(i, state)`` returns ``(path, body)``; writes use rows the
+    benchmark created itself so the dataset is left in a usable state.
+    """
+    customers, products, orders = size["customers"], size["products"], size["orders"]
+
+    def customer():
+        return customer_id(rng.randrange(customers))
+
+    def new_customer(i):
+        return customer_id(customers + i)
+
+    def order_body():
+        lines = rng.sample(range(1, products + 1), 5)
+        return {
+            "CustomerID": customer(),
+            "OrderDate": "1998-05-06",
+            "details": [
+                {"ProductID": p, "UnitPrice": 10, "Quantity": 1, "Discount": 0}
+                for p in lines
+            ],
+        }
+
+    bulk = 100
+    return [
+        ("customer.get_customers", "GET", lambda i, s: ("/customers", None)),
+        (
+            "customer.get_customer",
+            "GET",
+            lambda i, s: (f"/customers/{customer()}", None),
+        ),
+        (
+            "customer.search_customers",
+            "GET",
+            lambda i, s: (
+                f"/customers/search?q=company+{rng.randrange(customers)}",
+                None,
+            ),
+        ),
+        (
+            "customer.get_customer_revenue",
+            "GET",
+            lambda i, s: (f"/customers/{customer()}/revenue?from=1999-01-01", None),
+        ),
+        (
+            "customer.add_customer",
+            "POST",
+            lambda i, s: (
+                "/customers",
+                {"CustomerID": new_customer(i), "CompanyName": f"Bench {i}"},
+            ),
+        ),
+        (
+            "customer.update_customer",
+            "PUT",
+            lambda i, s: (f"/customers/{new_customer(i)}", {"City": "Reims"}),
+        ),
+        (
+            "customer.upsert_customers_bulk",
+            "PUT",
+            lambda i, s: (
+                "/customers/bulk",
+                [{"CustomerID": customer(), "City": f"City {i}"} for _ in range(bulk)],
+            ),
+        ),
+        (
+            "customer.delete_customer",
+            "DELETE",
+            lambda i, s: (f"/customers/{new_customer(i)}", None),
+        ),
+        ("product.get_products", "GET", lambda i, s: ("/products", None)),
+        (
+            "product.get_product",
+            "GET",
+            lambda i, s: (f"/products/{rng.randint(1, products)}", None),
+        ),
+        (
+            "product.search_products",
+            "GET",
+            lambda i, s: (
+                f"/products/search?q=product+{rng.randint(1, products)}",
+                None,
+            ),
+        ),
+        (
+            "product.get_product_sales",
+            "GET",
+            lambda i, s: (f"/products/{rng.randint(1, products)}/sales", None),
+        ),
+        (
+            "product.add_product",
+            "POST",
+            lambda i, s: ("/products", {"ProductName": f"Bench {i}", "UnitPrice": 1}),
+        ),
+        (
+            "product.update_product",
+            "PUT",
+            lambda i, s: (f"/products/{s['product.add_product'][i]}", {"UnitPrice": 2}),
+        ),
+        (
+            "product.upsert_products_bulk",
+            "PUT",
+            lambda i, s: (
+                "/products/bulk",
+                [
+                    {"ProductID": rng.randint(1, products), "UnitsInStock": i % 100}
+                    for _ in range(bulk)
+                ],
+            ),
+        ),
+        (
+            "product.delete_product",
+            "DELETE",
+            lambda i, s: (f"/products/{s['product.add_product'][i]}", None),
+        ),
+        ("order.get_orders", "GET", lambda i, s: ("/orders", None)),
+        (
+            "order.get_order",
+            "GET",
+            lambda i, s: (f"/orders/{rng.randint(1, orders)}", None),
+        ),
+        (
+            "order.get_order_total",
+            "GET",
+            lambda i, s: (f"/orders/{rng.randint(1, orders)}/total", None),
+        ),
+        (
+            "order.get_customer_history",
+            "GET",
+            lambda i, s: (f"/orders/history/{customer()}", None),
+        ),
+        ("order.add_order", "POST", lambda i, s: ("/orders", order_body())),
+        (
+            "order.update_order",
+            "PUT",
+            lambda i, s: (f"/orders/{s['order.add_order'][i]}", {"Freight": 1}),
+        ),
+        (
+            "order.add_orders_bulk",
+            "POST",
+            lambda i, s: ("/orders/bulk", [order_body() for _ in range(bulk)]),
+        ),
+        (
+            "summary.get_product_summary",
+            "GET",
+            lambda i, s: (f"/summaries/products/{rng.randint(1, products)}", None),
+        ),
+        (
+            "summary.get_customer_summary",
+            "GET",
+            lambda i, s: (f"/summaries/customers/{customer()}?from=1999-01", None),
+        ),
+        (
+            "summary.get_country_summary",
+            "GET",
+            lambda i, s: ("/summaries/countries/Germany", None),
+        ),
+        (
+            "order.delete_order",
+            "DELETE",
+            lambda i, s: (f"/orders/{s['order.add_order'][i]}", None),
+        ),
+    ]
+
+
+# Responses whose new row id later write routes refer to.
+CREATED_ID = {"product.add_product": "ProductID", "order.add_order": "OrderID"}
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_route(driver, name, method, make_request, count, state):
+    if method == "GET":
+        for i in range(WARMUP):
+            driver.request(method, *make_request(i, state))
+
+    latencies, errors, size, created = [], 0, 0, []
+    for i in range(count):
+        path, body = make_request(i, state)
+        start = time.perf_counter()
+        status, data = driver.request(method, path, body)
+        latencies.append(time.perf_counter() - start)
+        size += len(data)
+        errors += status >= 400
+        if name in CREATED_ID and status < 400:
+            created.append(json.loads(data)[CREATED_ID[name]])
+    state[name] = created
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "method": method,
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": count / total if total else None,
+        "mean_ms": total / count * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "bytes_per_request": size / count,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_app(path, cache, **config):
+    config_by_name["bench"] = type(
+        "BenchmarkConfig",
+        (ProductionConfig,),
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(path)}",
+            "RESPONSE_CACHE_ENABLED": cache,
+            **config,
+        },
+    )
+    return create_app("bench")
+
+
+def ensure_dataset(path, scale, random_seed):
+    """Seed ``path`` at ``scale`` unless it already exists."""
+    if os.path.exists(path):
+        return
+    start = time.perf_counter()
+    builder = make_app(path, False)
+    with builder.app_context():
+        db.create_all()
+        seed(scale, random_seed)
+        db.engine.dispose()
+    print(f"seeded {path} in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="dataset file (default bench-<scale>.db)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--server", action="store_true", help="use a WSGI server")
+    parser.add_argument("--cache", action="store_true", help="keep response cache")
+    parser.add_argument("--routes", help="only routes containing this text")
+    parser.add_argument("--output", default="bench-results.json")
+    args = parser.parse_args()
+
+    path = args.db or f"bench-{args.scale}.db"
+    ensure_dataset(path, args.scale, args.seed)
+    size = sizes(args.scale)
+
+    scratch = f"{path}.run"
+    shutil.copyfile(path, scratch)
+    app = make_app(scratch, args.cache)
+    driver = (ServerDriver if args.server else TestClientDriver)(app)
+    rng, state, results = random.Random(args.seed), {}, {}
+    try:
+        for name, method, make_request in routes(size, rng):
+            if args.routes and args.routes not in name:
+                continue
+            result = run_route(driver, name, method, make_request, args.requests, state)
+            results[name] = result
+            print(
+                f"{name:34} {result['throughput_rps']:9.1f} req/s"
+                f"  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}"
+                f"  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+            )
+    finally:
+        driver.close()
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(scratch + suffix):
+                os.remove(scratch + suffix)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "driver": driver.name,
+            "scale": args.scale,
+            "seed": args.seed,
+            "requests": args.requests,
+            "cache": args.cache,
+            "sizes": size,
+        },
+        "peak_rss_kb": peak_rss_kb(),
+        "routes": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"peak RSS {report['peak_rss_kb'] / 1024:.1f} MiB; written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
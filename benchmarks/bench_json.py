@@ -0,0 +1,59 @@
+"""Compare Flask's default JSON provider with the orjson provider.
+
+    python -m benchmarks.bench_json --rows 100000
+
+Encodes serialized product and order lists the way ``jsonify`` does for a
+list endpoint and reports the time each provider takes.
+"""
+
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.json_provider import OrjsonProvider
+from app.models import OrderSchema, ProductSchema
+from benchmarks.bench_serializer import make_orders, make_products
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def compare(app, label, payload, repeat):
+    default, default_time = timed(
+        lambda: DefaultJSONProvider(app).response(payload).get_data(), repeat
+    )
+    fast, fast_time = timed(
+        lambda: OrjsonProvider(app).response(payload).get_data(), repeat
+    )
+
+    assert fast == default, f"{label}: encoded output differs"
+    print(
+        f"{label:<28} default {default_time:7.3f}s   orjson {fast_time:7.3f}s   "
+        f"speedup {default_time / fast_time:5.1f}x   ({len(fast) / 1e6:.1f} MB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app("test")
+    products = ProductSchema(many=True).dump(make_products(args.rows))
+    orders = OrderSchema(many=True).dump(make_orders(args.rows, 3))
+
+    compare(app, f"products ({args.rows} rows)", products, args.repeat)
+    compare(app, f"orders ({args.rows} rows)", orders, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare marshmallow ``Schema.dump`` with the compiled serializers.
+
+    python -m benchmarks.bench_serializer --rows 100000
+
+Builds transient ORM objects in memory (no database), checks that both paths
+produce identical output and reports the time each takes.
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from app.models import Order, OrderDetail, OrderSchema, Product, ProductSchema
+from app.serialization import CompiledSchema
+
+
+def make_products(rows):
+    return [
+        Product(
+            ProductID=i,
+            ProductName=f"Product {i}",
+            SupplierID=i % 29,
+            CategoryID=i % 8,
+            QuantityPerUnit="10 boxes x 20 bags",
+            UnitPrice=Decimal(i % 500) / 4,
+            UnitsInStock=i % 120,
+            UnitsOnOrder=i % 70,
+            ReorderLevel=i % 30,
+            Discontinued=i % 11 == 0,
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+def make_orders(rows, lines):
+    products = make_products(77)
+    start = date(1996, 7, 4)
+    orders = []
+    for i in range(1, rows + 1):
+        order = Order(
+            OrderID=i,
+            CustomerID="VINET",
+            EmployeeID=i % 9,
+            OrderDate=start + timedelta(days=i % 700),
+            RequiredDate=start + timedelta(days=i % 700 + 28),
+            ShippedDate=None if i % 5 == 0 else start + timedelta(days=i % 700 + 7),
+            ShipVia=i % 3 + 1,
+            Freight=Decimal(i % 1000) / 8,
+            ShipName="Vins et alcools Chevalier",
+            ShipAddress="59 rue de l'Abbaye",
+            ShipCity="Reims",
+            ShipPostalCode="51100",
+            ShipCountry="France",
+        )
+        order.details = [
+            OrderDetail(
+                ProductID=product.ProductID,
+                UnitPrice=product.UnitPrice,
+                Quantity=(i + n) % 40 + 1,
+                Discount=Decimal("0.05") * (n % 3),
+                product=product,
+            )
+            for n, product in enumerate(products[i % 70 : i % 70 + lines])
+        ]
+        orders.append(order)
+    return orders
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def compare(label, schema, objects):
+    compiled, compiled_time = timed(lambda: schema.dump(objects))
+    with mock.patch.object(CompiledSchema, "_row_serializer", return_value=None):
+        reference, reference_time = timed(lambda: schema.dump(objects))
+
+    assert compiled == reference, f"{label}: compiled output differs"
+    print(
+        f"{label:<28} marshmallow {reference_time:7.3f}s   "
+        f"compiled {compiled_time:7.3f}s   speedup {reference_time / compiled_time:5.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lines", type=int, default=3, help="detail lines per order")
+    args = parser.parse_args()
+
+    compare(
+        f"products ({args.rows} rows)",
+        ProductSchema(many=True),
+        make_products(args.rows),
+    )
+    compare(
+        f"orders ({args.rows} rows)",
+        OrderSchema(many=True),
+        make_orders(args.rows, args.lines),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare two ``bench_endpoints`` result files route by route.
+
+    python -m benchmarks.compare before.json after.json
+
+Prints p50/p95/p99 latency and throughput of both runs with the relative
+change; negative latency and positive throughput changes are improvements.
+"""
+
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def change(before, after):
+    if not before or after is None:
+        return "    n/a"
+    return f"{(after - before) / before * 100:+6.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    for key in ("commit", "driver", "scale", "requests"):
+        print(f"{key:10} {before['meta'][key]!s:>12} {after['meta'][key]!s:>12}")
+    print()
+
+    header = "".join(f"{metric:>30}" for metric in METRICS)
+    print(f"{'route':34}{header}")
+    for name in sorted(before["routes"].keys() | after["routes"].keys()):
+        old, new = before["routes"].get(name), after["routes"].get(name)
+        if old is None or new is None:
+            print(f"{name:34} only in {'after' if old is None else 'before'}")
+            continue
+        cells = "".join(
+            f" {old[metric]:10.2f} {new[metric]:10.2f} {change(old[metric], new[metric])}"
+            for metric in METRICS
+        )
+        print(f"{name:34}{cells}")
+
+    rss_old, rss_new = before["peak_rss_kb"], after["peak_rss_kb"]
+    print(
+        f"\n{'peak RSS (KiB)':34}{rss_old:10} {rss_new:10} {change(rss_old, rss_new)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,51 @@
 import pytest
+from sqlalchemy import event
+from starlette.testclient import TestClient
 from app import create_app
+from app.asgi import create_asgi_app
+from app.caching import ENTITY_CACHES
+from app.config import TestingConfig, config_by_name
 from app.database import db
 
+# Config name of the file-backed app of ``both_apps`` tests.
+CONFIG_NAME = "test-shared"
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "both_apps: run on a database the ASGI app (app.asgi) shares, with "
+        "``client`` the Flask app's and then the ASGI app's test client",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    marked = metafunc.definition.get_closest_marker("both_apps")
+    if marked and "client" in metafunc.fixturenames:
+        metafunc.parametrize("client", ["wsgi", "asgi"], indirect=True)
+
+
+class AsgiTestClient(TestClient):
+    """Starlette test client taking and returning what Flask's does
+    (``open``, ``content_type=``, ``response.data``)."""
+
+    def open(self, path, method="GET", **kwargs):
+        return self.request(method, path, **kwargs)
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        response.data = response.content
+        return response
+
+    def post(self, url, content_type=None, **kwargs):
+        if content_type is not None:
+            headers = kwargs.get("headers") or {}
+            kwargs["headers"] = {**headers, "Content-Type": content_type}
+        return super().post(url, **kwargs)
+
 
 @pytest.fixture(scope="session")
-def app():
+def memory_app():
     app = create_app("test")
 
     with app.app_context():
@@ -15,5 +56,118 @@ def app():
 
 
 @pytest.fixture(scope="function")
-def client(app):
-    return app.test_client()
+def app(request, memory_app, tmp_path, monkeypatch):
+    """The session's in-memory app; ``both_apps`` tests get one on a SQLite
+    file of their own instead, which the ASGI app opens too."""
+    if request.node.get_closest_marker("both_apps") is None:
+        yield memory_app
+        return
+
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    config = type(
+        "SharedTestingConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": url}
+    )
+    monkeypatch.setitem(config_by_name, CONFIG_NAME, config)
+    app = create_app(CONFIG_NAME)
+    # Entity caches are global and keyed by table versions, which both
+    # databases number from the start.
+    for cache in ENTITY_CACHES.values():
+        cache.invalidate()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    for cache in ENTITY_CACHES.values():
+        cache.invalidate()
+
+
+@pytest.fixture(scope="function")
+def asgi_client(app):
+    """Test client of the ASGI app, on the database of a ``both_apps`` test."""
+    asgi_app = create_asgi_app(CONFIG_NAME)
+    # Settings a test changes on the Flask app apply to both.
+    asgi_app.state.config = app.config
+    with AsgiTestClient(asgi_app) as client:
+        yield client
+
+
+@pytest.fixture(scope="function")
+def client(request, app):
+    """Flask test client; tests marked ``both_apps`` also get the ASGI app's."""
+    if getattr(request, "param", "wsgi") == "wsgi":
+        return app.test_client()
+    return request.getfixturevalue("asgi_client")
+
+
+@pytest.fixture(scope="function")
+def session(app):
+    """Real database session; every table is emptied after the test."""
+    yield db.session
+
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+
+@pytest.fixture(scope="function")
+def queries(app):
+    """Records every SQL statement executed while the test runs."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="function")
+def sales(session):
+    """One customer with three orders (one without lines) over two products."""
+    from datetime import date
+    from decimal import Decimal
+    from app.models import Customer, Order, OrderDetail, Product
+
+    session.add(Customer(CustomerID="VINET", CompanyName="Vins et alcools"))
+    session.add_all(
+        [
+            Product(ProductID=1, ProductName="Queso Cabrales", UnitPrice=14),
+            Product(ProductID=2, ProductName="Tofu", UnitPrice=Decimal("9.80")),
+        ]
+    )
+    session.add_all(
+        [
+            Order(
+                OrderID=1,
+                CustomerID="VINET",
+                OrderDate=date(1996, 7, 4),
+                Freight=Decimal("32.38"),
+                details=[
+                    OrderDetail(ProductID=1, UnitPrice=14, Quantity=12, Discount=0),
+                    OrderDetail(
+                        ProductID=2,
+                        UnitPrice=Decimal("9.80"),
+                        Quantity=10,
+                        Discount=Decimal("0.10"),
+                    ),
+                ],
+            ),
+            Order(
+                OrderID=2,
+                CustomerID="VINET",
+                OrderDate=date(1997, 1, 15),
+                Freight=10,
+                details=[
+                    OrderDetail(
+                        ProductID=1, UnitPrice=14, Quantity=5, Discount=Decimal("0.05")
+                    ),
+                ],
+            ),
+            Order(OrderID=3, CustomerID="VINET", OrderDate=date(1997, 3, 1), Freight=1),
+        ]
+    )
+    session.commit()
+    session.expunge_all()
@@ -0,0 +1,267 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.models import CustomerMonthlySales, TableVersion
+
+CUSTOMER = {"CustomerID": "ALFKI", "CompanyName": "Alfreds Futterkiste"}
+ORDER = {
+    "CustomerID": "ALFKI",
+    "OrderDate": "1997-01-02",
+    "details": [{"ProductID": 1, "UnitPrice": "9.80", "Quantity": 3, "Discount": 0}],
+}
+
+
+pytestmark = pytest.mark.both_apps
+
+
+class Client:
+    """Flask and Starlette test clients behind one interface: every call
+    returns ``(status, json or None, headers)``."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return (
+            response.status_code,
+            json.loads(response.data or "null"),
+            response.headers,
+        )
+
+    def get(self, path, headers=None):
+        return self.request("GET", path, headers=headers)
+
+    def post(self, path, body=None):
+        return self.request("POST", path, body)
+
+    def put(self, path, body=None):
+        return self.request("PUT", path, body)
+
+    def delete(self, path):
+        return self.request("DELETE", path)
+
+
+@pytest.fixture
+def api(client):
+    """The same endpoints served by the Flask app and by the ASGI app."""
+    return Client(client)
+
+
+def _rows(app, stmt):
+    engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+    try:
+        with engine.connect() as connection:
+            return connection.execute(stmt).all()
+    finally:
+        engine.dispose()
+
+
+def test_customer_round_trip(api):
+    """Tests create, read, update and delete of a customer."""
+    status, body, _ = api.post("/customers", CUSTOMER)
+    assert status == 201
+    assert body["CompanyName"] == "Alfreds Futterkiste"
+
+    status, body, _ = api.put("/customers/ALFKI", {"City": "Berlin"})
+    assert (status, body["City"]) == (200, "Berlin")
+
+    status, body, _ = api.get("/customers/ALFKI?fields=CustomerID,City")
+    assert (status, body) == (200, {"CustomerID": "ALFKI", "City": "Berlin"})
+
+    assert api.delete("/customers/ALFKI")[0] == 204
+    assert api.get("/customers/ALFKI")[:2] == (
+        404,
+        {"message": "Customer ID ALFKI not found"},
+    )
+    assert api.delete("/customers/ALFKI")[0] == 404
+
+
+def test_list_pages_follow_the_cursor(api):
+    """Tests limit/after paging and its X-Next-Cursor and Link headers."""
+    for customer_id in ("ANATR", "ALFKI", "BONAP"):
+        api.post("/customers", {"CustomerID": customer_id, "CompanyName": "x"})
+
+    status, body, headers = api.get("/customers?limit=2&fields=CustomerID")
+
+    assert status == 200
+    assert body == [{"CustomerID": "ALFKI"}, {"CustomerID": "ANATR"}]
+    cursor = headers["X-Next-Cursor"]
+    assert headers["Link"] == (
+        f'</customers?limit=2&fields=CustomerID&after={cursor}>; rel="next"'
+    )
+
+    status, body, headers = api.get(f"/customers?limit=2&after={cursor}")
+    assert [c["CustomerID"] for c in body] == ["BONAP"]
+    assert "X-Next-Cursor" not in headers
+
+
+@pytest.mark.parametrize(
+    "method, path, body, expected",
+    [
+        ("POST", "/customers", None, {"message": "No input data provided"}),
+        ("GET", "/customers?limit=0", None, {"message": "limit must be at least 1."}),
+        ("GET", "/customers?after=%%%", None, {"message": "Invalid cursor."}),
+        ("GET", "/products?fields=Nope", None, {"message": "Unknown fields: Nope."}),
+        ("GET", "/orders/1?fields=Nope", None, {"message": "Unknown fields: Nope."}),
+        ("GET", "/orders?ids=1", None, {"message": "Unknown filter: ids."}),
+        (
+            "GET",
+            "/customers?Country[near]=x",
+            None,
+            {"message": "Unknown filter operator: near."},
+        ),
+        (
+            "GET",
+            "/products?ids=1&limit=2",
+            None,
+            {"message": "ids cannot be combined with limit."},
+        ),
+        (
+            "GET",
+            "/customers/search?q=",
+            None,
+            {"message": "q must contain at least one word."},
+        ),
+        (
+            "GET",
+            "/orders/history/ALFKI?to=May",
+            None,
+            {"message": "to must be a date (YYYY-MM-DD)."},
+        ),
+        (
+            "GET",
+            "/summaries/countries/Peru?from=1997",
+            None,
+            {"message": "from must be a month (YYYY-MM)."},
+        ),
+        (
+            "POST",
+            "/products",
+            {"ProductName": "Tofu", "UnitPrice": "cheap"},
+            {"UnitPrice": ["Not a valid number."]},
+        ),
+    ],
+)
+def test_bad_requests(api, method, path, body, expected):
+    """Tests malformed input is rejected with the same 400 responses."""
+    assert api.request(method, path, body)[:2] == (400, expected)
+
+
+def test_order_writes_keep_summaries(api, app):
+    """Tests order create, update and delete move the summary rows."""
+    api.post("/customers", CUSTOMER)
+    api.post("/products", {"ProductName": "Tofu", "UnitPrice": "9.80"})
+
+    status, body, _ = api.post("/orders", ORDER)
+    assert status == 201
+    assert body["details"][0]["product"] == {"ProductID": 1, "ProductName": "Tofu"}
+    order_id = body["OrderID"]
+
+    status, body, _ = api.put(f"/orders/{order_id}", {"OrderDate": "1998-02-03"})
+    assert (status, body["OrderDate"]) == (200, "1998-02-03")
+    assert body["details"][0]["product"]["ProductName"] == "Tofu"
+
+    summary = select(
+        CustomerMonthlySales.Month,
+        CustomerMonthlySales.Orders,
+        CustomerMonthlySales.Lines,
+    ).order_by(CustomerMonthlySales.Month)
+    assert _rows(app, summary) == [("1997-01", 0, 0), ("1998-02", 1, 1)]
+
+    assert api.delete(f"/orders/{order_id}")[0] == 204
+    assert _rows(app, summary) == [("1997-01", 0, 0), ("1998-02", 0, 0)]
+    assert api.get(f"/orders/{order_id}")[0] == 404
+
+
+def test_deleting_a_customer_detaches_its_orders(api, app):
+    """Tests a deleted customer's orders stay, without a customer."""
+    api.post("/customers", CUSTOMER)
+    api.post("/products", {"ProductName": "Tofu", "UnitPrice": "9.80"})
+    order_id = api.post("/orders", ORDER)[1]["OrderID"]
+    api.post("/orders", ORDER)
+
+    assert api.delete("/customers/ALFKI")[0] == 204
+
+    assert api.get(f"/orders/{order_id}")[1]["CustomerID"] is None
+    assert _rows(app, select(CustomerMonthlySales)) == []
+
+
+def test_asgi_writes_bump_table_versions(app, asgi_client):
+    """Tests the Flask app sees writes made through the ASGI app."""
+    flask_client = Client(app.test_client())
+    asgi_client = Client(asgi_client)
+    asgi_client.post("/customers", CUSTOMER)
+    assert flask_client.get("/customers/ALFKI")[1]["City"] is None
+
+    asgi_client.put("/customers/ALFKI", {"City": "Berlin"})
+
+    assert flask_client.get("/customers/ALFKI")[1]["City"] == "Berlin"
+    versions = select(TableVersion.TableName, TableVersion.Version)
+    assert dict(_rows(app, versions)) == {"Customers": 2}
+
+
+def test_read_routes(api):
+    """Tests search, ?ids=, the aggregates, the history and the summaries."""
+    api.post("/customers", CUSTOMER)
+    api.post("/products", {"ProductName": "Tofu", "UnitPrice": "9.80"})
+    order_id = api.post("/orders", {**ORDER, "ShipCountry": "Germany"})[1]["OrderID"]
+
+    assert api.get("/customers/search?q=alf&fields=CustomerID")[:2] == (
+        200,
+        [{"CustomerID": "ALFKI"}],
+    )
+    assert api.get("/products/search?q=tof&fields=ProductID")[1] == [{"ProductID": 1}]
+    assert api.get("/customers?ids=ALFKI,BONAP&fields=CustomerID")[:2] == (
+        200,
+        {"items": [{"CustomerID": "ALFKI"}], "missing": ["BONAP"]},
+    )
+    assert api.get("/customers/ALFKI/revenue")[1]["Revenue"] == "29.40"
+    assert api.get("/products/1/sales")[1] == {
+        "ProductID": 1,
+        "Lines": 1,
+        "Units": 3,
+        "Revenue": "29.40",
+    }
+    assert api.get(f"/orders/{order_id}/total")[1]["Total"] == "29.40"
+    assert api.get("/orders/history/ALFKI?fields=OrderID")[:2] == (
+        200,
+        [{"OrderID": order_id}],
+    )
+    assert api.get("/orders/history/BONAP")[:2] == (
+        404,
+        {"message": "Customer ID BONAP not found"},
+    )
+
+    month = {"Month": "1997-01", "Orders": 1, "Lines": 1, "Revenue": "29.40"}
+    assert api.get("/summaries/customers/ALFKI")[1] == {
+        "CustomerID": "ALFKI",
+        "Months": [month],
+    }
+    assert api.get("/summaries/countries/Germany")[1] == {
+        "ShipCountry": "Germany",
+        "Months": [month],
+    }
+    assert api.get("/summaries/products/1")[1]["Months"][0]["Units"] == 3
+    assert api.get("/summaries/products/9")[:2] == (
+        404,
+        {"message": "Product ID 9 not found"},
+    )
+
+
+def test_asgi_refuses_streaming(asgi_client):
+    """Tests the ASGI app rejects list requests the Flask app would stream
+    instead of answering them with a page."""
+    asgi_client = Client(asgi_client)
+
+    assert asgi_client.get("/orders?stream=1")[:2] == (
+        400,
+        {"message": "stream is served by the WSGI app only."},
+    )
+    ndjson = {"Accept": "application/x-ndjson"}
+    assert asgi_client.get("/customers", headers=ndjson)[:2] == (
+        406,
+        {"message": "application/x-ndjson is served by the WSGI app only."},
+    )
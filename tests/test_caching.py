@@ -0,0 +1,237 @@
+import json
+import pytest
+
+from app.caching import (
+    ENTITY_CACHES,
+    ResponseCache,
+    customer_entities,
+    product_cache,
+    product_entities,
+)
+
+PRODUCT_API_ROOT = "/products"
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(product_cache, "enabled", True)
+    product_cache.invalidate()
+    for counter in ("hits", "misses", "evictions", "invalidations"):
+        monkeypatch.setattr(product_cache, counter, 0)
+    yield product_cache
+    product_cache.invalidate()
+
+
+def test_product_list_served_from_cache(client, session, cache_enabled, queries):
+    """Tests a repeated GET /products is served without querying Products."""
+    from app.services import ProductService
+
+    ProductService.create({"ProductName": "Chai", "UnitPrice": 18})
+
+    first = client.get(PRODUCT_API_ROOT)
+    queries.clear()
+    second = client.get(PRODUCT_API_ROOT)
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    # Only the version check reaches the database.
+    assert len(queries) == 1
+    assert cache_enabled.hits == 1
+
+
+def test_product_cache_invalidated_by_write(client, session, cache_enabled):
+    """Tests ProductService writes invalidate cached product responses."""
+    from app.services import ProductService
+
+    product = ProductService.create({"ProductName": "Chai", "UnitPrice": 18})
+    client.get(f"{PRODUCT_API_ROOT}/{product.ProductID}")
+
+    ProductService.update(product.ProductID, {"UnitPrice": 20})
+    response = client.get(f"{PRODUCT_API_ROOT}/{product.ProductID}")
+
+    assert json.loads(response.data)["UnitPrice"] == "20.00"
+    assert cache_enabled.invalidations >= 2
+
+
+def test_product_cache_detects_writes_from_other_processes(
+    client, session, cache_enabled
+):
+    """Tests a version bump committed elsewhere makes cached entries stale."""
+    from app.services import ProductService
+    from app.versioning import touch
+
+    ProductService.create({"ProductName": "Chai", "UnitPrice": 18})
+    client.get(PRODUCT_API_ROOT)
+
+    # Simulate another worker: bump the version without touching this cache.
+    touch("Products")
+    session.commit()
+    client.get(PRODUCT_API_ROOT)
+
+    assert cache_enabled.hits == 0
+    assert cache_enabled.misses == 2
+
+
+def test_response_cache_lru_eviction():
+    """Tests the least recently used entry is evicted first."""
+    cache = ResponseCache("test")
+    cache.max_entries = 2
+
+    cache.set("a", 1, "A")
+    cache.set("b", 1, "B")
+    cache.get("a", 1)
+    cache.set("c", 1, "C")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A"
+    assert cache.evictions == 1
+
+
+def test_get_cache_stats(client):
+    """Tests GET /internal/cache exposes the cache counters."""
+    response = client.get("/internal/cache")
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert data[0]["name"] == "products"
+    assert {"hits", "misses", "evictions"} <= set(data[0])
+    assert [cache["name"] for cache in data[1:]] == [
+        "customer_entities",
+        "product_entities",
+    ]
+    assert "hit_ratio" in data[1]
+
+
+@pytest.fixture
+def entities():
+    for cache in ENTITY_CACHES.values():
+        cache.invalidate()
+    yield customer_entities, product_entities
+
+
+def test_customer_lookup_served_from_entity_cache(client, session, entities, queries):
+    """Tests a repeated GET /customers/<id> only checks the table version."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+    session.expunge_all()
+    client.get("/customers/ALFKI")
+    session.expunge_all()
+    queries.clear()
+    hits = customer_entities.hits
+
+    response = client.get("/customers/ALFKI")
+
+    assert json.loads(response.data)["CompanyName"] == "Alfreds"
+    assert len(queries) == 1
+    assert customer_entities.hits == hits + 1
+
+
+def test_entity_cache_detects_writes_from_other_processes(client, session, entities):
+    """Tests a row changed and versioned elsewhere is not served from the cache."""
+    from app.database import db
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+    client.get("/customers/ALFKI")
+    session.expunge_all()
+
+    # Another worker: its statements bypass this process's session events.
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE \"Customers\" SET \"CompanyName\" = 'Alfred''s'"
+        )
+        connection.exec_driver_sql(
+            'UPDATE "TableVersions" SET "Version" = "Version" + 1'
+        )
+    response = client.get("/customers/ALFKI")
+
+    assert json.loads(response.data)["CompanyName"] == "Alfred's"
+
+
+def test_sparse_lookup_not_cached(client, session, entities, queries):
+    """Tests ?fields= loads only those columns and leaves the cache alone."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+    session.expunge_all()
+    queries.clear()
+
+    response = client.get("/customers/ALFKI?fields=CompanyName")
+
+    assert json.loads(response.data) == {"CompanyName": "Alfreds"}
+    (lookup,) = [s for s in queries if 'FROM "Customers"' in s]
+    assert '"Customers"."City"' not in lookup
+    assert customer_entities.stats()["entries"] == 0
+
+
+def test_entity_cache_invalidated_by_orm_flush(client, session, entities):
+    """Tests a direct ORM write drops the cached row."""
+    from app.models import Product
+    from app.services import ProductService
+
+    product_id = ProductService.create({"ProductName": "Chai"}).ProductID
+    ProductService.get_by_id(product_id)
+    session.expunge_all()
+
+    session.get(Product, product_id).ProductName = "Chai tea"
+    session.commit()
+    session.expunge_all()
+
+    assert ProductService.get_by_id(product_id).ProductName == "Chai tea"
+
+
+def test_entity_cache_invalidated_by_bulk_upsert(client, session, entities):
+    """Tests INSERT/UPDATE statements on a cached table clear its entries."""
+    from app.services import ProductService
+
+    product_id = ProductService.create({"ProductName": "Chai"}).ProductID
+    ProductService.get_by_id(product_id)
+    session.expunge_all()
+
+    ProductService.upsert_bulk([{"ProductID": product_id, "ProductName": "Ikura"}], 10)
+    session.expunge_all()
+
+    assert ProductService.get_by_id(product_id).ProductName == "Ikura"
+    assert product_entities.stats()["entries"] == 1
+
+
+def test_update_from_cached_entity(client, session, entities):
+    """Tests PUT works on an instance rebuilt from the cache."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+    CustomerService.get_by_id("ALFKI")
+    session.expunge_all()
+
+    response = client.put("/customers/ALFKI", json={"City": "Berlin"})
+    session.expunge_all()
+
+    assert response.status_code == 200
+    assert CustomerService.get_by_id("ALFKI").City == "Berlin"
+    assert client.delete("/customers/ALFKI").status_code == 204
+    assert CustomerService.get_by_id("ALFKI") is None
+
+
+def test_multi_get_loads_only_uncached_rows(client, session, entities, queries):
+    """Tests GET /customers?ids= serves cached rows and loads the rest with
+    one IN query."""
+    from app.services import CustomerService
+
+    for customer_id in ("ALFKI", "ANATR", "BONAP"):
+        CustomerService.create({"CustomerID": customer_id, "CompanyName": "C"})
+    CustomerService.get_by_id("ANATR")
+    session.expunge_all()
+    queries.clear()
+
+    response = client.get("/customers?ids=BONAP,ANATR,ALFKI")
+
+    assert [c["CustomerID"] for c in json.loads(response.data)["items"]] == [
+        "BONAP",
+        "ANATR",
+        "ALFKI",
+    ]
+    (lookup,) = [s for s in queries if 'FROM "Customers"' in s]
+    assert lookup.count("?") == 2
+    assert customer_entities.stats()["entries"] == 3
@@ -1,3 +1,4 @@
+import pytest
 from unittest.mock import MagicMock
 from flask import Response
 import json
@@ -93,6 +94,7 @@ def test_create_customer_success(client, mocker):
     assert mock_service.called
 
 
+@pytest.mark.both_apps
 def test_create_customer_no_input(client):
     """Tests POST /customers returns 400 when no data provided."""
     response = client.post(CUSTOMER_API_ROOT, content_type="application/json")
@@ -177,3 +179,198 @@ def test_delete_customer_success(client, mocker):
         data = json.loads(response.data)
         assert "successfully deleted" in data["message"]
     assert mock_service.called
+
+
+def test_get_customer_conditional_get(client, session):
+    """Tests GET /customers/<id> honors If-None-Match and changes ETag on update."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+
+    etag = client.get(f"{CUSTOMER_API_ROOT}/ALFKI").headers["ETag"]
+    response = client.get(f"{CUSTOMER_API_ROOT}/ALFKI", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    CustomerService.update("ALFKI", {"ContactName": "Maria Anders"})
+
+    response = client.get(f"{CUSTOMER_API_ROOT}/ALFKI", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert json.loads(response.data)["ContactName"] == "Maria Anders"
+
+
+def test_upsert_customers_bulk_counts(client, session):
+    """Tests PUT /customers/bulk inserts, updates and skips unchanged rows."""
+    from app.models import Customer
+
+    session.add_all(
+        [
+            Customer(CustomerID="ALFKI", CompanyName="Alfreds", City="Berlin"),
+            Customer(CustomerID="ANATR", CompanyName="Ana Trujillo", City="Mexico"),
+        ]
+    )
+    session.commit()
+
+    payload = [
+        {"CustomerID": "ALFKI", "CompanyName": "Alfreds", "City": "Berlin"},
+        {"CustomerID": "ANATR", "City": "México D.F."},
+        {"CustomerID": "BERGS", "CompanyName": "Berglunds snabbköp"},
+    ]
+    response = client.put(
+        f"{CUSTOMER_API_ROOT}/bulk",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert (data["inserted"], data["updated"], data["unchanged"]) == (1, 1, 1)
+    assert session.get(Customer, "ANATR").City == "México D.F."
+    assert session.get(Customer, "ANATR").CompanyName == "Ana Trujillo"
+    assert session.get(Customer, "BERGS") is not None
+
+
+def test_upsert_rows_matches_keys_case_insensitively(app, session):
+    """Tests keys a case-insensitive collation matches, as MySQL's does for
+    CustomerID, update the stored row and are counted as updates."""
+    from types import SimpleNamespace
+    from sqlalchemy import Column, MetaData, String, Table
+    from app.bulk import upsert_rows
+
+    table = Table(
+        "NocaseCustomers",
+        MetaData(),
+        Column("CustomerID", String(5, collation="NOCASE"), primary_key=True),
+        Column("City", String(15)),
+    )
+    table.create(session.connection())
+    try:
+        session.execute(table.insert(), {"CustomerID": "ALFKI", "City": "Berlin"})
+        model = SimpleNamespace(__table__=table)
+
+        unchanged = upsert_rows(model, [{"CustomerID": "alfki", "City": "Berlin"}])
+        updated = upsert_rows(model, [{"CustomerID": "alfki", "City": "Hamburg"}])
+
+        assert unchanged == {"inserted": 0, "updated": 0, "unchanged": 1}
+        assert updated == {"inserted": 0, "updated": 1, "unchanged": 0}
+        assert session.execute(table.select()).all() == [("ALFKI", "Hamburg")]
+    finally:
+        session.rollback()
+        table.drop(session.connection())
+        session.commit()
+
+
+def test_upsert_customers_bulk_validation_error(client):
+    """Tests PUT /customers/bulk returns 400 when a row lacks CustomerID."""
+    response = client.put(
+        f"{CUSTOMER_API_ROOT}/bulk",
+        data=json.dumps([{"CompanyName": "No Key"}]),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 400
+    assert "CustomerID" in json.loads(response.data)["0"]
+
+
+def test_get_customer_revenue(client, sales, queries):
+    """Tests GET /customers/<id>/revenue aggregates every order in one query."""
+    response = client.get(f"{CUSTOMER_API_ROOT}/VINET/revenue")
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["Orders"] == 3
+    assert data["Lines"] == 3
+    assert data["Revenue"] == "322.70"
+    assert len(queries) == 2
+
+
+@pytest.mark.both_apps
+def test_get_customer_revenue_date_range(client, sales):
+    """Tests from/to restrict the revenue to orders in the range."""
+    response = client.get(f"{CUSTOMER_API_ROOT}/VINET/revenue?from=1997-01-01")
+
+    data = json.loads(response.data)
+    assert data["From"] == "1997-01-01"
+    assert data["Orders"] == 2
+    assert data["Revenue"] == "66.50"
+
+
+@pytest.mark.both_apps
+def test_get_customer_revenue_not_found(client, session):
+    """Tests GET /customers/<id>/revenue returns 404 for an unknown customer."""
+    assert client.get(f"{CUSTOMER_API_ROOT}/NONEX/revenue").status_code == 404
+
+
+def test_search_customers(client, session, queries):
+    """Tests GET /customers/search ranks company names above cities and
+    follows creates, updates and deletes."""
+    for customer_id, company, city in (
+        ("BERGS", "Berglunds snabbköp", "Luleå"),
+        ("ALFKI", "Alfreds Futterkiste", "Berlin"),
+        ("BLAUS", "Blauer See Delikatessen", "Mannheim"),
+    ):
+        client.post(
+            CUSTOMER_API_ROOT,
+            json={"CustomerID": customer_id, "CompanyName": company, "City": city},
+        )
+    client.put(f"{CUSTOMER_API_ROOT}/BLAUS", json={"City": "Bern"})
+    client.delete(f"{CUSTOMER_API_ROOT}/ALFKI")
+    queries.clear()
+
+    response = client.get(f"{CUSTOMER_API_ROOT}/search?q=ber&fields=CustomerID")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == [
+        {"CustomerID": "BERGS"},
+        {"CustomerID": "BLAUS"},
+    ]
+    assert len(queries) == 2
+    assert json.loads(client.get(f"{CUSTOMER_API_ROOT}/search?q=alf").data) == []
+
+
+def test_get_customers_by_ids_ignores_case(client, session, mocker):
+    """Tests ?ids= matches IDs case-insensitively, like MySQL's collation."""
+    from app.caching import customer_entities
+    from app.models import Customer
+
+    alfki = Customer(CustomerID="ALFKI", CompanyName="Alfreds")
+    load_many = mocker.patch.object(
+        customer_entities, "load_many", return_value={"ALFKI": alfki}
+    )
+
+    response = client.get(f"{CUSTOMER_API_ROOT}?ids=alfki,ALFKI,bonap")
+
+    assert load_many.call_args.args[0] == ["alfki", "ALFKI", "bonap"]
+    data = json.loads(response.data)
+    assert [c["CustomerID"] for c in data["items"]] == ["ALFKI"]
+    assert data["missing"] == ["bonap"]
+
+
+@pytest.mark.both_apps
+def test_get_customers_filtered_by_country(client, session):
+    """Tests ?Country= matches any of its values; City is not filterable."""
+    from app.models import Customer
+
+    session.add_all(
+        [
+            Customer(CustomerID="ALFKI", CompanyName="Alfreds", Country="Germany"),
+            Customer(CustomerID="BONAP", CompanyName="Bon app'", Country="France"),
+            Customer(CustomerID="BOTTM", CompanyName="Bottom-Dollar", Country="Canada"),
+            Customer(
+                CustomerID="FRANK", CompanyName="Frankenversand", Country="Germany"
+            ),
+        ]
+    )
+    session.commit()
+
+    response = client.get(
+        f"{CUSTOMER_API_ROOT}?Country=Germany&Country=France&sort=-Country"
+    )
+
+    assert [c["CustomerID"] for c in json.loads(response.data)] == [
+        "FRANK",
+        "ALFKI",
+        "BONAP",
+    ]
+    rejected = client.get(f"{CUSTOMER_API_ROOT}?City=Berlin")
+    assert rejected.status_code == 400
+    assert json.loads(rejected.data)["message"] == "Unknown filter: City."
@@ -0,0 +1,42 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider
+
+PAYLOAD = {
+    "UnitPrice": Decimal("21.00"),
+    "OrderDate": date(1996, 7, 4),
+    "Stamp": datetime(1996, 7, 4, 12, 30),
+    "details": [{"Discount": Decimal("0.15"), "ProductID": 11}],
+    "City": "Reims",
+}
+
+
+def test_orjson_provider_matches_default_encoding(app):
+    """Tests Decimal, date and datetime values encode as with the default provider."""
+    fast = OrjsonProvider(app).response(PAYLOAD).get_data()
+    default = DefaultJSONProvider(app).response(PAYLOAD).get_data()
+
+    assert fast == default
+    assert json.loads(fast)["UnitPrice"] == "21.00"
+    assert json.loads(fast)["OrderDate"] == "Thu, 04 Jul 1996 00:00:00 GMT"
+
+
+def test_orjson_provider_accepts_non_string_keys(app):
+    """Tests integer keys (marshmallow many=True errors) are serialized."""
+    errors = {1: {"OrderDate": ["Missing data for required field."]}}
+
+    assert json.loads(OrjsonProvider(app).dumps(errors)) == {
+        "1": {"OrderDate": ["Missing data for required field."]}
+    }
+
+
+def test_app_uses_configured_json_provider(app, client):
+    """Tests create_app installs the provider selected by JSON_PROVIDER."""
+    assert isinstance(app.json, OrjsonProvider)
+
+    response = client.post("/products", content_type="application/json")
+    assert response.status_code == 400
@@ -0,0 +1,84 @@
+import re
+import threading
+
+from app.metrics import request_metrics
+
+
+def _count(endpoint, status=200):
+    stats = request_metrics.collect().get(endpoint)
+    return stats.statuses.get(status, 0) if stats else 0
+
+
+def test_requests_recorded_per_endpoint(client, session):
+    """Tests requests are counted per endpoint, with DB and serialization time."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "ALFKI", "CompanyName": "Alfreds"})
+    before = _count("customer.get_customers")
+
+    response = client.get("/customers")
+
+    assert response.status_code == 200
+    assert _count("customer.get_customers") == before + 1
+    stats = request_metrics.collect()["customer.get_customers"]
+    duration, db_time, serialization, size = stats.sums
+    assert 0 < db_time < duration
+    assert 0 < serialization < duration
+    assert size >= len(response.data)
+
+
+def test_unmatched_requests_recorded(client):
+    """Tests requests without an endpoint are counted as unmatched."""
+    before = _count("unmatched", 404)
+
+    client.get("/no-such-route")
+
+    assert _count("unmatched", 404) == before + 1
+
+
+def test_finished_threads_folded_into_total(client):
+    """Tests a finished thread's shard is merged and dropped, not kept."""
+    before = _count("unmatched", 404)
+    shards = len(request_metrics._shards)
+
+    threads = [
+        threading.Thread(target=client.get, args=("/no-such-route",)) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    assert len(request_metrics._shards) == shards
+    assert _count("unmatched", 404) == before + 5
+
+
+def test_metrics_endpoint_prometheus_format(client, session):
+    """Tests GET /metrics renders cumulative histograms and status counters."""
+    client.get("/products")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert "# TYPE northwind_request_duration_seconds histogram" in body
+    assert "# TYPE northwind_requests_total counter" in body
+    assert re.search(
+        r'northwind_requests_total\{endpoint="product.get_products",status="200"\} \d+',
+        body,
+    )
+
+    buckets = [
+        int(value)
+        for value in re.findall(
+            r'northwind_request_db_seconds_bucket\{endpoint="product.get_products",'
+            r'le="[^"]+"\} (\d+)',
+            body,
+        )
+    ]
+    assert buckets == sorted(buckets)
+    assert re.search(
+        rf'northwind_request_db_seconds_count\{{endpoint="product.get_products"\}} '
+        rf"{buckets[-1]}\n",
+        body,
+    )
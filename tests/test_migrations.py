@@ -0,0 +1,105 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import db
+from app.migrations import current_version, migrations, upgrade
+from app.migrations.explain import explain
+
+
+def _indexes(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def _schema(engine):
+    """Columns and index names per table, without the FTS5 shadow tables."""
+    inspector = inspect(engine)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table.startswith(("CustomerSearch_", "ProductSearch_")):
+            continue
+        columns = inspector.get_columns(table)
+        schema[table] = (
+            [(c["name"], str(c["type"]), c["nullable"]) for c in columns],
+            _indexes(engine, table),
+        )
+    return schema
+
+
+def test_upgrade_fresh_database(app, tmp_path):
+    """Tests upgrade creates the tables and indexes and records each version."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    latest = migrations()[-1][0]
+
+    assert upgrade(engine) == list(range(1, latest + 1))
+    assert current_version(engine) == latest
+    assert upgrade(engine) == []
+    assert "ix_Orders_CustomerID_OrderDate" in _indexes(engine, "Orders")
+    assert "ix_OrderDetails_ProductID" in _indexes(engine, "OrderDetails")
+    assert "ix_Products_CategoryID" in _indexes(engine, "Products")
+    assert "ix_Customers_Country" in _indexes(engine, "Customers")
+    engine.dispose()
+
+
+def test_migrations_use_their_own_schema(app, tmp_path):
+    """Tests a version creates only its own tables, and all of them add up to
+    the schema of the models."""
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    upgrade(migrated, target=1)
+
+    assert "ix_Customers_Country" not in _indexes(migrated, "Customers")
+    assert "CustomerSearch" not in inspect(migrated).get_table_names()
+
+    upgrade(migrated)
+    models = create_engine(f"sqlite:///{tmp_path / 'models.db'}")
+    db.metadata.create_all(models)
+    for engine in (migrated, models):
+        inspect(engine).clear_cache()
+    assert _schema(migrated) == _schema(models)
+    migrated.dispose()
+    models.dispose()
+
+
+def test_upgrade_adds_indexes_to_existing_tables(app, tmp_path):
+    """Tests a database created before migrations gets the missing indexes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text('CREATE TABLE "Orders" ("OrderID" INTEGER PRIMARY KEY, '
+                 '"CustomerID" VARCHAR(5), "OrderDate" DATE, "ShippedDate" DATE, '
+                 '"ShipCountry" VARCHAR(50))')
+        )  # fmt: skip
+
+    upgrade(engine)
+
+    assert {
+        "ix_Orders_CustomerID_OrderDate",
+        "ix_Orders_OrderDate",
+        "ix_Orders_ShippedDate",
+    } <= _indexes(engine, "Orders")
+    engine.dispose()
+
+
+def test_explain_flags_full_scans_of_large_tables(app, session):
+    """Tests only unindexed scans of the given large tables are flagged."""
+    connection = db.session.connection()
+    scan = 'SELECT * FROM "Orders" WHERE "ShipCity" = ?'
+    lookup = 'SELECT * FROM "Orders" WHERE "CustomerID" = ?'
+
+    assert any(bad for _, bad in explain(connection, scan, ("Reims",), {"Orders"}))
+    assert not any(bad for _, bad in explain(connection, scan, ("Reims",), set()))
+    assert not any(
+        bad for _, bad in explain(connection, lookup, ("VINET",), {"Orders"})
+    )
+
+
+def test_explain_command(app, session):
+    """Tests flask schema explain passes on the service queries."""
+    from app.models import Customer, Order
+
+    session.add(Customer(CustomerID="VINET", CompanyName="Vins"))
+    session.add(Order(OrderID=1, CustomerID="VINET"))
+    session.commit()
+
+    result = app.test_cli_runner().invoke(args=["schema", "explain"])
+
+    assert result.exit_code == 0, result.output
+    assert "OrderService.get_customer_history" in result.output
@@ -1,3 +1,4 @@
+import pytest
 from unittest.mock import MagicMock
 from flask import Response
 import json
@@ -103,6 +104,7 @@ def test_create_order_success(client, mocker):
     mock_service.assert_called_once()
 
 
+@pytest.mark.both_apps
 def test_create_order_no_input(client):
     """Tests POST /orders returns 400 when no data provided."""
     response = client.post(ORDER_API_ROOT, content_type="application/json")
@@ -168,11 +170,15 @@ def test_get_customer_history_found(client, mocker):
         "app.services.order_service.OrderService.get_customer_history"
     )
 
-    serialized_history = [
-        {"OrderID": 100, "OrderDate": "1997-01-01", "CustomerID": "ALFKI"},
-        {"OrderID": 99, "OrderDate": "1996-12-01", "CustomerID": "ALFKI"},
+    from datetime import date
+    from app.models import Order
+
+    # The service returns Order rows; the route serializes the page.
+    history = [
+        Order(OrderID=100, OrderDate=date(1997, 1, 1), CustomerID="ALFKI"),
+        Order(OrderID=99, OrderDate=date(1996, 12, 1), CustomerID="ALFKI"),
     ]
-    mock_service.return_value = serialized_history
+    mock_service.return_value = history
 
     response = client.get(f"{ORDER_API_ROOT}/history/ALFKI")
     data = json.loads(response.data)
@@ -231,3 +237,506 @@ def test_delete_order_not_found(client, mocker):
     response = client.delete(f"{ORDER_API_ROOT}/99999")
 
     assert response.status_code == 404
+
+
+@pytest.mark.both_apps
+def test_get_orders_keyset_pagination(client, session):
+    """Tests GET /orders pages through every order once, ordered by OrderDate."""
+    from datetime import date
+    from app.models import Order
+
+    dates = [date(1996, 7, 4), None, date(1996, 7, 4), date(1997, 1, 1), None]
+    session.add_all(
+        Order(OrderID=i, CustomerID="VINET", OrderDate=d)
+        for i, d in enumerate(dates, start=1)
+    )
+    session.commit()
+
+    seen, url = [], f"{ORDER_API_ROOT}?limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        page = json.loads(response.data)
+        assert len(page) <= 2
+        seen.extend(order["OrderID"] for order in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"{ORDER_API_ROOT}?limit=2&after={cursor}" if cursor else None
+
+    assert seen == [2, 5, 1, 3, 4]
+
+
+@pytest.mark.both_apps
+def test_get_orders_invalid_cursor(client):
+    """Tests GET /orders returns 400 for a malformed cursor."""
+    response = client.get(f"{ORDER_API_ROOT}?after=not-a-cursor")
+
+    assert response.status_code == 400
+    assert "cursor" in json.loads(response.data)["message"]
+
+
+def _add_orders(session, count):
+    from datetime import date
+    from app.models import Order
+
+    session.add_all(
+        Order(OrderID=i, CustomerID="VINET", OrderDate=date(1996, 7, i))
+        for i in range(1, count + 1)
+    )
+    session.commit()
+
+
+def test_get_orders_stream_ndjson(client, session, app, monkeypatch):
+    """Tests GET /orders streams every order as NDJSON across several batches."""
+    _add_orders(session, 5)
+    monkeypatch.setitem(app.config, "STREAM_BATCH_SIZE", 2)
+
+    response = client.get(ORDER_API_ROOT, headers={"Accept": "application/x-ndjson"})
+    lines = response.data.decode().splitlines()
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["OrderID"] for line in lines] == [1, 2, 3, 4, 5]
+
+
+def test_get_orders_stream_json_array(client, session, app, monkeypatch):
+    """Tests GET /orders?stream=1 returns the full table as one JSON array."""
+    _add_orders(session, 4)
+    monkeypatch.setitem(app.config, "STREAM_BATCH_SIZE", 2)
+
+    response = client.get(f"{ORDER_API_ROOT}?stream=1")
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert [order["OrderID"] for order in data] == [1, 2, 3, 4]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def _add_orders_with_details(session, customer_id, count, lines):
+    from datetime import date
+    from app.models import Customer, Order, OrderDetail, Product
+
+    session.add(Customer(CustomerID=customer_id, CompanyName="Vins et alcools"))
+    session.add_all(
+        Product(ProductID=p, ProductName=f"Product {p}") for p in range(1, lines + 1)
+    )
+    for i in range(1, count + 1):
+        order = Order(OrderID=i, CustomerID=customer_id, OrderDate=date(1996, 7, i))
+        order.details = [
+            OrderDetail(ProductID=p, UnitPrice=10, Quantity=p, Discount=0)
+            for p in range(1, lines + 1)
+        ]
+        session.add(order)
+    session.commit()
+    session.expunge_all()
+
+
+def test_get_orders_query_count_is_bounded(client, session, queries):
+    """Tests GET /orders loads details and products without N+1 queries."""
+    _add_orders_with_details(session, "VINET", count=10, lines=3)
+    queries.clear()
+
+    response = client.get(ORDER_API_ROOT)
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert len(data) == 10
+    assert data[0]["details"][2]["product"] == {
+        "ProductID": 3,
+        "ProductName": "Product 3",
+    }
+    # Validator lookup, orders, details, products.
+    assert len(queries) <= 4
+
+
+def test_get_customer_history_query_count_is_bounded(client, session, queries):
+    """Tests GET /orders/history/<id> loads details without N+1 queries."""
+    _add_orders_with_details(session, "VINET", count=10, lines=3)
+    queries.clear()
+
+    response = client.get(f"{ORDER_API_ROOT}/history/VINET")
+
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 10
+    assert len(queries) <= 5
+
+
+@pytest.mark.both_apps
+def test_get_customer_history_pages_newest_first(client, session):
+    """Tests GET /orders/history/<id> pages by cursor, newest order first."""
+    _add_orders_with_details(session, "VINET", count=5, lines=1)
+
+    first = client.get(f"{ORDER_API_ROOT}/history/VINET?limit=2")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"{ORDER_API_ROOT}/history/VINET?limit=2&after={cursor}")
+    last = client.get(
+        f"{ORDER_API_ROOT}/history/VINET?limit=2"
+        f"&after={second.headers['X-Next-Cursor']}"
+    )
+
+    assert [o["OrderID"] for o in json.loads(first.data)] == [5, 4]
+    assert [o["OrderID"] for o in json.loads(second.data)] == [3, 2]
+    assert [o["OrderID"] for o in json.loads(last.data)] == [1]
+    assert "X-Next-Cursor" not in last.headers
+
+
+@pytest.mark.both_apps
+def test_get_customer_history_date_range(client, session):
+    """Tests from/to restrict the history to an inclusive date range."""
+    _add_orders_with_details(session, "VINET", count=5, lines=1)
+
+    response = client.get(
+        f"{ORDER_API_ROOT}/history/VINET?from=1996-07-02&to=1996-07-04"
+    )
+
+    assert response.status_code == 200
+    assert [o["OrderID"] for o in json.loads(response.data)] == [4, 3, 2]
+
+
+@pytest.mark.both_apps
+def test_get_customer_history_invalid_date(client, session):
+    """Tests a malformed or empty date range is rejected with 400."""
+    assert client.get(f"{ORDER_API_ROOT}/history/VINET?from=July").status_code == 400
+    response = client.get(
+        f"{ORDER_API_ROOT}/history/VINET?from=1997-01-01&to=1996-01-01"
+    )
+    assert response.status_code == 400
+
+
+def test_get_customer_history_existence_checked_in_same_query(client, session, queries):
+    """Tests unknown and order-less customers are told apart by one query."""
+    from app.models import Customer
+
+    session.add(Customer(CustomerID="BLANK", CompanyName="No orders"))
+    session.commit()
+    queries.clear()
+
+    missing = client.get(f"{ORDER_API_ROOT}/history/NONEX")
+    lookups = len(queries)
+    empty = client.get(f"{ORDER_API_ROOT}/history/BLANK")
+
+    assert missing.status_code == 404
+    assert empty.status_code == 200
+    assert "no orders" in json.loads(empty.data)["message"]
+    # Validator lookup and the history query.
+    assert lookups == 2
+
+
+def test_get_orders_sparse_fields_skip_details(client, session, queries):
+    """Tests GET /orders?fields= selects only the requested columns."""
+    _add_orders_with_details(session, "VINET", count=3, lines=2)
+    queries.clear()
+
+    response = client.get(f"{ORDER_API_ROOT}?fields=OrderID,ShippedDate")
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert data[0] == {"OrderID": 1, "ShippedDate": None}
+    # Validator lookup, then orders only.
+    assert len(queries) == 2
+    assert "ShipAddress" not in queries[-1]
+
+
+@pytest.mark.both_apps
+def test_get_orders_unknown_field(client):
+    """Tests GET /orders?fields= returns 400 for undeclared fields."""
+    response = client.get(f"{ORDER_API_ROOT}?fields=OrderID,Bogus")
+
+    assert response.status_code == 400
+    assert "Bogus" in json.loads(response.data)["message"]
+
+
+def test_add_orders_bulk_reports_per_item_results(client, session):
+    """Tests POST /orders/bulk inserts valid orders and reports invalid ones."""
+    from app.models import Order, OrderDetail
+
+    payload = [
+        {
+            "CustomerID": "VINET",
+            "OrderDate": "1996-07-04",
+            "details": [{"ProductID": 1, "UnitPrice": 10, "Quantity": 2}],
+        },
+        {"CustomerID": "TOMSP"},
+        {
+            "CustomerID": "HANAR",
+            "OrderDate": "1996-07-08",
+            "details": [
+                {"ProductID": 1, "UnitPrice": 10, "Quantity": 1, "Discount": 0.1},
+                {"ProductID": 2, "UnitPrice": 5, "Quantity": 3},
+            ],
+        },
+    ]
+
+    response = client.post(
+        f"{ORDER_API_ROOT}/bulk?chunk_size=1",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    data = json.loads(response.data)
+
+    assert response.status_code == 207
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert [r["index"] for r in data["results"]] == [0, 1, 2]
+    assert "OrderDate" in data["results"][1]["errors"]
+
+    order_id = data["results"][2]["OrderID"]
+    assert session.get(Order, order_id).CustomerID == "HANAR"
+    assert OrderDetail.query.filter_by(OrderID=order_id).count() == 2
+
+
+def _mysql_session(mocker, lock_mode):
+    """Mock MySQL session: ``innodb_autoinc_lock_mode`` is ``lock_mode``,
+    ``auto_increment_increment`` 2 and the first generated id 101."""
+    from sqlalchemy.dialects.mysql import pymysql
+
+    session = mocker.patch("app.services.order_service.db").session
+    session.get_bind.return_value.dialect = pymysql.dialect()
+    session.connection.return_value.info = {}
+    session.execute.return_value.one.return_value = (lock_mode, 2)
+    session.execute.return_value.scalar_one.return_value = 101
+    session.execute.return_value.inserted_primary_key = [7]
+    return session
+
+
+def test_insert_headers_one_statement_on_mysql(mocker):
+    """Tests MySQL gets one multi-row INSERT whose ids follow LAST_INSERT_ID()."""
+    from sqlalchemy.dialects.mysql import pymysql
+    from app.services.order_service import insert_headers
+
+    session = _mysql_session(mocker, 1)
+    rows = [{"CustomerID": c, "OrderDate": None} for c in ("A", "B", "C")]
+
+    assert insert_headers(rows) == [101, 103, 105]
+    insert = [
+        call.args[0]
+        for call in session.execute.call_args_list
+        if str(call.args[0]).startswith("INSERT")
+    ]
+    assert len(insert) == 1
+    sql = str(insert[0].compile(dialect=pymysql.dialect()))
+    assert sql.count("(%s, %s") == 3
+    assert insert_headers(rows[:1]) == [101]
+    # The lock mode is read once per connection.
+    assert session.execute.return_value.one.call_count == 1
+
+
+def test_insert_headers_per_row_without_consecutive_ids(mocker):
+    """Tests interleaved auto-increment falls back to one INSERT per row."""
+    from app.services.order_service import insert_headers
+
+    session = _mysql_session(mocker, 2)
+
+    assert insert_headers([{"CustomerID": "A"}, {"CustomerID": "B"}]) == [7, 7]
+    assert session.execute.return_value.scalar_one.call_count == 0
+
+
+def test_add_orders_bulk_ndjson_failed_chunk_is_rolled_back(client, session):
+    """Tests POST /orders/bulk accepts NDJSON and isolates a failing chunk."""
+    from app.models import Order
+
+    lines = [
+        {"OrderID": 1, "CustomerID": "VINET", "OrderDate": "1996-07-04"},
+        {"OrderID": 2, "CustomerID": "VINET", "OrderDate": "1996-07-05"},
+        {"OrderID": 1, "CustomerID": "TOMSP", "OrderDate": "1996-07-06"},
+    ]
+
+    response = client.post(
+        f"{ORDER_API_ROOT}/bulk?chunk_size=2",
+        data="\n".join(json.dumps(line) for line in lines),
+        content_type="application/x-ndjson",
+    )
+    data = json.loads(response.data)
+
+    assert response.status_code == 207
+    assert [r.get("OrderID") for r in data["results"]] == [1, 2, None]
+    assert "error" in data["results"][2]
+    assert Order.query.count() == 2
+
+
+def test_add_orders_bulk_rejects_non_array(client):
+    """Tests POST /orders/bulk returns 400 when the body is not an array."""
+    response = client.post(
+        f"{ORDER_API_ROOT}/bulk",
+        data=json.dumps({"CustomerID": "VINET"}),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_order_total(client, sales, queries):
+    """Tests GET /orders/<id>/total sums the lines and freight in one query."""
+    response = client.get(f"{ORDER_API_ROOT}/1/total")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {
+        "OrderID": 1,
+        "Lines": 2,
+        "Subtotal": "256.20",
+        "Freight": "32.38",
+        "Total": "288.58",
+    }
+    # Validator lookup and the aggregate.
+    assert len(queries) == 2
+
+
+@pytest.mark.both_apps
+def test_get_order_total_without_lines(client, sales):
+    """Tests an order without lines totals to its freight."""
+    data = json.loads(client.get(f"{ORDER_API_ROOT}/3/total").data)
+
+    assert data["Lines"] == 0
+    assert data["Subtotal"] == "0.00"
+    assert data["Total"] == "1.00"
+
+
+@pytest.mark.both_apps
+def test_get_order_total_not_found(client, session):
+    """Tests GET /orders/<id>/total returns 404 for an unknown order."""
+    assert client.get(f"{ORDER_API_ROOT}/999/total").status_code == 404
+
+
+@pytest.mark.both_apps
+def test_get_orders_filtered_and_sorted(client, session):
+    """Tests filters and ?sort= select and order the rows across pages."""
+    from datetime import date
+    from app.models import Order
+
+    session.add_all(
+        Order(
+            OrderID=i,
+            CustomerID="VINET",
+            OrderDate=date(1997, 1, day),
+            ShippedDate=date(1997, 2, 1) if i % 2 else None,
+        )
+        for i, day in enumerate([3, 1, 2, 2, 5, 4], start=1)
+    )
+    session.commit()
+
+    seen, url = [], f"{ORDER_API_ROOT}?ShippedDate=null&sort=-OrderDate&limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(order["OrderID"] for order in json.loads(response.data))
+        url = (
+            response.headers["Link"][1:].split(">")[0]
+            if "Link" in response.headers
+            else None
+        )
+
+    assert seen == [6, 4, 2]
+    ranged = client.get(
+        f"{ORDER_API_ROOT}?OrderDate[gte]=1997-01-02&OrderDate[lt]=1997-01-04"
+        "&fields=OrderID"
+    )
+    assert [order["OrderID"] for order in json.loads(ranged.data)] == [3, 4, 1]
+
+
+@pytest.mark.both_apps
+def test_get_orders_sorted_by_nullable_column_page_into_nulls(client, session):
+    """Tests a descending page on a nullable column carries on into NULLs."""
+    from datetime import date
+    from app.models import Order
+
+    session.add_all(
+        Order(
+            OrderID=i,
+            CustomerID="VINET",
+            ShippedDate=date(1997, 2, i) if i <= 3 else None,
+        )
+        for i in range(1, 6)
+    )
+    session.commit()
+
+    pages, url = [], f"{ORDER_API_ROOT}?sort=-ShippedDate&limit=2&fields=OrderID"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([order["OrderID"] for order in json.loads(response.data)])
+        url = (
+            response.headers["Link"][1:].split(">")[0]
+            if "Link" in response.headers
+            else None
+        )
+
+    assert pages == [[3, 2], [1, 5], [4]]
+
+
+@pytest.mark.both_apps
+def test_get_orders_rejects_unknown_filters(client):
+    """Tests unknown filters, operators, sort columns and bad values 400."""
+    for query, message in (
+        ("Nope=1", "Unknown filter: Nope."),
+        ("ShipCountry=France", "Unknown filter: ShipCountry."),
+        ("OrderDate[xx]=1", "Unknown filter operator: xx."),
+        ("OrderDate=yesterday", "Invalid value for OrderDate: 'yesterday'."),
+        ("sort=Freight", "Unknown sort column: Freight."),
+    ):
+        response = client.get(f"{ORDER_API_ROOT}?{query}")
+        assert response.status_code == 400, query
+        assert json.loads(response.data)["message"] == message
+
+
+def _add_undated_orders(session, customer_id, order_ids):
+    from app.models import Order
+
+    session.add_all(Order(OrderID=i, CustomerID=customer_id) for i in order_ids)
+    session.commit()
+    session.expunge_all()
+
+
+@pytest.mark.both_apps
+def test_get_customer_history_pages_into_undated_orders(client, session):
+    """Tests the history pages on from the dated orders to the undated ones."""
+    _add_orders_with_details(session, "VINET", count=3, lines=1)
+    _add_undated_orders(session, "VINET", (4, 5, 6))
+
+    pages, url = [], f"{ORDER_API_ROOT}/history/VINET?limit=2"
+    while url:
+        response = client.get(url)
+        pages.append([o["OrderID"] for o in json.loads(response.data)])
+        cursor = response.headers.get("X-Next-Cursor")
+        url = cursor and f"{ORDER_API_ROOT}/history/VINET?limit=2&after={cursor}"
+
+    assert pages == [[3, 2], [1, 6], [5, 4]]
+
+
+def test_keyset_filter_bounds_descending_nullable_key(app):
+    """Tests a dated cursor seeks within the dated orders only."""
+    from datetime import date
+    from app.models import Order
+    from app.pagination import keyset_filter, next_section
+
+    keys = (Order.OrderDate, Order.OrderID)
+    sql = str(keyset_filter(keys, [date(1996, 7, 2), 2], descending=True))
+
+    assert '"Orders"."OrderDate" <= ' in sql
+    assert "IS NULL" not in sql
+    assert str(next_section(keys, [date(1996, 7, 2), 2], True)) == (
+        '"Orders"."OrderDate" IS NULL'
+    )
+    assert next_section(keys, [None, 2], True) is None
+
+
+def test_customer_history_page_is_an_index_range_scan(app, session):
+    """Tests SQLite seeks the (CustomerID, OrderDate) index to the cursor."""
+    from datetime import date
+    from sqlalchemy import select, text
+    from app.models import Order
+    from app.pagination import keyset_page
+
+    keys = (Order.OrderDate, Order.OrderID)
+    for after in ([date(1996, 7, 2), 2], [None, 5]):
+        stmt = keyset_page(
+            select(Order.OrderID).where(Order.CustomerID == "VINET"),
+            keys,
+            2,
+            after,
+            descending=True,
+        )
+        compiled = stmt.compile(
+            session.get_bind(), compile_kwargs={"literal_binds": True}
+        )
+        plan = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        detail = " ".join(row[-1] for row in plan)
+        assert "ix_Orders_CustomerID_OrderDate" in detail
+        assert "OrderDate" in detail.split("ix_Orders_CustomerID_OrderDate")[1]
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.config import ProductionConfig, TestingConfig
+from app.database import engine_options
+from app.pool import InstrumentedQueuePool, pool_status
+
+
+def _config(cls, **overrides):
+    config = {key: getattr(cls, key) for key in dir(cls) if key.isupper()}
+    config.update(overrides)
+    return config
+
+
+def test_engine_options_in_memory_sqlite_untouched():
+    """Tests in-memory SQLite keeps Flask-SQLAlchemy's default pool."""
+    assert engine_options(_config(TestingConfig)) == {}
+
+
+def test_engine_options_production():
+    """Tests the production pool settings become engine options."""
+    options = engine_options(
+        _config(
+            ProductionConfig,
+            SQLALCHEMY_DATABASE_URI="mysql+pymysql://u:p@db/northwind",
+        )
+    )
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == ProductionConfig.DB_POOL_SIZE
+    assert options["max_overflow"] == ProductionConfig.DB_MAX_OVERFLOW
+    assert options["pool_timeout"] == ProductionConfig.DB_POOL_TIMEOUT
+    assert options["pool_recycle"] == ProductionConfig.DB_POOL_RECYCLE
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+def test_engine_options_sqlite_file(tmp_path):
+    """Tests SQLite files get a busy timeout and cross-thread connections."""
+    options = engine_options(
+        _config(
+            ProductionConfig,
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'northwind.db'}",
+        )
+    )
+
+    assert options["connect_args"] == {
+        "timeout": ProductionConfig.SQLITE_BUSY_TIMEOUT,
+        "check_same_thread": False,
+    }
+
+
+def test_instrumented_pool_counts_checkouts_and_timeouts(tmp_path):
+    """Tests checkouts are timed and pool exhaustion is counted."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+        connect_args={"check_same_thread": False},
+    )
+
+    held = engine.connect()
+    held.execute(text("SELECT 1"))
+    status = pool_status(engine)
+    assert status["checked_out"] == 1
+    assert status["checkouts"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["timeouts"] == 1
+    assert status["checkout_latency_histogram"]["+Inf"] == 1
+    engine.dispose()
+
+
+def test_instrumented_pool_counts_a_retried_checkout_once(tmp_path, monkeypatch):
+    """Tests QueuePool retrying its own _do_get is still one checkout."""
+    from sqlalchemy.pool import QueuePool
+
+    do_get, retried = QueuePool._do_get, []
+
+    def racing_do_get(pool):
+        if not retried:
+            retried.append(True)
+            return pool._do_get()
+        return do_get(pool)
+
+    monkeypatch.setattr(QueuePool, "_do_get", racing_do_get)
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool
+    )
+
+    engine.connect().close()
+
+    assert retried
+    assert pool_status(engine)["checkouts"] == 1
+    engine.dispose()
+
+
+def test_pool_endpoint(client):
+    """Tests GET /internal/pool reports one entry per engine."""
+    response = client.get("/internal/pool")
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [entry["bind"] for entry in data] == [None]
+    assert data[0]["pool"] == "StaticPool"
@@ -1,3 +1,4 @@
+import pytest
 from unittest.mock import MagicMock
 from flask import Response
 import json
@@ -89,6 +90,7 @@ def test_create_product_success(client, mocker):
     assert mock_service.called
 
 
+@pytest.mark.both_apps
 def test_create_product_no_input(client):
     """Tests POST /products returns 400 when no data provided."""
     response = client.post(PRODUCT_API_ROOT, content_type="application/json")
@@ -184,3 +186,275 @@ def test_delete_product_success(client, mocker):
         data = json.loads(response.data)
         assert "successfully deleted" in data["message"]
     assert mock_service.called
+
+
+@pytest.mark.both_apps
+def test_get_products_limit_is_clamped(client, session, app):
+    """Tests GET /products never returns more than PAGE_SIZE_MAX rows."""
+    from app.models import Product
+
+    session.add_all(Product(ProductName=f"Item {i}") for i in range(5))
+    session.commit()
+
+    max_size = app.config["PAGE_SIZE_MAX"]
+    app.config["PAGE_SIZE_MAX"] = 3
+    try:
+        response = client.get(f"{PRODUCT_API_ROOT}?limit=500")
+    finally:
+        app.config["PAGE_SIZE_MAX"] = max_size
+
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 3
+    assert 'rel="next"' in response.headers["Link"]
+
+
+@pytest.mark.both_apps
+def test_get_products_invalid_limit(client):
+    """Tests GET /products returns 400 for a non-positive limit."""
+    response = client.get(f"{PRODUCT_API_ROOT}?limit=0")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.both_apps
+def test_get_product_sparse_fields(client, session):
+    """Tests GET /products/<id>?fields= returns only the requested fields."""
+    from app.models import Product
+
+    session.add(Product(ProductID=10, ProductName="Queso Cabrales", UnitPrice=21))
+    session.commit()
+
+    response = client.get(f"{PRODUCT_API_ROOT}/10?fields=ProductName,UnitPrice")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {
+        "ProductName": "Queso Cabrales",
+        "UnitPrice": "21.00",
+    }
+
+
+def test_get_products_conditional_get(client, session):
+    """Tests GET /products answers 304 until a product is written."""
+    from app.services import ProductService
+
+    ProductService.create({"ProductName": "Chai", "UnitPrice": 18})
+
+    first = client.get(PRODUCT_API_ROOT)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Last-Modified"]
+
+    cached = client.get(PRODUCT_API_ROOT, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    ProductService.create({"ProductName": "Chang", "UnitPrice": 19})
+
+    changed = client.get(PRODUCT_API_ROOT, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(json.loads(changed.data)) == 2
+
+
+def test_upsert_products_bulk(client, session):
+    """Tests PUT /products/bulk upserts by ProductID and inserts keyless rows."""
+    from app.models import Product
+
+    session.add(Product(ProductID=1, ProductName="Chai", UnitPrice=18))
+    session.add(Product(ProductID=2, ProductName="Chang", UnitPrice=19))
+    session.commit()
+
+    payload = [
+        {"ProductID": 1, "ProductName": "Chai", "UnitPrice": 18},
+        {"ProductID": 2, "UnitPrice": 21.5},
+        {"ProductName": "Aniseed Syrup", "UnitPrice": 10},
+    ]
+    response = client.put(
+        f"{PRODUCT_API_ROOT}/bulk",
+        data=json.dumps(payload),
+        content_type="application/json",
+    )
+    data = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert (data["inserted"], data["updated"], data["unchanged"]) == (1, 1, 1)
+    session.expire_all()
+    assert str(session.get(Product, 2).UnitPrice) == "21.50"
+    assert Product.query.count() == 3
+
+
+def test_get_product_sales(client, sales, queries):
+    """Tests GET /products/<id>/sales aggregates its order lines in one query."""
+    response = client.get(f"{PRODUCT_API_ROOT}/1/sales")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {
+        "ProductID": 1,
+        "Lines": 2,
+        "Units": 17,
+        "Revenue": "234.50",
+    }
+    assert len(queries) == 2
+
+
+@pytest.mark.both_apps
+def test_get_product_sales_not_found(client, session):
+    """Tests GET /products/<id>/sales returns 404 for an unknown product."""
+    assert client.get(f"{PRODUCT_API_ROOT}/999/sales").status_code == 404
+
+
+def _names(response):
+    return [product["ProductName"] for product in json.loads(response.data)]
+
+
+def test_search_products(client, session, queries):
+    """Tests GET /products/search matches word prefixes, best match first."""
+    for name in ("Queso Cabrales", "Queso Manchego La Pastora", "Chai", "Chang"):
+        client.post(PRODUCT_API_ROOT, json={"ProductName": name, "UnitPrice": 10})
+    queries.clear()
+
+    response = client.get(f"{PRODUCT_API_ROOT}/search?q=que+cab")
+
+    assert response.status_code == 200
+    assert _names(response) == ["Queso Cabrales"]
+    assert len(queries) == 2
+    assert sorted(_names(client.get(f"{PRODUCT_API_ROOT}/search?q=ch"))) == [
+        "Chai",
+        "Chang",
+    ]
+    limited = client.get(f"{PRODUCT_API_ROOT}/search?q=queso&limit=1&fields=ProductID")
+    assert len(json.loads(limited.data)) == 1
+    assert list(json.loads(limited.data)[0]) == ["ProductID"]
+
+
+def test_search_products_follows_writes(client, session):
+    """Tests updates, deletes and bulk inserts keep the search index in sync."""
+    chai = json.loads(
+        client.post(
+            PRODUCT_API_ROOT, json={"ProductName": "Chai", "UnitPrice": 18}
+        ).data
+    )
+    chang = json.loads(
+        client.post(
+            PRODUCT_API_ROOT, json={"ProductName": "Chang", "UnitPrice": 19}
+        ).data
+    )
+
+    client.put(f"{PRODUCT_API_ROOT}/{chai['ProductID']}", json={"ProductName": "Ikura"})
+    client.delete(f"{PRODUCT_API_ROOT}/{chang['ProductID']}")
+    client.put(
+        f"{PRODUCT_API_ROOT}/bulk",
+        json=[{"ProductName": "Chartreuse verte"}, {"ProductName": "Chocolade"}],
+    )
+
+    assert sorted(_names(client.get(f"{PRODUCT_API_ROOT}/search?q=ch"))) == [
+        "Chartreuse verte",
+        "Chocolade",
+    ]
+    assert _names(client.get(f"{PRODUCT_API_ROOT}/search?q=iku")) == ["Ikura"]
+
+
+def test_rebuild_search_retires_cached_searches(app, client, session):
+    """Tests flask rebuild-search indexes rows written outside the services
+    and invalidates the ETags of earlier searches."""
+    from app.models import Product
+
+    client.post(PRODUCT_API_ROOT, json={"ProductName": "Chai", "UnitPrice": 18})
+    before = client.get(f"{PRODUCT_API_ROOT}/search?q=ch")
+    session.execute(Product.__table__.insert(), {"ProductName": "Chang"})
+    session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-search"])
+
+    assert result.exit_code == 0, result.output
+    after = client.get(
+        f"{PRODUCT_API_ROOT}/search?q=ch",
+        headers={"If-None-Match": before.headers["ETag"]},
+    )
+    assert after.status_code == 200
+    assert sorted(_names(after)) == ["Chai", "Chang"]
+
+
+@pytest.mark.both_apps
+def test_search_products_invalid_query(client):
+    """Tests a query without words or a bad limit returns 400."""
+    assert client.get(f"{PRODUCT_API_ROOT}/search?q=+-").status_code == 400
+    assert client.get(f"{PRODUCT_API_ROOT}/search?q=a&limit=0").status_code == 400
+
+
+@pytest.mark.both_apps
+def test_get_products_filtered_and_sorted(client, session):
+    """Tests Products, small enough to scan, filter on unindexed columns."""
+    from app.models import Product
+
+    session.add_all(
+        [
+            Product(ProductID=1, ProductName="Chai", UnitPrice=18, CategoryID=1),
+            Product(ProductID=2, ProductName="Chang", UnitPrice=19, CategoryID=1),
+            Product(ProductID=3, ProductName="Ikura", UnitPrice=31, CategoryID=8),
+            Product(
+                ProductID=4,
+                ProductName="Mishi Kobe Niku",
+                UnitPrice=97,
+                CategoryID=6,
+                Discontinued=True,
+            ),
+        ]
+    )
+    session.commit()
+
+    response = client.get(
+        f"{PRODUCT_API_ROOT}?Discontinued=false&CategoryID=1&CategoryID=8"
+        "&sort=-UnitPrice"
+    )
+
+    assert response.status_code == 200
+    assert [p["ProductID"] for p in json.loads(response.data)] == [3, 2, 1]
+
+
+@pytest.mark.both_apps
+def test_get_products_unindexed_without_opt_in(client, app, monkeypatch):
+    """Tests unindexed filters and sorts 400 once Products is not exempt."""
+    monkeypatch.setitem(app.config, "UNINDEXED_FILTER_TABLES", ())
+
+    for query, message in (
+        ("SupplierID=1", "SupplierID is not indexed; it cannot be filtered on."),
+        ("sort=UnitPrice", "UnitPrice is not indexed; it cannot be sorted by."),
+    ):
+        response = client.get(f"{PRODUCT_API_ROOT}?{query}")
+        assert response.status_code == 400, query
+        assert json.loads(response.data)["message"] == message
+    assert client.get(f"{PRODUCT_API_ROOT}?CategoryID=1").status_code == 200
+
+
+def test_get_products_by_ids(client, session, queries):
+    """Tests GET /products?ids= returns the products in the order asked for,
+    reports the missing IDs and needs a single query."""
+    from app.models import Product
+
+    session.add_all(
+        Product(ProductID=i, ProductName=name)
+        for i, name in ((1, "Chai"), (2, "Chang"), (3, "Aniseed Syrup"))
+    )
+    session.commit()
+    session.expunge_all()
+    queries.clear()
+
+    response = client.get(f"{PRODUCT_API_ROOT}?ids=3,99,1,3&fields=ProductName")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {
+        "items": [{"ProductName": "Aniseed Syrup"}, {"ProductName": "Chai"}],
+        "missing": [99],
+    }
+    assert len(queries) == 2
+
+
+@pytest.mark.both_apps
+def test_get_products_by_ids_invalid(client, app, monkeypatch):
+    """Tests malformed, combined or too many IDs return 400."""
+    monkeypatch.setitem(app.config, "MULTI_GET_MAX_IDS", 2)
+
+    for query in ("ids=1,x", "ids=,", "ids=1&sort=-UnitPrice", "ids=1,2,3"):
+        response = client.get(f"{PRODUCT_API_ROOT}?{query}")
+        assert response.status_code == 400, query
@@ -0,0 +1,76 @@
+import json
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.database import db
+from app.profiler import QueryBudgetExceeded, query_budget, sql_profiler
+
+
+def test_db_headers(client, session):
+    """Tests responses report the statements the request executed."""
+    response = client.get("/customers")
+
+    assert response.headers["X-DB-Queries"] == "2"
+    assert float(response.headers["X-DB-Time"]) > 0
+
+
+def test_query_budget_exceeded_raises(app):
+    """Tests a view over its query budget fails when budgets are enforced."""
+
+    @query_budget(1)
+    def view():
+        db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+        return "ok"
+
+    with app.test_request_context("/"):
+        with pytest.raises(QueryBudgetExceeded, match="executed 2 queries"):
+            view()
+
+
+def test_query_budget_logged_when_not_enforced(app, monkeypatch, caplog):
+    """Tests an exceeded budget is only logged outside the test config."""
+    monkeypatch.setattr(sql_profiler, "enforce_budgets", False)
+
+    @query_budget(0)
+    def view():
+        db.session.execute(text("SELECT 1"))
+        return "ok"
+
+    with app.test_request_context("/"), caplog.at_level(logging.WARNING):
+        assert view() == "ok"
+    assert "budget is 0" in caplog.text
+
+
+def test_slow_query_logged_with_service_method(client, session, monkeypatch, caplog):
+    """Tests slow queries are logged with parameters and the calling method."""
+    from app.services import CustomerService
+
+    CustomerService.create({"CustomerID": "VINET", "CompanyName": "Vins"})
+    monkeypatch.setattr(sql_profiler, "slow_threshold", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.profiler"):
+        client.get("/orders/history/VINET")
+
+    assert "from OrderService.get_customer_history" in caplog.text
+    assert "'VINET'" in caplog.text
+
+
+def test_create_order_within_budget(client, session):
+    """Tests POST /orders does not lazy-load one product per order line."""
+    from app.models import Customer, Product
+
+    session.add(Customer(CustomerID="VINET", CompanyName="Vins"))
+    session.add_all(Product(ProductID=p, ProductName=f"P{p}") for p in range(1, 6))
+    session.commit()
+    lines = [
+        {"ProductID": p, "UnitPrice": 10, "Quantity": 1, "Discount": 0}
+        for p in range(1, 6)
+    ]
+
+    response = client.post("/orders", json={"CustomerID": "VINET", "details": lines})
+
+    assert response.status_code == 201
+    assert len(json.loads(response.data)["details"]) == 5
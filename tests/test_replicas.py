@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app import create_app
+from app.caching import ENTITY_CACHES
+from app.config import TestingConfig, config_by_name
+from app.database import db
+from app.models import Customer
+from app.replicas import Replica, ReplicaRouter
+from app.services import CustomerService
+
+
+def _replicated_app(monkeypatch, primary, replicas):
+    """App on ``primary`` reading from ``replicas``; ``monkeypatch`` undoes the
+    config it registers and the replica bind metadata it adds to ``db``."""
+    config = type(
+        "ReplicaTestingConfig",
+        (TestingConfig,),
+        {"SQLALCHEMY_DATABASE_URI": primary, "DB_REPLICAS": replicas},
+    )
+    monkeypatch.setitem(config_by_name, "test-replicas", config)
+    monkeypatch.setattr(db, "metadatas", dict(db.metadatas))
+    return create_app("test-replicas")
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    """App over two SQLite files; ALFKI's CompanyName tells them apart."""
+    app = _replicated_app(
+        monkeypatch,
+        f"sqlite:///{tmp_path / 'primary.db'}",
+        [f"sqlite:///{tmp_path / 'replica.db'}"],
+    )
+
+    with app.app_context():
+        for bind, name in ((None, "Primary"), ("replica0", "Replica")):
+            engine = db.engines[bind]
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(
+                    Customer.__table__.insert(),
+                    {"CustomerID": "ALFKI", "CompanyName": name},
+                )
+        # Rows written outside a session are not seen by the entity caches.
+        for cache in ENTITY_CACHES.values():
+            cache.invalidate()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_reads_go_to_the_replica(replicated):
+    """Tests GET routes read the data and the validators from the replica."""
+    client = replicated.test_client()
+
+    response = client.get("/customers/ALFKI")
+
+    assert json.loads(response.data)["CompanyName"] == "Replica"
+    pools = json.loads(client.get("/internal/pool").data)
+    replica = next(pool for pool in pools if pool["bind"] == "replica0")
+    assert replica["replica"]["healthy"] is True
+    assert replica["checkouts"] >= 1
+
+
+def test_reads_after_a_write_stay_on_the_primary(replicated):
+    """Tests a read following a write in the same request uses the primary."""
+    with replicated.test_request_context("/customers"):
+        replicated.preprocess_request()
+        CustomerService.create({"CustomerID": "BONAP", "CompanyName": "Bon app'"})
+
+        ids = [customer.CustomerID for customer in CustomerService.get_all()]
+
+    assert ids == ["ALFKI", "BONAP"]
+
+    with replicated.test_request_context("/customers"):
+        replicated.preprocess_request()
+        assert [c.CustomerID for c in CustomerService.get_all()] == ["ALFKI"]
+
+
+def test_writes_do_not_start_from_replica_entities(replicated):
+    """Tests an update compares against the primary's row, not a replica's
+    cached one (which would make this change look like a no-op)."""
+    client = replicated.test_client()
+    client.get("/customers/ALFKI")
+
+    response = client.put("/customers/ALFKI", json={"CompanyName": "Replica"})
+
+    assert json.loads(response.data)["CompanyName"] == "Replica"
+    with db.engines[None].connect() as connection:
+        assert (
+            connection.exec_driver_sql('SELECT "CompanyName" FROM "Customers"').scalar()
+            == "Replica"
+        )
+
+
+def test_unreachable_replica_is_ejected(replicated, tmp_path):
+    """Tests a replica that cannot be connected to is ejected and the read
+    retried on the primary."""
+    db.engines["replica0"].dispose()
+    (tmp_path / "replica.db").unlink()
+    (tmp_path / "replica.db").mkdir()
+    client = replicated.test_client()
+
+    response = client.get("/customers/ALFKI")
+
+    assert response.status_code == 200
+    assert json.loads(response.data)["CompanyName"] == "Primary"
+    router = replicated.extensions["replica_router"]
+    assert router.replicas[0].healthy is False
+    assert router.choose() is None
+
+
+def test_query_error_does_not_eject_the_replica(replicated):
+    """Tests an OperationalError on a working connection is not an ejection."""
+    with db.engines["replica0"].begin() as connection:
+        connection.exec_driver_sql('DROP TABLE "Customers"')
+    client = replicated.test_client()
+
+    with pytest.raises(exc.OperationalError, match="no such table"):
+        client.get("/customers/ALFKI")
+
+    router = replicated.extensions["replica_router"]
+    assert router.replicas[0].healthy is True
+
+
+def test_router_prefers_least_outstanding():
+    """Tests the router picks the healthy replica with fewest connections."""
+    busy, idle, down = (Replica(name, create_engine("sqlite://"), 30) for name in "abc")
+    busy.outstanding, idle.outstanding = 3, 1
+    down.eject()
+    router = ReplicaRouter([busy, idle, down])
+
+    assert {router.choose().name for _ in range(4)} == {"b"}
+    idle.outstanding = 3
+    assert {router.choose().name for _ in range(4)} == {"a", "b"}
@@ -0,0 +1,57 @@
+import random
+
+from app.database import db
+from app.migrations import current_version, migrations
+from app.models import Customer, Order, OrderDetail, Product
+from app.seed import MAX_LINES, orders, seed, sizes
+
+
+def test_seed_command_fills_tables(app, session):
+    """Tests flask seed loads every table at the requested scale."""
+    result = app.test_cli_runner().invoke(args=["seed", "--scale", "1"])
+
+    assert result.exit_code == 0, result.output
+    size = sizes(1)
+    assert Customer.query.count() == size["customers"]
+    assert Product.query.count() == size["products"]
+    assert Order.query.count() == size["orders"]
+    lines = OrderDetail.query.count()
+    assert size["orders"] <= lines <= size["orders"] * MAX_LINES
+
+    order = Order.query.order_by(Order.OrderID.desc()).first()
+    assert order.OrderDate <= order.RequiredDate
+    assert order.customer is not None
+
+    assert current_version(db.engine) == migrations()[-1][0]
+
+
+def test_seed_restores_synchronous(app, session):
+    """Tests the bulk load does not leave PRAGMA synchronous off."""
+    pragma = "PRAGMA synchronous"
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql(f"{pragma}=NORMAL")
+
+    seed(1)
+
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql(pragma).scalar() == 1
+
+
+def test_seed_command_refuses_non_empty_database(app, session):
+    """Tests flask seed does not append to existing orders without --reset."""
+    runner = app.test_cli_runner()
+    runner.invoke(args=["seed", "--scale", "1"])
+
+    result = runner.invoke(args=["seed", "--scale", "1"])
+
+    assert result.exit_code != 0
+    assert "--reset" in result.output
+
+
+def test_seed_is_deterministic():
+    """Tests the same seed generates the same rows."""
+    first = list(orders(500, 50, random.Random(7)))
+    second = list(orders(500, 50, random.Random(7)))
+
+    assert first == second
+    assert first != list(orders(500, 50, random.Random(8)))
@@ -0,0 +1,102 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from unittest import mock
+
+from app.models import (
+    Customer,
+    CustomerSchema,
+    Order,
+    OrderDetail,
+    OrderSchema,
+    Product,
+    ProductSchema,
+)
+from app.serialization import CompiledSchema
+
+
+def _marshmallow_dump(schema, obj, many=False):
+    """Reference output from plain marshmallow, nested schemas included."""
+    with mock.patch.object(CompiledSchema, "_row_serializer", return_value=None):
+        return schema.dump(obj, many=many)
+
+
+def _orders():
+    chai = Product(ProductID=1, ProductName="Chai")
+    first = Order(
+        OrderID=10248,
+        CustomerID="VINET",
+        OrderDate=date(1996, 7, 4),
+        ShippedDate=None,
+        Freight=Decimal("32.385"),
+        ShipCity="Reims",
+    )
+    first.details = [
+        OrderDetail(
+            ProductID=1, UnitPrice=14.005, Quantity=12, Discount=0, product=chai
+        ),
+        OrderDetail(ProductID=2, UnitPrice=Decimal("9.8"), Quantity=10, product=None),
+    ]
+    second = Order(OrderID=10249, CustomerID="TOMSP", OrderDate=date(999, 1, 2))
+    return [first, second]
+
+
+def test_compiled_order_dump_matches_marshmallow():
+    """Tests the compiled OrderSchema serializer reproduces marshmallow exactly."""
+    schema = OrderSchema(many=True)
+    orders = _orders()
+
+    assert schema._row_serializer() is not None
+    compiled = schema.dump(orders)
+    reference = _marshmallow_dump(schema, orders, many=True)
+
+    assert compiled == reference
+    assert json.dumps(compiled, default=str) == json.dumps(reference, default=str)
+    assert compiled[0]["details"][0]["UnitPrice"] == Decimal("14.00")
+
+
+def test_compiled_dump_honors_only():
+    """Tests sparse schemas compile to serializers emitting only their fields."""
+    schema = ProductSchema(only=("ProductID", "UnitPrice"))
+    product = Product(ProductID=7, ProductName="Uncle Bob's", UnitPrice=30)
+
+    assert schema.dump(product) == {"ProductID": 7, "UnitPrice": Decimal("30.00")}
+    assert schema.dump(product) == _marshmallow_dump(schema, product)
+
+
+def test_compiled_customer_and_product_dump_match_marshmallow():
+    """Tests every CustomerSchema/ProductSchema field matches marshmallow."""
+    customer = Customer(CustomerID="ALFKI", CompanyName="Alfreds", City="Berlin")
+    product = Product(ProductID=1, ProductName="Chai", Discontinued=True)
+
+    assert CustomerSchema().dump(customer) == _marshmallow_dump(
+        CustomerSchema(), customer
+    )
+    assert ProductSchema().dump(product) == _marshmallow_dump(ProductSchema(), product)
+
+
+def test_dict_input_falls_back_to_marshmallow():
+    """Tests dicts are still serialized by marshmallow (key access semantics)."""
+    data = {"ProductID": "5", "ProductName": "Chai"}
+
+    assert ProductSchema().dump(data) == {"ProductID": 5, "ProductName": "Chai"}
+
+
+def test_compiled_decimal_honors_rounding():
+    """Tests Decimal fields with places/rounding are quantized like marshmallow."""
+    from decimal import ROUND_DOWN
+    from marshmallow import fields as ma_fields
+
+    class PriceSchema(CompiledSchema):
+        Exact = ma_fields.Decimal()
+        Truncated = ma_fields.Decimal(places=1, rounding=ROUND_DOWN)
+
+    row = Product(ProductID=1)
+    row.Exact, row.Truncated = Decimal("2.675"), Decimal("2.69")
+
+    assert PriceSchema().dump(row) == {
+        "Exact": Decimal("2.675"),
+        "Truncated": Decimal("2.6"),
+    }
+    assert PriceSchema().dump(row) == _marshmallow_dump(PriceSchema(), row)
@@ -0,0 +1,133 @@
+import json
+
+from app.database import db
+from app.models import (
+    CountryMonthlySales,
+    CustomerMonthlySales,
+    Customer,
+    ProductMonthlySales,
+)
+from app.services.aggregates import money
+from app.services.summary_service import rebuild
+from app.versioning import table_state
+
+SUMMARIES = (ProductMonthlySales, CustomerMonthlySales, CountryMonthlySales)
+
+
+def _snapshot():
+    """Non-empty summary rows of every table, revenue rounded to cents."""
+    snapshot = {}
+    for model in SUMMARIES:
+        rows = db.session.execute(db.select(model.__table__)).all()
+        snapshot[model.__tablename__] = sorted(
+            (*row[:-1], money(row[-1])) for row in rows if any(row[2:-1])
+        )
+    return snapshot
+
+
+def _order(customer_id, order_date, country, *lines):
+    order = {
+        "CustomerID": customer_id,
+        "OrderDate": order_date,
+        "details": [
+            {"ProductID": p, "UnitPrice": price, "Quantity": q, "Discount": d}
+            for p, price, q, d in lines
+        ],
+    }
+    if country is not None:
+        order["ShipCountry"] = country
+    return order
+
+
+def test_order_writes_maintain_summaries(client, sales):
+    """Tests create, update, delete and bulk writes keep the summaries equal
+    to a full rebuild."""
+    rebuild(db.session.connection())
+    db.session.add(Customer(CustomerID="TOMSP", CompanyName="Toms Spezialitäten"))
+    db.session.commit()
+
+    created = client.post(
+        "/orders", json=_order("VINET", "1997-01-20", "France", (2, 9.8, 3, 0.25))
+    )
+    assert created.status_code == 201
+    order_id = json.loads(created.data)["OrderID"]
+
+    moved = client.put(
+        f"/orders/{order_id}",
+        json={"CustomerID": "TOMSP", "OrderDate": "1997-02-01"},
+    )
+    assert moved.status_code == 200
+    assert client.put("/orders/1", json={"ShipCountry": "Germany"}).status_code == 200
+    assert client.put("/orders/2", json={"Freight": 5}).status_code == 200
+    assert client.delete("/orders/2").status_code == 204
+    bulk = client.post(
+        "/orders/bulk",
+        json=[
+            _order("TOMSP", "1997-02-14", "Germany", (1, 14, 2, 0), (2, 9.8, 1, 0)),
+            _order("VINET", "1997-03-03", None),
+        ],
+    )
+    assert bulk.status_code == 201
+
+    incremental = _snapshot()
+    rebuild(db.session.connection())
+    assert incremental == _snapshot()
+    assert incremental["CountryMonthlySales"] == [
+        ("France", "1997-02", 1, 1, money("22.05")),
+        ("Germany", "1996-07", 1, 2, money("256.20")),
+        ("Germany", "1997-02", 1, 2, money("37.80")),
+    ]
+
+
+def test_get_product_summary(client, sales, queries):
+    """Tests GET /summaries/products/<id> serves months from the summary."""
+    rebuild(db.session.connection())
+    db.session.commit()
+    queries.clear()
+
+    response = client.get("/summaries/products/1?from=1996-01&to=1997-12")
+
+    assert response.status_code == 200
+    assert json.loads(response.data) == {
+        "ProductID": 1,
+        "Months": [
+            {"Month": "1996-07", "Lines": 1, "Units": 12, "Revenue": "168.00"},
+            {"Month": "1997-01", "Lines": 1, "Units": 5, "Revenue": "66.50"},
+        ],
+    }
+    assert len(queries) == 2
+    assert all("OrderDetails" not in statement for statement in queries)
+
+
+def test_get_customer_summary(client, sales):
+    """Tests GET /summaries/customers/<id> filters by month."""
+    rebuild(db.session.connection())
+    db.session.commit()
+
+    response = client.get("/summaries/customers/VINET?from=1997-01")
+
+    assert json.loads(response.data)["Months"] == [
+        {"Month": "1997-01", "Orders": 1, "Lines": 1, "Revenue": "66.50"},
+        {"Month": "1997-03", "Orders": 1, "Lines": 0, "Revenue": "0.00"},
+    ]
+
+
+def test_get_summary_not_found_and_invalid_month(client, session):
+    """Tests unknown ids return 404 and malformed months 400."""
+    assert client.get("/summaries/products/999").status_code == 404
+    assert client.get("/summaries/customers/NONEX").status_code == 404
+    response = client.get("/summaries/countries/France?from=1997-13")
+    assert response.status_code == 400
+    assert client.get("/summaries/countries/France").status_code == 200
+
+
+def test_rebuild_summaries_command(app, sales):
+    """Tests flask rebuild-summaries recomputes every summary table and
+    retires the ETags of the summary routes."""
+    (before,), _ = table_state(("Orders",))
+    result = app.test_cli_runner().invoke(args=["rebuild-summaries"])
+
+    assert result.exit_code == 0, result.output
+    assert "3 CustomerMonthlySales" in result.output
+    assert db.session.get(CustomerMonthlySales, ("VINET", "1996-07")).Orders == 1
+    assert table_state(("Orders",))[0] == (before + 1,)